@@ -0,0 +1,155 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 3600
+
+def normalize_question(question):
+    """
+    Reduces a question to the form used as its cache key: Unicode-normalized, case-folded,
+    with whitespace collapsed and trailing punctuation dropped, so "What is INSAT-3D?"
+    and "what is  insat-3d" share an entry.
+    """
+    text = unicodedata.normalize('NFKC', question).casefold()
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text.rstrip(' ?!.')
+
+class AnswerCache:
+    """
+    Caches answers of GraphRAGService.query_graph, keyed on the normalized question and
+    the graph version stamp (graph_version.py) they were computed under.
+
+    The first tier is an in-memory LRU of up to max_entries answers. The optional second
+    tier is a SQLite file at path, which survives restarts and can be shared by several
+    processes on one machine. Answers expire ttl_seconds after they were stored. When
+    the graph version changes, set_graph_version() drops every answer from other
+    versions (and expired ones) in both tiers, so a cached answer never outlives a re-ingest.
+
+    Any object with get(question), put(question, value, graph_version), set_graph_version(stamp),
+    a graph_version attribute and a stats dict can be passed to GraphRAGService instead.
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS, path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.graph_version = None
+        self.stats = {"hits": 0, "memory_hits": 0, "persistent_hits": 0, "misses": 0,
+                      "writes": 0, "expirations": 0, "evictions": 0, "invalidations": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " question TEXT NOT NULL,"
+                " graph_version TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (question, graph_version))"
+            )
+            self._conn.commit()
+
+    def set_graph_version(self, stamp):
+        """
+        Switches the cache to a graph version, dropping all answers from other versions.
+        Returns True if the version changed.
+        """
+        with self._lock:
+            if stamp == self.graph_version:
+                return False
+            self.stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self.graph_version = stamp
+            if self._conn:
+                with self._conn:
+                    deleted = self._conn.execute(
+                        "DELETE FROM answers WHERE graph_version != ? OR created_at < ?",
+                        (str(stamp), time.time() - self.ttl_seconds),
+                    ).rowcount
+                self.stats["invalidations"] += deleted
+            return True
+
+    def get(self, question):
+        key = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._entries[key]
+                self.stats["expirations"] += 1
+
+            if self._conn:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM answers WHERE question = ? AND graph_version = ?",
+                    (key, str(self.graph_version)),
+                ).fetchone()
+                if row is not None:
+                    if now - row[1] <= self.ttl_seconds:
+                        value = json.loads(row[0])
+                        self._remember(key, row[1], value)
+                        self.stats["hits"] += 1
+                        self.stats["persistent_hits"] += 1
+                        return value
+                    with self._conn:
+                        self._conn.execute(
+                            "DELETE FROM answers WHERE question = ? AND graph_version = ?",
+                            (key, str(self.graph_version)),
+                        )
+                    self.stats["expirations"] += 1
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, question, value, graph_version=None):
+        """
+        Stores an answer under the current graph version. If graph_version (the version
+        the answer was computed under) is given and is no longer current, nothing is stored.
+        """
+        key = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            if graph_version is not None and graph_version != self.graph_version:
+                return
+            self._remember(key, now, value)
+            if self._conn:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO answers (question, graph_version, value, created_at) VALUES (?, ?, ?, ?)",
+                        (key, str(self.graph_version), json.dumps(value, ensure_ascii=False, default=str), now),
+                    )
+            self.stats["writes"] += 1
+
+    def _remember(self, key, created_at, value):
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def hit_rate(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def close(self):
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
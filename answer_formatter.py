@@ -0,0 +1,231 @@
+"""
+Deterministic answers for query results that do not need the QA LLM.
+
+The QA LLM (gpt-4o) is the slowest and most expensive call of a question, and for most
+results it only turns {"launchMass": 2060} into "The launch mass of INSAT-3D is 2060 kg."
+AnswerFormatter classifies the shape of a result and renders the simple shapes from the
+column aliases, with the unit taken from the suffix of the alias or of the property it
+returns ("RETURN s.launch_mass_kg AS launchMass" -> kg):
+  - empty       no rows                  "I don't know ..."
+  - scalar      one row, one column      "The launch mass of INSAT-3D is 2060 kg."
+                                         "There are 12 spacecraft."  (count(...) AS alias)
+  - single_row  one row, a few columns   "For INSAT-3D, the launch mass is 2060 kg and ..."
+  - list        one column of names or values, at most max_list_items rows
+                                         "The instruments for INSAT-3D are Imager and Sounder."
+  - complex     anything else: several rows of several columns, nested values or long
+                text. These still go to the QA LLM.
+"""
+import re
+import threading
+
+DEFAULT_MAX_LIST_ITEMS = 25
+MAX_COLUMNS = 6
+# Longer strings are descriptions, which the QA LLM summarizes better than a template.
+MAX_SIMPLE_CHARS = 120
+SHAPES = ("empty", "scalar", "single_row", "list", "complex")
+
+# Alias suffix -> unit, e.g. launch_mass_kg, designLifeYears, powerW.
+UNITS = {
+    "kg": "kg", "g": "g", "t": "t", "km": "km", "m": "m", "cm": "cm", "mm": "mm", "nm": "nm",
+    "year": "years", "years": "years", "day": "days", "days": "days", "hour": "hours", "hours": "hours",
+    "min": "minutes", "minutes": "minutes", "s": "s", "sec": "s", "seconds": "s",
+    "w": "W", "watts": "W", "kw": "kW", "hz": "Hz", "khz": "kHz", "mhz": "MHz", "ghz": "GHz",
+    "kbps": "kbps", "mbps": "Mbps", "gbps": "Gbps", "deg": "°", "degrees": "°", "percent": "%", "pct": "%",
+}
+_UNSPACED_UNITS = {"°", "%"}
+_COUNT_WORDS = {"total", "count", "num", "number", "of"}
+_UNCOUNTABLE = {"spacecraft", "aircraft", "data", "equipment", "information", "software", "series"}
+_RETURN_ITEM_RE = re.compile(r"\b\w+\.`?(\w+)`?\s+AS\s+`?(\w+)`?", re.I)
+_COUNT_ITEM_RE = re.compile(r"\bcount\s*\([^()]*\)\s+AS\s+`?(\w+)`?", re.I)
+# Words ending in s that are singular.
+_SINGULAR_S_RE = re.compile(r"(ss|us|is)$")
+_EMPTY_ANSWER = "I don't know the answer; the knowledge graph has no information matching the question."
+
+def _alias_words(column):
+    """
+    "s.launch_mass_kg" -> ["launch", "mass", "kg"], "totalSpacecraft" -> ["total", "spacecraft"].
+    """
+    column = column.rsplit(".", 1)[-1]
+    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", column)
+    return re.findall(r"[a-z0-9]+", spaced.lower())
+
+def _describe(column, properties=None):
+    """
+    Returns (label words, unit or None) for a column alias; properties maps aliases to the
+    property each one returns.
+    """
+    words = _alias_words(column)
+    unit = UNITS.get(words[-1]) if len(words) > 1 else None
+    if unit:
+        words = words[:-1]
+    elif properties and column in properties:
+        source = _alias_words(properties[column])
+        unit = UNITS.get(source[-1]) if len(source) > 1 else None
+    return words, unit
+
+def returned_properties(cypher):
+    """
+    Maps the aliases of "var.property AS alias" return items in cypher to their property.
+    """
+    return {alias: prop for prop, alias in _RETURN_ITEM_RE.findall(cypher or "")}
+
+def count_aliases(cypher):
+    """
+    Returns the aliases of "count(...) AS alias" return items in cypher.
+    """
+    return set(_COUNT_ITEM_RE.findall(cypher or ""))
+
+def _is_plural(word):
+    return len(word) > 3 and word.endswith("s") and not _SINGULAR_S_RE.search(word)
+
+def _singular(words):
+    if not words:
+        return "result"
+    last = words[-1]
+    if _is_plural(last) and last not in _UNCOUNTABLE:
+        if last.endswith("ies"):
+            last = last[:-3] + "y"
+        elif re.search(r"(x|z|ch|sh|ss)es$", last):
+            last = last[:-2]
+        else:
+            last = last[:-1]
+    return " ".join(words[:-1] + [last])
+
+def _verb(words):
+    return "are" if words and _is_plural(words[-1]) and words[-1] not in _UNCOUNTABLE else "is"
+
+def _plural(words):
+    if not words:
+        return "results"
+    last = words[-1]
+    if last in _UNCOUNTABLE or _is_plural(last):
+        plural = last
+    elif re.search(r"(s|x|z|ch|sh)$", last):
+        plural = last + "es"
+    elif re.search(r"[^aeiou]y$", last):
+        plural = last[:-1] + "ies"
+    else:
+        plural = last + "s"
+    return " ".join(words[:-1] + [plural])
+
+def _join(items):
+    return items[0] if len(items) == 1 else ", ".join(items[:-1]) + " and " + items[-1]
+
+def _is_simple(value):
+    if isinstance(value, (list, tuple)):
+        return len(value) <= MAX_COLUMNS and all(_is_simple(item) and not isinstance(item, (list, tuple))
+                                                 for item in value)
+    if isinstance(value, str):
+        return len(value) <= MAX_SIMPLE_CHARS
+    return value is None or isinstance(value, (bool, int, float))
+
+def format_value(value, unit=None):
+    if isinstance(value, (list, tuple)):
+        return _join([format_value(item, unit) for item in value]) if value else "none"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, float):
+        value = int(value) if value.is_integer() else round(value, 4)
+    text = str(value)
+    if unit and isinstance(value, (int, float)):
+        text += unit if unit in _UNSPACED_UNITS else f" {unit}"
+    return text
+
+class AnswerFormatter:
+    """
+    Classifies query results and answers the simple shapes (see module docstring).
+    stats counts answers per shape, how many were formatted, and the QA LLM calls the
+    service reports with count(): "qa_llm", "cheap_qa_llm" and "escalated".
+    """
+    def __init__(self, max_list_items=DEFAULT_MAX_LIST_ITEMS, enabled=True):
+        self.max_list_items = max_list_items
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stats = {"answers": 0, "formatted": 0, "qa_llm": 0, "cheap_qa_llm": 0, "escalated": 0,
+                      "shapes": {shape: 0 for shape in SHAPES}}
+
+    def count(self, *names):
+        with self._lock:
+            for name in names:
+                self.stats[name] += 1
+
+    def formatted_share(self):
+        return self.stats["formatted"] / self.stats["answers"] if self.stats["answers"] else 0.0
+
+    def classify(self, rows):
+        if not rows:
+            return "empty"
+        columns = list(rows[0])
+        if any(list(row) != columns for row in rows) or not all(_is_simple(v) for row in rows for v in row.values()):
+            return "complex"
+        if len(rows) == 1:
+            if len(columns) == 1:
+                return "list" if _alias_words(columns[0])[-1:] == ["name"] else "scalar"
+            return "single_row" if len(columns) <= MAX_COLUMNS else "complex"
+        if len(columns) == 1 and len(rows) <= self.max_list_items:
+            return "list"
+        return "complex"
+
+    def answer(self, fetched, subject=None, cypher=None):
+        """
+        Returns (shape, answer) for a result from result_context.fetch_context; answer is
+        None for complex results, or for every result when formatting is disabled.
+        subject is the entity the question names, if it names exactly one, and cypher the
+        statement that returned the result.
+        """
+        shape = self.classify(fetched["rows"])
+        text = None
+        if self.enabled and shape != "complex":
+            text = getattr(self, f"_{shape}")(fetched, subject, returned_properties(cypher), count_aliases(cypher))
+        with self._lock:
+            self.stats["answers"] += 1
+            self.stats["shapes"][shape] += 1
+            if text is not None:
+                self.stats["formatted"] += 1
+        return shape, text
+
+    # --- Shapes ---
+    def _empty(self, fetched, subject, properties, counts):
+        return _EMPTY_ANSWER
+
+    def _scalar(self, fetched, subject, properties, counts):
+        (column, value), = fetched["rows"][0].items()
+        words, unit = _describe(column, properties)
+        if column in counts and isinstance(value, int) and not isinstance(value, bool):
+            noun = [word for word in words if word not in _COUNT_WORDS]
+            about = f" for {subject}" if subject else ""
+            if value == 1:
+                return f"There is 1 {_singular(noun)}{about}."
+            return f"There are {value} {_plural(noun)}{about}."
+        label = " ".join(words) or "value"
+        of = f" of {subject}" if subject else ""
+        if value is None:
+            return f"The knowledge graph does not record the {label}{of}."
+        return f"The {label}{of} {_verb(words)} {format_value(value, unit)}."
+
+    def _single_row(self, fetched, subject, properties, counts):
+        parts = []
+        for column, value in fetched["rows"][0].items():
+            words, unit = _describe(column, properties)
+            label = " ".join(words) or "value"
+            verb = _verb(words)
+            parts.append(f"the {label} {verb} not recorded" if value is None else f"the {label} {verb} {format_value(value, unit)}")
+        text = _join(parts) + "."
+        return f"For {subject}, {text}" if subject else text[0].upper() + text[1:]
+
+    def _list(self, fetched, subject, properties, counts):
+        column = next(iter(fetched["rows"][0]))
+        words, unit = _describe(column, properties)
+        if words[-1:] == ["name"]:
+            words = words[:-1]
+        values = list(dict.fromkeys(format_value(row[column], unit) for row in fetched["rows"]
+                                    if row[column] is not None))
+        about = f" for {subject}" if subject else ""
+        if not values:
+            return f"The knowledge graph does not record any {_plural(words)}{about}."
+        if fetched["truncated"]:
+            total = f" of {fetched['total_rows']}" if fetched["total_rows"] is not None else ""
+            return f"The first {len(values)}{total} {_plural(words)}{about} are {_join(values)}. The list is incomplete."
+        if len(values) == 1:
+            return f"The {_singular(words)}{about} is {values[0]}."
+        return f"The {_plural(words)}{about} are {_join(values)}."
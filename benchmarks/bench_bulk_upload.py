@@ -0,0 +1,84 @@
+"""
+Benchmark for the UNWIND bulk translator (cypher_bulk.py) against upload_to_neo4j.py's
+per-file path.
+
+Always reports, offline, how many distinct statement texts Neo4j would have to plan with
+each path and how long the translation takes. If Neo4j is configured (NEO4J_URI /
+NEO4J_USERNAME / NEO4J_PASSWORD), it also loads the corpus both ways into an emptied
+set of 'Bench*' labels, with the schema bootstrap applied, and compares load times.
+
+Usage:
+    python benchmarks/bench_bulk_upload.py --files 200 --entities 2000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_schema_bootstrap import clear_data, drop_schema, make_corpus
+import upload_to_neo4j
+from cypher_bulk import BulkLoad
+from upload_to_neo4j import Neo4jUploader, discover_merge_keys, plan_schema, script_statements
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--entities", type=int, default=2000)
+    parser.add_argument("--statements-per-file", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="Workers for the per-file path.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths, _ = make_corpus(tmp, args.files, args.entities, args.statements_per_file)
+        scripts = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                scripts.append(f.read())
+
+        per_file_statements = [statement for script in scripts for statement in script_statements(script)]
+        start = time.perf_counter()
+        load = BulkLoad()
+        for script in scripts:
+            load.add_script(script)
+        batches = load.batches()
+        translate_seconds = time.perf_counter() - start
+
+        print(f"Corpus: {args.files} files, {len(per_file_statements)} statements")
+        print(f"Per-file path: {len(per_file_statements)} statements, {len(set(per_file_statements))} distinct texts to plan")
+        print(f"Bulk path: {len(batches)} UNWIND batches, {len({query for query, _ in batches})} distinct texts to plan, "
+              f"{sum(len(rows) for _, rows in batches)} rows ({len(load.nodes)} nodes, {len(load.relationships)} relationships), "
+              f"{load.stats['raw']} statements left as written; translated in {translate_seconds * 1000:.0f} ms")
+
+        if not upload_to_neo4j.NEO4J_PASSWORD:
+            print("Neo4j not configured; skipping the load comparison.")
+            return
+
+        uploader = Neo4jUploader(upload_to_neo4j.NEO4J_URI, upload_to_neo4j.NEO4J_USERNAME, upload_to_neo4j.NEO4J_PASSWORD)
+        if not uploader.driver:
+            sys.exit("Neo4j is not reachable.")
+        plan = plan_schema(discover_merge_keys(paths))
+        print(f"{'path':>10} {'seconds':>8} {'stmts/s':>9}")
+        try:
+            for mode in ("per-file", "bulk"):
+                clear_data(uploader.driver)
+                drop_schema(uploader.driver, plan)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    uploader.bootstrap_schema(plan)
+                    if mode == "bulk":
+                        stats = uploader.upload_bulk(paths)
+                    else:
+                        stats = uploader.upload_files(paths, workers=args.workers)
+                print(f"{mode:>10} {stats['elapsed_seconds']:>8.2f} {stats['statements_per_second']:>9.0f}")
+        finally:
+            clear_data(uploader.driver)
+            drop_schema(uploader.driver, plan)
+            uploader.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark for clean_data.py: serial extraction vs. the process-pool mode at
+several worker counts, on a synthetic corpus of scraped-page-like markdown.
+Also checks that every mode writes byte-identical output.
+
+Usage:
+    python benchmarks/bench_clean_data.py --files 5000 --workers 1 2 4 8
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clean_data import extract_descriptions_parallel, extract_main_description_by_structural_markers
+
+START_PATTERN = r'^#\s.+?\n'
+END_PATTERN = r'(?:^\s*##+\s.*?\n)|(?:^\s*[\*\-]\s*\[(?:!\[.*?\]\(.*?\)|.*?\]\(.*?\)).*?\n)'
+
+def make_page(rng: random.Random, page_id: int) -> str:
+    nav = "".join(f"* [Menu {i}](https://www.mosdac.gov.in/menu-{i})\n" for i in range(rng.randint(20, 80)))
+    description = "\n\n".join(
+        " ".join(rng.choice(["INSAT-3D", "imager", "sounder", "channel", "orbit", "payload", "data", "product"]) for _ in range(60))
+        for _ in range(rng.randint(3, 12))
+    )
+    footer = "".join(f"- [![icon](https://x/{i}.png)](https://x/{i})\n" for i in range(rng.randint(10, 40)))
+    return f"{nav}\n# Page {page_id}\n{description}\n\n## Specifications\n{description}\n{footer}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        source_dir = os.path.join(tmp, "source")
+        os.makedirs(source_dir)
+        for page_id in range(args.files):
+            with open(os.path.join(source_dir, f"page_{page_id}.md"), "w", encoding="utf-8") as f:
+                f.write(make_page(rng, page_id))
+
+        print(f"Corpus: {args.files} files, {os.cpu_count()} CPUs")
+        print(f"{'mode':>12} {'seconds':>8} {'files/s':>9} {'identical':>9}")
+
+        serial_dir = os.path.join(tmp, "serial")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            extract_main_description_by_structural_markers(source_dir, serial_dir, START_PATTERN, END_PATTERN)
+        elapsed = time.perf_counter() - start
+        print(f"{'serial':>12} {elapsed:>8.2f} {args.files / elapsed:>9.0f} {'-':>9}")
+
+        for workers in args.workers:
+            output_dir = os.path.join(tmp, f"parallel_{workers}")
+            start = time.perf_counter()
+            extract_descriptions_parallel(source_dir, output_dir, START_PATTERN, END_PATTERN, workers=workers)
+            elapsed = time.perf_counter() - start
+            names = os.listdir(serial_dir)
+            _, mismatch, errors = filecmp.cmpfiles(serial_dir, output_dir, names, shallow=False)
+            identical = not mismatch and not errors and len(os.listdir(output_dir)) == len(names)
+            print(f"{f'{workers} workers':>12} {elapsed:>8.2f} {args.files / elapsed:>9.0f} {str(identical):>9}")
+
+if __name__ == "__main__":
+    main()
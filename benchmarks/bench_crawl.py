@@ -0,0 +1,110 @@
+"""
+Benchmark for crawl.py's batch mode against a local HTTP fixture site.
+
+Starts a threaded HTTP server serving a tree of linked HTML pages with an
+artificial per-request latency, then crawls it at several concurrency levels
+using crawl4ai's browser-less HTTP strategy. Each level is crawled twice into
+the same directory: a full first pass, then an incremental re-crawl in which
+every page answers 304 Not Modified.
+
+Usage:
+    python benchmarks/bench_crawl.py --pages 200 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawl4ai.async_crawler_strategy import AsyncHTTPCrawlerStrategy
+from crawl import batch_crawl
+
+def make_handler(page_count: int, fanout: int, latency: float):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def _page_id(self):
+            try:
+                return int(self.path.strip('/').split('-')[-1] or 0)
+            except ValueError:
+                return page_count
+
+        def do_HEAD(self):
+            page_id = self._page_id()
+            etag = f'"page-{page_id}-v1"'
+            if page_id >= page_count:
+                self.send_error(404)
+            elif self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+            else:
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.end_headers()
+
+        def do_GET(self):
+            time.sleep(latency)
+            page_id = self._page_id()
+            if page_id >= page_count:
+                self.send_error(404)
+                return
+            children = [page_id * fanout + i for i in range(1, fanout + 1) if page_id * fanout + i < page_count]
+            links = "".join(f'<li><a href="/page-{c}">Page {c}</a></li>' for c in children)
+            body = (
+                f"<html><head><title>Page {page_id}</title></head><body>"
+                f"<h1>Page {page_id}</h1><p>{'Satellite payload description. ' * 40}</p>"
+                f"<ul>{links}</ul></body></html>"
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", f'"page-{page_id}-v1"')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds of server latency per page.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.pages, args.fanout, args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    seed = f"http://127.0.0.1:{server.server_address[1]}/page-0"
+
+    print(f"Fixture site: {args.pages} pages, fanout {args.fanout}, {args.latency * 1000:.0f} ms latency")
+    print(f"{'concurrency':>11} {'pass':>7} {'fetched':>7} {'written':>7} {'seconds':>8} {'pages/s':>8}")
+    try:
+        for concurrency in args.concurrency:
+            with tempfile.TemporaryDirectory() as output_dir:
+                for label in ("full", "recrawl"):
+                    stats = asyncio.run(batch_crawl(
+                        [seed],
+                        output_directory=output_dir,
+                        concurrency=concurrency,
+                        max_depth=args.pages,
+                        host_delay=0,
+                        crawler_strategy=AsyncHTTPCrawlerStrategy(max_connections=concurrency),
+                        verbose=False,
+                    ))
+                    visited = stats["crawled"] + stats["not_modified"]
+                    print(
+                        f"{concurrency:>11} {label:>7} {stats['crawled']:>7} {stats['saved']:>7} "
+                        f"{stats['elapsed_seconds']:>8.2f} {visited / stats['elapsed_seconds']:>8.1f}"
+                    )
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark for the Cypher plan cache (cypher_plan_cache.py): replays a query log and
+reports the hit rate, how many reused plans differ from the Cypher the LLM produced and
+the Cypher LLM latency saved.
+
+The log is JSONL with one {"question": ..., "cypher": ...} per line, e.g. collected from
+the "query" intermediate step of graph_rag_service.query_graph. On a miss the logged
+Cypher plays the role of the LLM's answer (taking --llm-ms) and is added to the cache,
+as the service does after it returned rows. Entity names are taken from the {name: ...}
+literals of the logged Cypher. Without --log, a synthetic log of paraphrased questions
+about generated entities is replayed.
+
+Usage:
+    python benchmarks/bench_cypher_plan_cache.py --questions 2000
+    python benchmarks/bench_cypher_plan_cache.py --log query_log.jsonl --threshold 0.9
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cypher_plan_cache import DEFAULT_THRESHOLD, CypherPlanCache
+
+# Paraphrase families: each question template is answered by the family's Cypher.
+FAMILIES = [
+    ("Spacecraft", 'MATCH (s:Spacecraft {{name:"{e}"}}) RETURN s.launch_mass_kg AS launchMass', [
+        "What is the launch mass of {e}?", "Tell me the launch mass of {e}", "launch mass of {e}",
+        "What was the launch mass of {e}?", "What is the mass of {e} at launch?", "How heavy was {e} at launch?",
+    ]),
+    ("Spacecraft", 'MATCH (s:Spacecraft {{name:"{e}"}})-[:CARRIES_INSTRUMENT]->(i:Instrument) RETURN i.name AS instrumentName', [
+        "What instruments does {e} carry?", "Which instruments are on {e}?", "List the instruments carried by {e}",
+        "What instruments are carried by {e}?", "Tell me about the instruments on {e}.",
+    ]),
+    ("Spacecraft", 'MATCH (s:Spacecraft {{name:"{e}"}}) RETURN s.launch_date AS launchDate', [
+        "What is the launch date of {e}?", "When was {e} launched?", "Launch date of {e}",
+        "Tell me the launch date of {e}",
+    ]),
+    ("Organization", 'MATCH (dp:DataProduct)-[:PROCESSED_BY]->(o:Organization {{name:"{e}"}}) RETURN dp.name AS dataProductName', [
+        "Which data products are processed by {e}?", "What data products does {e} process?",
+        "List the data products processed by {e}", "data products processed by {e}",
+    ]),
+    (None, 'MATCH (s:Spacecraft) RETURN count(s) AS totalSpacecraft', [
+        "How many spacecraft are there?", "How many spacecraft are in the graph?", "how many spacecraft are there",
+    ]),
+]
+
+# Questions that differ from each other (and from the launch mass family) in one word
+# and need different Cypher: these measure wrong reuse.
+ATTRIBUTES = ["dry mass", "design life", "orbit type", "orbital period", "inclination", "launch vehicle",
+              "launch site", "power", "mission status", "altitude", "local time", "repeat cycle"]
+
+NAME_LITERAL_RE = re.compile(r":\s*`?(\w+)`?\s*\{[^}]*?\bname\s*:\s*(?:'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\")")
+
+def synthetic_log(questions, entities, attribute_ratio, seed=0):
+    rng = random.Random(seed)
+    names = {
+        "Spacecraft": [f"INSAT-{i}D" for i in range(entities)] + [f"Oceansat-{i}" for i in range(entities)],
+        "Organization": [f"Agency {i}" for i in range(entities)],
+    }
+    # Popular questions repeat: draw families and entities from a skewed distribution.
+    log = []
+    for _ in range(questions):
+        if rng.random() < attribute_ratio:
+            attribute, entity = rng.choice(ATTRIBUTES), rng.choice(names["Spacecraft"])
+            log.append({"question": f"What is the {attribute} of {entity}?",
+                        "cypher": f'MATCH (s:Spacecraft {{name:"{entity}"}}) RETURN s.{attribute.replace(" ", "_")}'})
+            continue
+        label, cypher, templates = FAMILIES[min(int(rng.expovariate(0.7)), len(FAMILIES) - 1)]
+        entity = names[label][min(int(rng.expovariate(0.1)), len(names[label]) - 1)] if label else ""
+        log.append({"question": rng.choice(templates).format(e=entity), "cypher": cypher.format(e=entity)})
+    return log, [(name, label) for label, values in names.items() for name in values]
+
+def entity_names_from_log(log):
+    names = set()
+    for entry in log:
+        for match in NAME_LITERAL_RE.finditer(entry["cypher"]):
+            names.add((match.group(2) if match.group(2) is not None else match.group(3), match.group(1)))
+    return sorted(names)
+
+def normalize_cypher(cypher):
+    return re.sub(r"\"((?:[^\"\\]|\\.)*)\"", lambda m: "'" + m.group(1) + "'", " ".join(cypher.split()))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", help="JSONL query log with question and cypher fields.")
+    parser.add_argument("--questions", type=int, default=2000, help="Size of the synthetic log.")
+    parser.add_argument("--entities", type=int, default=50, help="Entities per label in the synthetic log.")
+    parser.add_argument("--attribute-ratio", type=float, default=0.3,
+                        help="Share of synthetic questions asking for one of many similar attributes.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--llm-ms", type=float, default=800.0, help="Simulated Cypher LLM latency per miss.")
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log, "r", encoding="utf-8") as f:
+            log = [json.loads(line) for line in f if line.strip()]
+        names = entity_names_from_log(log)
+    else:
+        log, names = synthetic_log(args.questions, args.entities, args.attribute_ratio)
+
+    cache = CypherPlanCache(threshold=args.threshold)
+    cache.set_entity_names(names)
+    wrong = 0
+    lookup_seconds = 0.0
+    for entry in log:
+        start = time.perf_counter()
+        plan = cache.lookup(entry["question"])
+        lookup_seconds += time.perf_counter() - start
+        if plan:
+            if normalize_cypher(plan[0]) != normalize_cypher(entry["cypher"]):
+                wrong += 1
+        else:
+            cache.record_generation(args.llm_ms / 1000)
+            cache.add(entry["question"], entry["cypher"])
+
+    stats = cache.stats
+    print(f"Replayed {len(log)} questions ({len(names)} entity names, threshold {args.threshold})")
+    print(f"Hit rate: {cache.hit_rate():.1%} ({stats['hits']} hits, {stats['misses']} misses, {stats['plans']} plans stored)")
+    print(f"Reused plans that differ from the logged Cypher: {wrong} ({wrong / stats['hits'] if stats['hits'] else 0:.1%} of hits)")
+    print(f"Cypher LLM time saved: {stats['saved_seconds']:.1f}s of {len(log) * args.llm_ms / 1000:.1f}s "
+          f"({stats['saved_seconds'] / (len(log) * args.llm_ms / 1000):.1%}); "
+          f"lookup cost {lookup_seconds / len(log) * 1000:.2f} ms/question")
+
+if __name__ == "__main__":
+    main()
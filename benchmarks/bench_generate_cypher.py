@@ -0,0 +1,87 @@
+"""
+Benchmark for generate_cypher.py: the serial loop vs. the async rate-limited mode,
+against a local fake OpenAI-compatible server with injected latency and 429s.
+
+Usage:
+    python benchmarks/bench_generate_cypher.py --files 200 --latency 0.5 --rate-limit-ratio 0.1
+    python benchmarks/bench_generate_cypher.py --format json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_openai_server import FakeOpenAIServer
+
+def prompt_tokens_per_request(server):
+    answered = server.stats["requests"] - server.stats["rate_limited"]
+    return server.stats["prompt_tokens"] / answered if answered else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--serial-files", type=int, default=20, help="Files sent through the serial loop (it is slow).")
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rpm", type=int, default=3000)
+    parser.add_argument("--tpm", type=int, default=2000000)
+    parser.add_argument("--format", dest="output_format", choices=("cypher", "json"), default="cypher")
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(latency=args.latency, rate_limit_ratio=args.rate_limit_ratio) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-fake"
+        import generate_cypher
+
+        input_dir = os.path.join(tmp, "input")
+        os.makedirs(input_dir)
+        for i in range(args.files):
+            with open(os.path.join(input_dir, f"page_{i}.md"), "w", encoding="utf-8") as f:
+                f.write(f"# Page {i}\nINSAT-3D carries an Imager and a Sounder. Page number {i}.\n")
+
+        serial_input = os.path.join(tmp, "serial_input")
+        os.makedirs(serial_input)
+        for i in range(min(args.serial_files, args.files)):
+            os.link(os.path.join(input_dir, f"page_{i}.md"), os.path.join(serial_input, f"page_{i}.md"))
+
+        print(f"Fake server: {args.latency * 1000:.0f} ms latency, {args.rate_limit_ratio:.0%} of requests answered 429")
+        print(f"Output format: {args.output_format}")
+        print(f"{'mode':>8} {'files':>6} {'seconds':>8} {'files/s':>8} {'429s':>6} {'peak in flight':>15} {'prompt tok/req':>15}")
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_cypher.process_markdown_files(serial_input, os.path.join(tmp, "serial"), generate_cypher.MODEL_NAME,
+                                                   output_format=args.output_format)
+        elapsed = time.perf_counter() - start
+        count = len(os.listdir(os.path.join(tmp, "serial")))
+        print(f"{'serial':>8} {count:>6} {elapsed:>8.2f} {count / elapsed:>8.1f} {server.stats['rate_limited']:>6} "
+              f"{server.stats['max_in_flight']:>15} {prompt_tokens_per_request(server):>15.0f}")
+
+        server.stats.update(requests=0, rate_limited=0, max_in_flight=0, prompt_tokens=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = asyncio.run(generate_cypher.process_markdown_files_async(
+                input_dir,
+                os.path.join(tmp, "async"),
+                generate_cypher.MODEL_NAME,
+                concurrency=args.concurrency,
+                requests_per_minute=args.rpm,
+                tokens_per_minute=args.tpm,
+                output_format=args.output_format,
+            ))
+        print(f"{'async':>8} {stats['processed']:>6} {stats['elapsed_seconds']:>8.2f} "
+              f"{stats['processed'] / stats['elapsed_seconds']:>8.1f} {server.stats['rate_limited']:>6} "
+              f"{server.stats['max_in_flight']:>15} {prompt_tokens_per_request(server):>15.0f}")
+        if stats["errors"]:
+            print(f"async errors: {stats['errors']}")
+
+if __name__ == "__main__":
+    main()
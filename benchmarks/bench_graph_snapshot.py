@@ -0,0 +1,179 @@
+"""
+Benchmark for graph_snapshot.py: latency of property lookups and 1-2 hop queries answered
+from the memory-mapped snapshot against the same queries sent to the database, and the
+resident memory each costs the process.
+
+Queries are generated from the snapshot's own nodes, so any graph works:
+    property  MATCH (n:Label {name: $name}) RETURN n.prop AS value
+    1-hop     MATCH (n:Label {name: $name})-[:TYPE]->(m:Label2) RETURN m.name AS name
+    2-hop     ... -[:TYPE2]->(k:Label3) RETURN DISTINCT k.name AS name
+
+By default the graph is the generated MOSDAC corpus of benchmarks/bench_pipeline.py in
+benchmarks/local_graph.py, whose queries sleep --rtt-ms to stand in for a driver round
+trip. LocalGraph scans labels without an index and answers only 1 hop, so the "rtt only"
+rows (the sleep alone) are the fair lower bound for any database. With --neo4j the
+snapshot is exported from the database in NEO4J_URI and compared with real round trips
+through the neo4j driver.
+
+Usage:
+    python benchmarks/bench_graph_snapshot.py --pages 200 --queries 300 --rtt-ms 0.5
+    python benchmarks/bench_graph_snapshot.py --neo4j
+"""
+import argparse
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cypher_script import quote_identifier
+from graph_snapshot import GraphSnapshot, export_snapshot, write_snapshot
+
+def rss_bytes():
+    """
+    The process's resident set size now, including mapped file pages it has touched.
+    """
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def make_workload(snapshot, count, seed):
+    """
+    Returns {workload: [(query, params)]} with up to count queries each.
+    """
+    rng = random.Random(seed)
+    names = snapshot.entity_names()
+    rng.shuffle(names)
+    workload = {"property": [], "1-hop": [], "2-hop": []}
+    rel_types = snapshot.meta["relationship_types"]
+    for name, label in names:
+        if all(len(queries) >= count for queries in workload.values()):
+            break
+        node = snapshot.find(name)[0]
+        anchor = f"(n:{quote_identifier(label)} {{name: $name}})"
+        props = sorted(key for key in snapshot.properties(node) if key != "name")
+        if props and len(workload["property"]) < count:
+            workload["property"].append((f"MATCH {anchor} RETURN n.{quote_identifier(rng.choice(props))} AS value",
+                                         {"name": name}))
+        for rel_type in rng.sample(rel_types, len(rel_types)):
+            neighbors = snapshot.neighbors(node, rel_type)
+            if not neighbors:
+                continue
+            middle = neighbors[0]
+            hop = f"{anchor}-[:{quote_identifier(rel_type)}]->(m:{quote_identifier(snapshot.labels(middle)[0])})"
+            if len(workload["1-hop"]) < count:
+                workload["1-hop"].append((f"MATCH {hop} RETURN m.name AS name", {"name": name}))
+            for second in rel_types:
+                far = snapshot.neighbors(middle, second)
+                if far and len(workload["2-hop"]) < count:
+                    workload["2-hop"].append((
+                        f"MATCH {hop}-[:{quote_identifier(second)}]->(k:{quote_identifier(snapshot.labels(far[0])[0])}) "
+                        "RETURN DISTINCT k.name AS name", {"name": name}))
+                    break
+            break
+    return workload
+
+def time_queries(run, queries):
+    """
+    Returns the sorted per-query latencies in seconds, or None if run cannot answer them.
+    """
+    latencies = []
+    for query, params in queries:
+        start = time.perf_counter()
+        try:
+            run(query, params)
+        except ValueError:
+            return None
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+
+def local_graph(pages, seed):
+    """
+    Loads the bench_pipeline corpus into a LocalGraph. Returns (graph, RSS it added).
+    """
+    import bench_pipeline
+    from local_graph import LocalGraph
+
+    before = rss_bytes()
+    _, recorded, _ = bench_pipeline.make_corpus(pages, seed)
+    graph = LocalGraph()
+    for script in recorded.values():
+        graph.query(re.sub(r"^```cypher\n|\n```$", "", script))
+    return graph, rss_bytes() - before
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200, help="Corpus size of the offline graph.")
+    parser.add_argument("--queries", type=int, default=300, help="Queries per workload.")
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="Simulated driver round trip of the offline graph.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--path", help="Snapshot directory (default: a temporary one).")
+    parser.add_argument("--neo4j", action="store_true", help="Export from and compare with the database in NEO4J_URI.")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    path = args.path or os.path.join(tempfile.mkdtemp(prefix="graph_snapshot_"), "snapshot")
+
+    if args.neo4j:
+        from dotenv import load_dotenv
+        from langchain_neo4j import Neo4jGraph
+
+        load_dotenv()
+        graph = Neo4jGraph(url=os.getenv("NEO4J_URI"), username=os.getenv("NEO4J_USERNAME"),
+                           password=os.getenv("NEO4J_PASSWORD"), refresh_schema=False)
+        start = time.perf_counter()
+        meta = export_snapshot(graph, path)
+
+        def database(query, params):
+            with graph._driver.session(database=graph._database) as session:
+                return session.run(query, params).data()
+        backend, graph_memory = "neo4j", None
+    else:
+        graph, graph_memory = local_graph(args.pages, args.seed)
+        start = time.perf_counter()
+        meta = write_snapshot(path, *graph.snapshot_rows())
+        graph.query_delay = args.rtt_ms / 1000
+        database, backend = graph.query, "local graph"
+    export_seconds = time.perf_counter() - start
+
+    before = rss_bytes()
+    snapshot = GraphSnapshot(path)
+    start = time.perf_counter()
+    if not snapshot.load():
+        sys.exit(f"Could not load the snapshot at '{path}'.")
+    open_ms = (time.perf_counter() - start) * 1000
+    workload = make_workload(snapshot, args.queries, args.seed)
+
+    print(f"{meta['nodes']} nodes, {meta['relationships']} relationships, {len(meta['relationship_types'])} types; "
+          f"exported in {export_seconds:.2f}s to {directory_bytes(path) / 1e3:.0f} kB, mapped in {open_ms:.2f} ms")
+    print(f"{'workload':>9} {'queries':>7} {'backend':>12} {'p50 µs':>9} {'p99 µs':>9} {'vs snapshot':>11}")
+    for name, queries in workload.items():
+        if not queries:
+            continue
+        mapped = time_queries(snapshot.query, queries)
+        remote = time_queries(database, queries)
+        rows = [("snapshot", mapped), (backend, remote)]
+        if not args.neo4j:
+            rows.append(("rtt only", time_queries(lambda query, params: time.sleep(args.rtt_ms / 1000), queries)))
+        for label, latencies in rows:
+            if latencies is None:
+                print(f"{name:>9} {len(queries):>7} {label:>12} {'-':>9} {'-':>9}")
+                continue
+            speedup = "" if label == "snapshot" else f"{percentile(latencies, 50) / percentile(mapped, 50):.0f}x"
+            print(f"{name:>9} {len(queries):>7} {label:>12} {percentile(latencies, 50) * 1e6:>9.1f} "
+                  f"{percentile(latencies, 99) * 1e6:>9.1f} {speedup:>11}")
+    print(f"Resident memory added by the snapshot after all queries: {(rss_bytes() - before) / 1e6:.1f} MB")
+    if graph_memory is not None:
+        print(f"Resident memory of the same graph as Python objects (LocalGraph): {graph_memory / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
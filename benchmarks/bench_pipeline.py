@@ -0,0 +1,323 @@
+"""
+Offline end-to-end benchmark of the whole pipeline, with no OpenAI account or Neo4j needed.
+
+A fixed corpus of --pages scraped MOSDAC-style pages (generated from --seed, with the
+navigation and link lists clean_data.py strips) is replayed through every stage:
+
+    clean     clean_data.py extracts the description block of each page
+    generate  generate_cypher.py (async mode) sends each page to benchmarks/fake_openai_server.py,
+              which answers with the Cypher recorded for that page after --extract-ms
+    upload    upload_to_neo4j.py bootstraps the schema and uploads the scripts into
+              benchmarks/local_graph.py, an in-memory Neo4j stand-in (--db-ms per query)
+    query     a log of --questions questions (skewed popularity, with paraphrases) is
+              replayed through GraphRAGService, with the answer and plan caches on, over
+              fake chat models (benchmarks/fake_llm.py) answering with recorded Cypher;
+              it also counts questions answered with other rows than the recorded
+              Cypher returns (question router templates run their own Cypher);
+              with --graph-snapshot, the uploaded graph is exported with
+              graph_snapshot.py and the service reads from that snapshot
+
+Each stage reports items, seconds, throughput and p50/p95/p99 latency per item, as JSON.
+Save one run per commit with --output and compare two with --compare:
+
+Usage:
+    python benchmarks/bench_pipeline.py --output bench-before.json
+    python benchmarks/bench_pipeline.py --output bench-after.json --compare bench-before.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm import FakeChatModel
+from fake_openai_server import FakeOpenAIServer, default_responder
+from local_graph import LocalGraph
+
+SPACECRAFT_PREFIXES = ["INSAT", "Oceansat", "SCATSAT", "Cartosat", "Resourcesat", "Megha", "Kalpana", "RISAT",
+                       "EOS", "Saral"]
+INSTRUMENTS = ["Imager", "Sounder", "Scatterometer", "Ocean Colour Monitor", "Altimeter", "Radiometer",
+               "Synthetic Aperture Radar", "LISS-IV Camera", "Data Relay Transponder", "Search and Rescue Payload"]
+ORGANIZATIONS = ["ISRO", "SAC", "NRSC", "IMD", "NCMRWF"]
+ORBITS = ["Geostationary", "Sun-synchronous", "Low Earth"]
+FILLER = ("Its data are archived at MOSDAC and distributed to registered users for weather forecasting, "
+          "ocean state monitoring and climate research. ")
+
+# (question, recorded Cypher); {s} is a spacecraft, {i} an instrument.
+QUESTION_TEMPLATES = [
+    ("What is the launch mass of {s}?", "MATCH (s:Spacecraft {{name: '{s}'}}) RETURN s.launch_mass_kg AS launchMass"),
+    ("Tell me the launch mass of {s}.", "MATCH (s:Spacecraft {{name: '{s}'}}) RETURN s.launch_mass_kg AS launchMass"),
+    ("What is the design life of {s}?", "MATCH (s:Spacecraft {{name: '{s}'}}) RETURN s.design_life_years AS designLife"),
+    ("What instruments does {s} carry?",
+     "MATCH (s:Spacecraft {{name: '{s}'}})-[:CARRIES_INSTRUMENT]->(i:Instrument) RETURN i.name AS instrumentName"),
+    ("Which organization operates {s}?",
+     "MATCH (s:Spacecraft {{name: '{s}'}})-[:OPERATED_BY]->(o:Organization) RETURN o.name AS organization"),
+    ("Which spacecraft carry the {i}?",
+     "MATCH (s:Spacecraft)-[:CARRIES_INSTRUMENT]->(i:Instrument {{name: '{i}'}}) RETURN s.name AS spacecraft"),
+    ("What data products does the {i} produce?",
+     "MATCH (i:Instrument {{name: '{i}'}})-[:PRODUCES]->(d:DataProduct) RETURN d.name AS dataProduct"),
+]
+COUNT_QUESTION = ("How many spacecraft are there?", "MATCH (s:Spacecraft) RETURN count(s) AS totalSpacecraft")
+
+def make_corpus(pages, seed):
+    """
+    Returns ({file name: raw page markdown}, {page title: recorded extraction}, spacecraft names).
+    """
+    rng = random.Random(seed)
+    raw, recorded, names = {}, {}, []
+    for n in range(pages):
+        name = f"{SPACECRAFT_PREFIXES[n % len(SPACECRAFT_PREFIXES)]}-{n // len(SPACECRAFT_PREFIXES) + 1}"
+        names.append(name)
+        orbit, organization = rng.choice(ORBITS), rng.choice(ORGANIZATIONS)
+        instruments = rng.sample(INSTRUMENTS, rng.randint(2, 4))
+        mass, life = rng.randint(400, 3500), rng.choice([5, 7, 7.7, 10])
+        products = [f"{instrument} Level-2 Product" for instrument in instruments]
+        raw[f"{name.lower()}.md"] = (
+            "* [Home](https://www.mosdac.gov.in/)\n* [Missions](https://www.mosdac.gov.in/missions)\n\n"
+            f"# {name}\n\n{name} is a {orbit} satellite operated by {organization}. It has a launch mass of "
+            f"{mass} kg and a design life of {life} years. It carries the {', the '.join(instruments)}, which "
+            f"produce the {', the '.join(products)}. " + FILLER * rng.randint(2, 6) + "\n\n"
+            f"## Related Links\n* [Catalog](https://www.mosdac.gov.in/catalog/{name.lower()})\n"
+        )
+        lines = [f"MERGE (s:Spacecraft {{name: '{name}'}})\nSET s.launch_mass_kg = {mass}, s.design_life_years = {life};",
+                 f"MERGE (o:Orbit {{name: '{orbit}'}}) MERGE (s)-[:ORBITS_IN]->(o);",
+                 f"MERGE (org:Organization {{name: '{organization}'}}) MERGE (s)-[:OPERATED_BY]->(org);"]
+        for k, (instrument, product) in enumerate(zip(instruments, products)):
+            lines.append(f"MERGE (i{k}:Instrument {{name: '{instrument}'}}) MERGE (s)-[:CARRIES_INSTRUMENT]->(i{k});")
+            lines.append(f"MERGE (p{k}:DataProduct {{name: '{product}'}}) MERGE (i{k})-[:PRODUCES]->(p{k});")
+        recorded[name] = "```cypher\n" + "\n".join(lines) + "\n```"
+    return raw, recorded, names
+
+def make_question_log(names, questions, seed):
+    """
+    Returns (question log, {question: recorded Cypher}). Question popularity is skewed, so
+    the log repeats questions (answer cache hits) and rewords them (plan cache hits).
+    """
+    rng = random.Random(seed)
+    pool = {COUNT_QUESTION[0]: COUNT_QUESTION[1]}
+    for question, cypher in QUESTION_TEMPLATES:
+        for entity in (names if "{s}" in question else INSTRUMENTS):
+            pool[question.format(s=entity, i=entity)] = cypher.format(s=entity, i=entity)
+    distinct = list(pool)
+    rng.shuffle(distinct)
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(distinct))]
+    return rng.choices(distinct, weights=weights, k=questions), pool
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else 0.0
+
+def stage_report(latencies, elapsed, **extra):
+    return {
+        "items": len(latencies),
+        "seconds": round(elapsed, 4),
+        "throughput_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {f"p{p}": round(percentile(latencies, p) * 1000, 3) for p in (50, 95, 99)}
+                      | {"max": round(max(latencies, default=0.0) * 1000, 3)},
+        **extra,
+    }
+
+def run_clean(raw_dir, clean_dir):
+    import clean_data
+    clean_data._init_worker(clean_data.DEFAULT_START_HEADING_PATTERN, clean_data.DEFAULT_END_MARKER_PATTERN, True)
+    os.makedirs(clean_dir, exist_ok=True)
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    for filename in sorted(os.listdir(raw_dir)):
+        file_start = time.perf_counter()
+        _, status, _ = clean_data.extract_file(os.path.join(raw_dir, filename), os.path.join(clean_dir, filename))
+        latencies.append(time.perf_counter() - file_start)
+        statuses[status] = statuses.get(status, 0) + 1
+    return stage_report(latencies, time.perf_counter() - start, statuses=statuses)
+
+def run_generate(args, clean_dir, cypher_dir, recorded):
+    def responder(request_json):
+        heading = re.search(r"#\s+([^\n]+)", request_json["messages"][-1]["content"])
+        title = heading.group(1).strip() if heading else None
+        return recorded[title] if title in recorded else default_responder(request_json)
+
+    with FakeOpenAIServer(latency=args.extract_ms / 1000, jitter=0.0, rate_limit_ratio=args.rate_limit_ratio,
+                          responder=responder, seed=args.seed) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-fake"
+        import generate_cypher
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = asyncio.run(generate_cypher.process_markdown_files_async(
+                clean_dir, cypher_dir, generate_cypher.MODEL_NAME, concurrency=args.concurrency,
+                requests_per_minute=1_000_000, tokens_per_minute=1_000_000_000,
+            ))
+    return stage_report(stats["file_seconds"], stats["elapsed_seconds"], errors=stats["errors"],
+                        rate_limited=server.stats["rate_limited"], tokens=stats["tokens"])
+
+def run_upload(args, cypher_dir, graph):
+    from upload_to_neo4j import Neo4jUploader, UploadLedger, discover_merge_keys, plan_schema
+    from graph_version import bump_graph_version
+    paths = sorted(os.path.join(cypher_dir, f) for f in os.listdir(cypher_dir) if f.endswith(".cypher"))
+    ledger_path = os.path.join(cypher_dir, "bench_ledger.jsonl")
+    uploader = Neo4jUploader(None, None, None, driver=graph.driver())
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        uploader.bootstrap_schema(plan_schema(discover_merge_keys(paths)))
+        stats = uploader.upload_files(paths, workers=args.upload_workers, ledger=UploadLedger(ledger_path))
+    bump_graph_version(uploader.driver)
+    elapsed = time.perf_counter() - start
+    with open(ledger_path, "r", encoding="utf-8") as f:
+        latencies = [entry["seconds"] for entry in map(json.loads, f) if entry.get("status") == "uploaded"]
+    graph.refresh_schema()
+    return stage_report(latencies, elapsed, failed=stats["failed"], statements=stats["statements"],
+                        nodes=len(graph.load.nodes), relationships=len(graph.load.relationships),
+                        unsupported_statements=graph.stats["unsupported_writes"])
+
+def run_query(args, graph, question_log, recorded_cypher, snapshot_path=None):
+    from answer_cache import AnswerCache
+    from cypher_guard import bound_cypher
+    from cypher_plan_cache import CypherPlanCache
+    from graph_rag_service import GraphRAGService
+    from graph_snapshot import GraphSnapshot, write_snapshot
+
+    graph_snapshot = None
+    if snapshot_path:
+        write_snapshot(snapshot_path, *graph.snapshot_rows(), stamp=(graph.version or {}).get("stamp"))
+        graph_snapshot = GraphSnapshot(snapshot_path)
+        graph_snapshot.load()
+
+    def cypher_responder(prompt):
+        question = prompt.rsplit("The question is:", 1)[-1].strip()
+        return recorded_cypher.get(question, COUNT_QUESTION[1])
+
+    def answer_responder(prompt):
+        return "According to the MOSDAC knowledge graph, " + " ".join(["the", "answer", "is", "listed"] * (args.answer_words // 4))
+
+    cypher_llm = FakeChatModel(respond=cypher_responder, first_token_delay=args.cypher_ms / 1000)
+    qa_llm = FakeChatModel(respond=answer_responder, first_token_delay=args.first_token_ms / 1000,
+                           token_delay=args.token_ms / 1000)
+    service = GraphRAGService(graph, answer_cache=AnswerCache(), plan_cache=CypherPlanCache(),
+                              cypher_llm=cypher_llm, qa_llm=qa_llm, graph_snapshot=graph_snapshot)
+    guard = service.cypher_guard
+    expected_rows = {question: _row_values(graph.query(bound_cypher(recorded_cypher[question], guard.auto_limit,
+                                                                    guard.max_hops)[0]))
+                     for question in set(question_log)}
+    latencies, first_token, to_rows, sources, errors, empty, wrong_rows = [], [], [], {}, 0, 0, 0
+    start = time.perf_counter()
+    for question in question_log:
+        done = None
+        for event in service.stream_query(question):
+            if event["type"] == "error":
+                errors += 1
+            elif event["type"] == "done":
+                done = event
+        if done is None:
+            continue
+        latencies.append(done["timings"]["total_seconds"])
+        first_token.append(done["timings"]["first_token_seconds"])
+        if "rows_seconds" in done["timings"]:
+            to_rows.append(done["timings"]["rows_seconds"])
+        source = "answer_cache" if done["cached"] else done["cypher_source"]
+        sources[source] = sources.get(source, 0) + 1
+        empty += not done["intermediate_steps"][-1].get("context")
+        wrong_rows += _row_values(done["intermediate_steps"][-1].get("context", [])) != expected_rows[question]
+    elapsed = time.perf_counter() - start
+    return stage_report(
+        latencies, elapsed, errors=errors, empty_contexts=empty, wrong_rows=wrong_rows, sources=sources,
+        first_token_ms={f"p{p}": round(percentile(first_token, p) * 1000, 3) for p in (50, 95, 99)},
+        # Until the rows are fetched, for questions not answered from the answer cache.
+        rows_ms={f"p{p}": round(percentile(to_rows, p) * 1000, 3) for p in (50, 95, 99)} if to_rows else None,
+        cypher_llm_calls=cypher_llm.calls, qa_llm_calls=qa_llm.calls, cypher_guard=dict(guard.stats),
+        router=dict(service.router.stats) if service.router else None,
+        graph_snapshot=dict(service.snapshot_stats) if graph_snapshot else None,
+        answers={**service.answer_formatter.stats, "formatted_share": round(service.answer_formatter.formatted_share(), 3)},
+    )
+
+def _row_values(rows):
+    """
+    The rows' values without their column names, which differ between templates and the
+    recorded Cypher.
+    """
+    return sorted(json.dumps(list(row.values()), sort_keys=True, default=str) for row in rows)
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_comparison(baseline, current):
+    print(f"Comparing {current.get('commit')} against {baseline.get('commit')}:")
+    print(f"{'stage':>9} {'metric':>12} {'before':>10} {'after':>10} {'change':>8}")
+    for stage, report in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        metrics = [("throughput/s", before["throughput_per_second"], report["throughput_per_second"])]
+        metrics += [(f"{p} ms", before["latency_ms"][p], report["latency_ms"][p]) for p in ("p50", "p95", "p99")]
+        for name, old, new in metrics:
+            change = f"{(new - old) / old:+.1%}" if old else "n/a"
+            print(f"{stage:>9} {name:>12} {old:>10.2f} {new:>10.2f} {change:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--extract-ms", type=float, default=200, help="Fake OpenAI latency per extraction request.")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=32, help="Extraction requests in flight.")
+    parser.add_argument("--db-ms", type=float, default=1, help="Local graph latency per query.")
+    parser.add_argument("--upload-workers", type=int, default=4)
+    parser.add_argument("--cypher-ms", type=float, default=100, help="Fake Cypher LLM latency.")
+    parser.add_argument("--first-token-ms", type=float, default=100, help="Fake answer LLM time to first token.")
+    parser.add_argument("--token-ms", type=float, default=2, help="Fake answer LLM time per further token.")
+    parser.add_argument("--answer-words", type=int, default=40)
+    parser.add_argument("--graph-snapshot", action="store_true", help="Answer queries from a graph snapshot.")
+    parser.add_argument("--output", help="Write the JSON report here instead of printing it.")
+    parser.add_argument("--compare", help="A JSON report of an earlier run to compare against.")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    raw, recorded, names = make_corpus(args.pages, args.seed)
+    question_log, recorded_cypher = make_question_log(names, args.questions, args.seed)
+    graph = LocalGraph(query_delay=args.db_ms / 1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir, clean_dir, cypher_dir = (os.path.join(tmp, name) for name in ("raw", "clean", "cypher"))
+        os.makedirs(raw_dir)
+        for filename, text in raw.items():
+            with open(os.path.join(raw_dir, filename), "w", encoding="utf-8") as f:
+                f.write(text)
+        stages = {}
+        stages["clean"] = run_clean(raw_dir, clean_dir)
+        stages["generate"] = run_generate(args, clean_dir, cypher_dir, recorded)
+        stages["upload"] = run_upload(args, cypher_dir, graph)
+        stages["query"] = run_query(args, graph, question_log, recorded_cypher,
+                                    os.path.join(tmp, "graph_snapshot") if args.graph_snapshot else None)
+
+    report = {"benchmark": "pipeline", "commit": git_commit(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "config": vars(args), "stages": stages}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"{'stage':>9} {'items':>6} {'items/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for stage, result in stages.items():
+            latency = result["latency_ms"]
+            print(f"{stage:>9} {result['items']:>6} {result['throughput_per_second']:>9.1f} "
+                  f"{latency['p50']:>9.2f} {latency['p95']:>9.2f} {latency['p99']:>9.2f}")
+        print(f"Report written to '{args.output}'.")
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
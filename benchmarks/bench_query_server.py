@@ -0,0 +1,106 @@
+"""
+Load test for query_server.py: starts the server in-process over the fake service of
+benchmarks/fake_llm.py (answer and plan caches disabled, so only single-flight can save
+work) and sends --requests POST /query requests from --concurrency clients. Questions are
+drawn from --distinct questions with a skewed popularity, so many requests for the same
+question are in flight together. Reports throughput, latency percentiles of answered
+(200) requests, coalesced requests, 429/504 responses and how many times the pipeline
+actually ran, with and without single-flight coalescing.
+
+Usage:
+    python benchmarks/bench_query_server.py --requests 400 --concurrency 64 --distinct 20
+    python benchmarks/bench_query_server.py --max-pending 8 --timeout 1.5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from aiohttp import web
+from fake_llm import build_fake_service
+from query_server import create_app
+
+def make_questions(requests, distinct, seed=0):
+    rng = random.Random(seed)
+    pool = [f"What is the launch mass of INSAT-3D? (variant {i})" for i in range(distinct)]
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    return rng.choices(pool, weights=weights, k=requests)
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else 0.0
+
+async def run_load(args, single_flight):
+    service = build_fake_service(args.cypher_ms / 1000, args.db_ms / 1000, args.first_token_ms / 1000,
+                                 args.token_ms / 1000)
+    app = create_app(service, args.workers, args.max_pending, args.timeout, single_flight)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/query"
+
+    questions = make_questions(args.requests, args.distinct)
+    latencies, statuses, coalesced = [], {}, 0
+    queue = asyncio.Queue()
+    for question in questions:
+        queue.put_nowait(question)
+
+    async def client(session):
+        nonlocal coalesced
+        while not queue.empty():
+            question = queue.get_nowait()
+            start = time.perf_counter()
+            async with session.post(url, json={"question": question}) as response:
+                body = await response.json()
+            if response.status == 200:
+                latencies.append(time.perf_counter() - start)
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+            coalesced += bool(body.get("coalesced"))
+
+    start = time.perf_counter()
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=args.concurrency)) as session:
+        await asyncio.gather(*(client(session) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    await runner.cleanup()
+    return {
+        "elapsed": elapsed, "latencies": latencies, "statuses": statuses, "coalesced": coalesced,
+        "pipeline_runs": service.qa_llm.calls,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--distinct", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--cypher-ms", type=float, default=300)
+    parser.add_argument("--db-ms", type=float, default=20)
+    parser.add_argument("--first-token-ms", type=float, default=200)
+    parser.add_argument("--token-ms", type=float, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{args.requests} requests, {args.concurrency} clients, {args.distinct} distinct questions, "
+          f"{args.workers} workers, max {args.max_pending} pending")
+    print(f"{'mode':>16} {'req/s':>7} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'coalesced':>9} "
+          f"{'429':>5} {'504':>5} {'pipeline runs':>13}")
+    for name, single_flight in (("single-flight", True), ("no coalescing", False)):
+        run = asyncio.run(run_load(args, single_flight))
+        latencies, statuses = run["latencies"], run["statuses"]
+        print(f"{name:>16} {args.requests / run['elapsed']:>7.1f} {percentile(latencies, 50):>7.3f} "
+              f"{percentile(latencies, 95):>7.3f} {percentile(latencies, 99):>7.3f} {run['coalesced']:>9} "
+              f"{statuses.get(429, 0):>5} {statuses.get(504, 0):>5} {run['pipeline_runs']:>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark for result_context.fetch_context: rows transferred, fetch time, peak memory and
+answer-prompt tokens for results of growing size, against reading the whole result the
+way GraphCypherQAChain does (Neo4jGraph.query, then the first top_k rows, unprojected).
+
+The driver is a fake that produces result rows lazily, fetch_size at a time, each batch
+after --batch-ms milliseconds, so it runs offline. Rows look like what an LLM-written
+"MATCH (d:DataProduct) RETURN d" returns: whole nodes with a long description and an
+embedding.
+
+Usage:
+    python benchmarks/bench_result_context.py --sizes 10 100 1000 10000 --budget 2000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_context import estimate_tokens, fetch_context, qa_context
+
+TOP_K = 10  # GraphCypherQAChain's default
+
+def make_row(i):
+    return {"d": {
+        "name": f"Data Product {i}",
+        "resolution": "4 km",
+        "description": f"Level-2 product {i} derived from the Imager. " * 30,
+        "embedding": [((i * 31 + j) % 997) / 997 for j in range(256)],
+    }}
+
+class _Record:
+    def __init__(self, row):
+        self._row = row
+
+    def data(self):
+        return self._row
+
+class _StreamingResult:
+    def __init__(self, store, size, fetch_size):
+        self.store, self.size, self.fetch_size = store, size, fetch_size
+        self._consumed = False
+
+    def __iter__(self):
+        for i in range(self.size):
+            if self._consumed:
+                return
+            if i % self.fetch_size == 0:
+                time.sleep(self.store.batch_seconds)
+                self.store.transferred += min(self.fetch_size, self.size - i)
+            yield _Record(make_row(i))
+
+    def consume(self):
+        self._consumed = True
+
+    def single(self):
+        # Only the count query calls single(); the server counts without sending rows.
+        time.sleep(self.store.batch_seconds)
+        return {"total": self.size}
+
+class _StreamingSession:
+    def __init__(self, store, fetch_size):
+        self.store, self.fetch_size = store, fetch_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, params=None):
+        return _StreamingResult(self.store, self.store.size, self.fetch_size)
+
+class _StreamingDriver:
+    def __init__(self, store):
+        self.store = store
+
+    def session(self, database=None, fetch_size=1000, **config):
+        return _StreamingSession(self.store, fetch_size)
+
+class StreamingStore:
+    """
+    Stands in for a Neo4jGraph whose every query returns size rows.
+    """
+    def __init__(self, size, batch_seconds):
+        self.size, self.batch_seconds = size, batch_seconds
+        self.transferred = 0
+        self._driver = _StreamingDriver(self)
+        self._database = None
+        self.timeout = None
+
+    def query(self, query, params=None):
+        # Neo4jGraph.query: the whole result, transferred in batches of the driver's default 1000.
+        rows = []
+        for record in _StreamingResult(self, self.size, 1000):
+            rows.append(record.data())
+        return rows
+
+def measure(run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    context = run()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return context, seconds, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--budget", type=int, default=2000, help="Context token budget.")
+    parser.add_argument("--max-rows", type=int, default=200)
+    parser.add_argument("--batch-ms", type=float, default=2, help="Latency of each fetched batch.")
+    args = parser.parse_args()
+
+    cypher = "MATCH (d:DataProduct) RETURN d"
+    print(f"Token budget {args.budget}, at most {args.max_rows} rows, {args.batch_ms:g} ms per fetched batch")
+    print(f"{'rows':>7} {'mode':>9} {'transferred':>11} {'fetch ms':>9} {'peak MB':>8} {'prompt tok':>10} {'total':>7}")
+    for size in args.sizes:
+        store = StreamingStore(size, args.batch_ms / 1000)
+        rows, seconds, peak = measure(lambda: store.query(cypher)[:TOP_K])
+        print(f"{size:>7} {'full':>9} {store.transferred:>11} {seconds * 1000:>9.1f} {peak / 1e6:>8.1f} "
+              f"{sum(estimate_tokens(row) for row in rows):>10} {'-':>7}")
+
+        store = StreamingStore(size, args.batch_ms / 1000)
+        context, seconds, peak = measure(lambda: fetch_context(store, cypher, token_budget=args.budget,
+                                                               max_rows=args.max_rows))
+        print(f"{size:>7} {'budgeted':>9} {store.transferred:>11} {seconds * 1000:>9.1f} {peak / 1e6:>8.1f} "
+              f"{sum(estimate_tokens(row) for row in qa_context(context)):>10} {context['total_rows']:>7}")
+
+if __name__ == "__main__":
+    main()
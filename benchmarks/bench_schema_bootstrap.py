@@ -0,0 +1,121 @@
+"""
+Benchmark for the schema bootstrap in upload_to_neo4j.py: ingest and name-lookup timings
+without and with the constraints/indexes it creates for the MERGE keys.
+
+Needs a running Neo4j (NEO4J_URI / NEO4J_USERNAME / NEO4J_PASSWORD, as for upload_to_neo4j.py).
+All benchmark nodes use labels starting with 'Bench' and are deleted afterwards, together
+with the constraints and indexes the benchmark created.
+
+Usage:
+    python benchmarks/bench_schema_bootstrap.py --files 200 --entities 2000 --lookups 500
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import upload_to_neo4j
+from upload_to_neo4j import Neo4jUploader, discover_merge_keys, plan_schema, schema_name
+
+LABELS = ["BenchSpacecraft", "BenchInstrument", "BenchDataProduct", "BenchOrganization"]
+
+def make_corpus(directory, files, entities, statements_per_file, seed=0):
+    """
+    Writes .cypher files shaped like the generated ones: node MERGEs on name, SETs and
+    relationship MERGEs between nodes drawn from a shared pool, so files overlap.
+    """
+    rng = random.Random(seed)
+    names = {label: [f"{label[5:]}-{i}" for i in range(entities // len(LABELS))] for label in LABELS}
+    paths = []
+    for i in range(files):
+        statements = []
+        for j in range(statements_per_file):
+            a_label, b_label = rng.sample(LABELS, 2)
+            a, b = rng.choice(names[a_label]), rng.choice(names[b_label])
+            statements.append(
+                f"MERGE (a{j}:{a_label} {{name: '{a}'}}) SET a{j}.seen_in = 'file-{i}'\n"
+                f"MERGE (b{j}:{b_label} {{name: '{b}'}})\n"
+                f"MERGE (a{j})-[:BENCH_RELATED_TO]->(b{j});"
+            )
+        path = os.path.join(directory, f"bench_{i}.cypher")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(statements))
+        paths.append(path)
+    return paths, names
+
+def clear_data(driver):
+    with driver.session() as session:
+        session.run(
+            "MATCH (n) WHERE any(l IN labels(n) WHERE l STARTS WITH 'Bench') "
+            "CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 5000 ROWS"
+        ).consume()
+
+def drop_schema(driver, plan):
+    with driver.session() as session:
+        for _, label, key in plan:
+            session.run(f"DROP CONSTRAINT {schema_name('constraint', label, key)} IF EXISTS").consume()
+            session.run(f"DROP INDEX {schema_name('index', label, key)} IF EXISTS").consume()
+
+def time_lookups(driver, names, lookups, seed=1):
+    rng = random.Random(seed)
+    timings = []
+    with driver.session() as session:
+        for _ in range(lookups):
+            label = rng.choice(LABELS)
+            start = time.perf_counter()
+            session.run(f"MATCH (n:{label} {{name: $name}}) RETURN n", name=rng.choice(names[label])).consume()
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--entities", type=int, default=2000)
+    parser.add_argument("--statements-per-file", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=upload_to_neo4j.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    uploader = Neo4jUploader(upload_to_neo4j.NEO4J_URI, upload_to_neo4j.NEO4J_USERNAME, upload_to_neo4j.NEO4J_PASSWORD)
+    if not uploader.driver:
+        sys.exit("Neo4j is not reachable; set NEO4J_URI / NEO4J_USERNAME / NEO4J_PASSWORD.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths, names = make_corpus(tmp, args.files, args.entities, args.statements_per_file)
+        plan = plan_schema(discover_merge_keys(paths))
+        print(f"Corpus: {args.files} files, {args.files * args.statements_per_file} statements, "
+              f"{args.entities} distinct entities; schema plan: {len(plan)} objects")
+        print(f"{'schema':>10} {'ingest s':>9} {'stmts/s':>8} {'last 10% stmts/s':>17} {'lookup p50 ms':>14} {'lookup p95 ms':>14}")
+
+        try:
+            for phase in ("none", "bootstrap"):
+                clear_data(uploader.driver)
+                drop_schema(uploader.driver, plan)
+                if phase == "bootstrap":
+                    uploader.bootstrap_schema(plan)
+
+                # One worker, so both phases see the same MERGE order and no concurrent duplicates.
+                head, tail = paths[:len(paths) * 9 // 10], paths[len(paths) * 9 // 10:]
+                with contextlib.redirect_stdout(io.StringIO()):
+                    head_stats = uploader.upload_files(head, workers=1, batch_size=args.batch_size)
+                    tail_stats = uploader.upload_files(tail, workers=1, batch_size=args.batch_size)
+                elapsed = head_stats["elapsed_seconds"] + tail_stats["elapsed_seconds"]
+                statements = head_stats["statements"] + tail_stats["statements"]
+                p50, p95 = time_lookups(uploader.driver, names, args.lookups)
+                print(f"{phase:>10} {elapsed:>9.2f} {statements / elapsed:>8.0f} "
+                      f"{tail_stats['statements_per_second']:>17.0f} {p50:>14.2f} {p95:>14.2f}")
+        finally:
+            clear_data(uploader.driver)
+            drop_schema(uploader.driver, plan)
+            uploader.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark for question-relevant schema pruning (schema_selector.py): Cypher prompt size
+with the full schema vs the pruned one on a fixed question set, over a schema with the
+MOSDAC core labels plus --invented-labels labels of the kind the extraction prompt
+invents. Also checks that every label a question needs is kept.
+
+With --live (and OPENAI_API_KEY set) it also sends both prompts for every question to the
+Cypher model and compares latency.
+
+Usage:
+    python benchmarks/bench_schema_pruning.py --invented-labels 300
+    python benchmarks/bench_schema_pruning.py --invented-labels 300 --live
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schema_selector import SchemaSelector
+
+CORE_SCHEMA = {
+    "Spacecraft": ["name", "launch_mass_kg", "launch_date", "orbit_type", "design_life_years"],
+    "Instrument": ["name", "function", "channels_count", "resolution_km"],
+    "DataProduct": ["name", "processing_level", "format"],
+    "Organization": ["name", "country"],
+    "Mission": ["name", "objective"],
+    "Orbit": ["name", "altitude_km", "inclination_deg"],
+    "LaunchVehicle": ["name"],
+}
+CORE_RELATIONSHIPS = [
+    ("Spacecraft", "CARRIES_INSTRUMENT", "Instrument"), ("Instrument", "PRODUCES", "DataProduct"),
+    ("DataProduct", "PROCESSED_BY", "Organization"), ("Spacecraft", "OPERATED_BY", "Organization"),
+    ("Spacecraft", "PART_OF_MISSION", "Mission"), ("Spacecraft", "IN_ORBIT", "Orbit"),
+    ("Spacecraft", "LAUNCHED_BY", "LaunchVehicle"),
+]
+CORE_VALUES = {
+    "Spacecraft": ["INSAT-3D", "INSAT-3DR", "SCATSAT-1", "Oceansat-2"],
+    "Instrument": ["Imager", "Sounder", "Scatterometer"],
+    "DataProduct": ["Sea Surface Temperature", "Outgoing Longwave Radiation", "Wind Vector"],
+    "Organization": ["ISRO", "SAC", "NRSC"],
+}
+
+# (question, entity labels the service's entity matcher would report, labels the Cypher needs)
+QUESTIONS = [
+    ("What is the launch mass of INSAT-3D?", ["Spacecraft"], ["Spacecraft"]),
+    ("What instruments does INSAT-3D carry?", ["Spacecraft"], ["Spacecraft", "Instrument"]),
+    ("Which data products are processed by ISRO?", ["Organization"], ["DataProduct", "Organization"]),
+    ("How many spacecraft are there?", [], ["Spacecraft"]),
+    ("What is the orbit altitude of SCATSAT-1?", ["Spacecraft"], ["Spacecraft", "Orbit"]),
+    ("Which launch vehicle launched INSAT-3DR?", ["Spacecraft"], ["Spacecraft", "LaunchVehicle"]),
+    ("What data products does the Imager produce?", ["Instrument"], ["Instrument", "DataProduct"]),
+    ("How many channels does the Sounder have?", ["Instrument"], ["Instrument"]),
+    ("Which organization operates Oceansat-2?", ["Spacecraft"], ["Spacecraft", "Organization"]),
+    ("What is the mission objective of INSAT-3D?", ["Spacecraft"], ["Spacecraft", "Mission"]),
+    ("What is the processing level of Sea Surface Temperature?", ["DataProduct"], ["DataProduct"]),
+    ("What is the design life of SCATSAT-1?", ["Spacecraft"], ["Spacecraft"]),
+]
+
+INVENTED_PREFIXES = ["Calibration", "Thermal", "Radiometric", "Payload", "Telemetry", "Antenna", "Battery",
+                     "Solar", "Cloud", "Rainfall", "Ocean", "Snow", "Aerosol", "Vegetation", "Fire", "Flood",
+                     "Cyclone", "Ground", "Archive", "Validation"]
+INVENTED_SUFFIXES = ["Parameter", "Model", "Algorithm", "Band", "Event", "Report", "Campaign", "Station",
+                     "Sensor", "Dataset", "Service", "Portal", "Network", "Site", "Index"]
+
+def make_schema(invented_labels, seed=0):
+    rng = random.Random(seed)
+    node_props = {
+        label: [{"property": prop, "type": "STRING", "values": CORE_VALUES.get(label, [])[:3] if prop == "name" else []}
+                for prop in props]
+        for label, props in CORE_SCHEMA.items()
+    }
+    relationships = [{"start": s, "type": t, "end": e} for s, t, e in CORE_RELATIONSHIPS]
+    names = [f"{prefix}{suffix}" for prefix in INVENTED_PREFIXES for suffix in INVENTED_SUFFIXES]
+    rng.shuffle(names)
+    invented = names[:invented_labels]
+    for label in invented:
+        node_props[label] = [{"property": prop, "type": "STRING", "values": [f"{label} sample {i}" for i in range(3)]}
+                             for prop in ["name", "description", "unit", "source"][:rng.randint(2, 4)]]
+        for _ in range(rng.randint(1, 3)):
+            other = rng.choice(list(CORE_SCHEMA) + invented)
+            relationships.append({"start": label, "type": f"HAS_{other.upper()}", "end": other})
+    return {"node_props": node_props, "rel_props": {}, "relationships": relationships}
+
+def token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return lambda text: len(text) // 4 + 1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invented-labels", type=int, default=150)
+    parser.add_argument("--live", action="store_true", help="Also time the Cypher model on both prompts.")
+    args = parser.parse_args()
+
+    from graph_rag_service import CYPHER_GENERATION_PROMPT, CYPHER_LLM_MODEL
+    count_tokens = token_counter()
+    schema = make_schema(args.invented_labels)
+    start = time.perf_counter()
+    selector = SchemaSelector(schema, is_enhanced=True)
+    index_ms = (time.perf_counter() - start) * 1000
+
+    rows, missing, select_ms = [], 0, []
+    for question, entity_labels, needed in QUESTIONS:
+        start = time.perf_counter()
+        labels = selector.select_labels(question, entity_labels)
+        pruned = selector.select(question, entity_labels)
+        select_ms.append((time.perf_counter() - start) * 1000)
+        missing += len(set(needed) - set(labels)) if labels else 0
+        full_prompt = CYPHER_GENERATION_PROMPT.format(schema=selector.full_schema, question=question)
+        pruned_prompt = CYPHER_GENERATION_PROMPT.format(schema=pruned, question=question)
+        rows.append((question, full_prompt, pruned_prompt, len(labels)))
+
+    full_tokens = [count_tokens(full) for _, full, _, _ in rows]
+    pruned_tokens = [count_tokens(pruned) for _, _, pruned, _ in rows]
+    print(f"Schema: {len(schema['node_props'])} labels, {len(schema['relationships'])} relationship patterns "
+          f"(indexed in {index_ms:.1f} ms)")
+    print(f"Questions: {len(rows)}, labels kept per question: {statistics.mean(r[3] for r in rows):.1f}, "
+          f"needed labels missing: {missing}")
+    print(f"Prompt tokens per question: full {statistics.mean(full_tokens):.0f}, pruned {statistics.mean(pruned_tokens):.0f} "
+          f"({1 - sum(pruned_tokens) / sum(full_tokens):.1%} fewer); selection {statistics.mean(select_ms):.2f} ms/question")
+
+    if not args.live:
+        return
+    if not os.getenv("OPENAI_API_KEY"):
+        sys.exit("--live needs OPENAI_API_KEY.")
+    from langchain_openai import ChatOpenAI
+    llm = ChatOpenAI(temperature=0, model=CYPHER_LLM_MODEL)
+    latencies = {"full": [], "pruned": []}
+    for _, full_prompt, pruned_prompt, _ in rows:
+        for mode, prompt in (("full", full_prompt), ("pruned", pruned_prompt)):
+            start = time.perf_counter()
+            llm.invoke(prompt)
+            latencies[mode].append(time.perf_counter() - start)
+    for mode, values in latencies.items():
+        print(f"{CYPHER_LLM_MODEL} latency with {mode} schema: median {statistics.median(values):.2f}s, max {max(values):.2f}s")
+
+if __name__ == "__main__":
+    main()
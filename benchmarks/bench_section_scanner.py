@@ -0,0 +1,61 @@
+"""
+Pathological-input benchmark for clean_data.py: the DOTALL end-marker regex vs. the
+streaming section scanner.
+
+Each document is an H1 followed by N link-list lines that never close their link
+('* [text' with no '](...)'). For every such line the regex's lazy '.*?\\]\\(' scans to
+the end of the document before giving up, so its run time grows quadratically with N.
+The scanner tracks a single pending candidate and stays linear. Both must return the
+same block.
+
+Usage:
+    python benchmarks/bench_section_scanner.py --lines 1000 2000 4000
+"""
+import argparse
+import io
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clean_data import (
+    DEFAULT_END_MARKER_PATTERN,
+    DEFAULT_START_HEADING_PATTERN,
+    REGEX_FLAGS,
+    extract_description,
+    scan_description,
+)
+
+def make_document(line_count: int) -> str:
+    nav = "".join(f"* [Menu entry {i} with a long label that never closes\n" for i in range(line_count))
+    return f"# INSAT-3D\nThe INSAT-3D is a meteorological satellite.\n{nav}Footer text without a newline"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1000, 2000, 4000])
+    args = parser.parse_args()
+
+    start_re = re.compile(DEFAULT_START_HEADING_PATTERN, REGEX_FLAGS)
+    end_re = re.compile(DEFAULT_END_MARKER_PATTERN, REGEX_FLAGS)
+
+    print(f"{'lines':>7} {'bytes':>9} {'regex s':>9} {'scanner s':>10} {'speedup':>8} {'identical':>9}")
+    for line_count in args.lines:
+        document = make_document(line_count)
+
+        start = time.perf_counter()
+        expected = extract_description(document, start_re, end_re)
+        regex_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = scan_description(io.StringIO(document))
+        scanner_seconds = time.perf_counter() - start
+
+        print(
+            f"{line_count:>7} {len(document):>9} {regex_seconds:>9.3f} {scanner_seconds:>10.4f} "
+            f"{regex_seconds / scanner_seconds:>7.0f}x {str(result == expected):>9}"
+        )
+
+if __name__ == "__main__":
+    main()
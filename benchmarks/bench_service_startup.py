@@ -0,0 +1,54 @@
+"""
+Benchmark for the schema snapshot in graph_rag_service.py: time from process start to a
+Neo4jGraph with a usable schema, reading the full enhanced schema vs loading the snapshot,
+and the cost of the fingerprint check that decides whether a background refresh is due.
+
+Needs a running Neo4j with APOC (NEO4J_URI / NEO4J_USERNAME / NEO4J_PASSWORD). The graph
+is only read. Run it before and after loading more data to see how each path scales.
+
+Usage:
+    python benchmarks/bench_service_startup.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import graph_rag_service
+from graph_rag_service import connect_graph
+from schema_snapshot import schema_fingerprint
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if not graph_rag_service.NEO4J_PASSWORD:
+        sys.exit("Neo4j is not configured; set NEO4J_URI / NEO4J_USERNAME / NEO4J_PASSWORD.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "schema.json")
+        timings = {"full schema": [], "snapshot": [], "fingerprint": []}
+        for _ in range(args.runs):
+            for mode in ("full schema", "snapshot"):
+                if mode == "full schema" and os.path.exists(path):
+                    os.remove(path)
+                start = time.perf_counter()
+                graph, _ = connect_graph(snapshot_path=path)
+                timings[mode].append(time.perf_counter() - start)
+                if mode == "snapshot":
+                    start = time.perf_counter()
+                    schema_fingerprint(graph)
+                    timings["fingerprint"].append(time.perf_counter() - start)
+                graph.close()
+
+    print(f"{'startup path':>14} {'median s':>9} {'max s':>7}")
+    for mode, values in timings.items():
+        print(f"{mode:>14} {statistics.median(values):>9.3f} {max(values):>7.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark for GraphRAGService.stream_query: time to first answer token vs the time the
+blocking query_graph takes to return, with fake streaming LLMs and a fake graph
+(benchmarks/fake_llm.py) so it runs offline. The answer and plan caches are disabled,
+so every question runs the full pipeline.
+
+Usage:
+    python benchmarks/bench_streaming.py --questions 10 --cypher-ms 600 --first-token-ms 400 --token-ms 25
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm import build_fake_service
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--cypher-ms", type=float, default=600)
+    parser.add_argument("--db-ms", type=float, default=20)
+    parser.add_argument("--first-token-ms", type=float, default=400)
+    parser.add_argument("--token-ms", type=float, default=25)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    service = build_fake_service(args.cypher_ms / 1000, args.db_ms / 1000, args.first_token_ms / 1000,
+                                 args.token_ms / 1000)
+    blocking, first_token, streamed_total = [], [], []
+    for i in range(args.questions):
+        question = f"What is the launch mass of INSAT-3D? ({i})"
+        start = time.perf_counter()
+        service.query_graph(question)
+        blocking.append(time.perf_counter() - start)
+
+        events = list(service.stream_query(question))
+        timings = events[-1]["timings"]
+        first_token.append(timings["first_token_seconds"])
+        streamed_total.append(timings["total_seconds"])
+        assert sum(event["type"] == "token" for event in events) > 1, "answer was not streamed"
+
+    print(f"{'metric':>28} {'p50 s':>7} {'max s':>7}")
+    for name, values in (("blocking query_graph", blocking), ("streaming first token", first_token),
+                         ("streaming full answer", streamed_total)):
+        print(f"{name:>28} {statistics.median(values):>7.3f} {max(values):>7.3f}")
+
+if __name__ == "__main__":
+    main()
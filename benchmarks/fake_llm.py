@@ -0,0 +1,120 @@
+"""
+Offline stand-ins for the chat models and the Neo4j graph used by graph_rag_service.py.
+
+FakeChatModel is a LangChain chat model that answers with respond(prompt text), after
+first_token_delay seconds and then one word every token_delay seconds, in invoke() as
+well as in stream(), and reports one token per word as usage. FakeGraph is a GraphStore that answers Cypher with rows from
+respond(cypher), after query_delay seconds. build_fake_service wires both into a
+GraphRAGService that answers questions about INSAT-3D's launch mass.
+"""
+import time
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_neo4j.graphs.graph_store import GraphStore
+
+class FakeChatModel(BaseChatModel):
+    respond: object
+    first_token_delay: float = 0.0
+    token_delay: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _words(self, prompt):
+        self.calls += 1
+        text = self.respond(prompt)
+        time.sleep(self.first_token_delay)
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.token_delay)
+            yield word if i == len(words) - 1 else word + " "
+
+    @staticmethod
+    def _prompt(messages):
+        return "\n".join(str(message.content) for message in messages)
+
+    @staticmethod
+    def _usage(prompt, text):
+        input_tokens, output_tokens = len(prompt.split()), len(text.split())
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = self._prompt(messages)
+        text = "".join(self._words(prompt))
+        message = AIMessage(content=text, usage_metadata=self._usage(prompt, text),
+                            response_metadata={"model_name": self._llm_type})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = self._prompt(messages)
+        words = []
+        for word in self._words(prompt):
+            words.append(word)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+        # Usage arrives in a final empty chunk, as OpenAI sends it with stream_usage.
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(prompt, "".join(words)),
+                                                         response_metadata={"model_name": self._llm_type}))
+
+class FakeGraph(GraphStore):
+    def __init__(self, respond, structured_schema=None, query_delay=0.0):
+        self.respond = respond
+        self.query_delay = query_delay
+        self.structured_schema = structured_schema or {"node_props": {}, "rel_props": {}, "relationships": []}
+        self.schema = ""
+        self._enhanced_schema = False
+        self.queries = 0
+
+    @property
+    def get_schema(self):
+        return self.schema
+
+    @property
+    def get_structured_schema(self):
+        return self.structured_schema
+
+    def refresh_schema(self):
+        pass
+
+    def add_graph_documents(self, graph_documents, include_source=False):
+        raise NotImplementedError
+
+    def query(self, query, params=None):
+        self.queries += 1
+        time.sleep(self.query_delay)
+        return self.respond(query)
+
+FAKE_CYPHER = 'MATCH (s:Spacecraft {name: "INSAT-3D"}) RETURN s.launch_mass_kg AS mass'
+FAKE_ANSWER = ("INSAT-3D had a launch mass of 2060 kg. It was launched on 26 July 2013 from Kourou "
+               "on an Ariane 5 and carries a six-channel Imager and a nineteen-channel Sounder for "
+               "atmospheric temperature and humidity profiling over the Indian region.")
+
+def build_fake_service(cypher_seconds=0.6, db_seconds=0.02, first_token_seconds=0.4, token_seconds=0.025,
+                       answer_cache=None, plan_cache=None, answer_formatter=None):
+    """
+    Returns a GraphRAGService over FakeChatModels and a FakeGraph with the given delays.
+    Unless caches are passed, the answer and plan caches never hit, and unless an
+    answer_formatter is passed, every answer comes from the QA model, so every question
+    runs the full pipeline.
+    """
+    from answer_cache import AnswerCache
+    from answer_formatter import AnswerFormatter
+    from cypher_plan_cache import CypherPlanCache
+    from graph_rag_service import GraphRAGService
+
+    cypher_llm = FakeChatModel(respond=lambda prompt: FAKE_CYPHER, first_token_delay=cypher_seconds)
+    qa_llm = FakeChatModel(respond=lambda prompt: FAKE_ANSWER, first_token_delay=first_token_seconds,
+                           token_delay=token_seconds)
+    graph = FakeGraph(lambda cypher: [{"mass": 2060}] if "launch_mass" in cypher else [], query_delay=db_seconds)
+    return GraphRAGService(graph,
+                           answer_cache=answer_cache if answer_cache is not None else AnswerCache(ttl_seconds=0),
+                           plan_cache=plan_cache if plan_cache is not None else CypherPlanCache(threshold=2.0),
+                           cypher_llm=cypher_llm, qa_llm=qa_llm,
+                           answer_formatter=answer_formatter if answer_formatter is not None else AnswerFormatter(enabled=False))
@@ -0,0 +1,131 @@
+"""
+A local stand-in for the OpenAI chat completions API, for benchmarks.
+
+Serves POST .../chat/completions with a configurable latency and a configurable
+share of 429 responses carrying a retry-after-ms header. Point the OpenAI SDK at it
+with OPENAI_BASE_URL=<server.base_url>.
+
+The reply content comes from a `responder(request_json) -> str` callable; the default
+returns a small deterministic Cypher script derived from the last message, or the same
+graph as JSON when the request asks for structured outputs (response_format json_schema).
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def default_responder(request_json: dict) -> str:
+    content = request_json["messages"][-1]["content"]
+    digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:8]
+    if request_json.get("response_format", {}).get("type") == "json_schema":
+        return json.dumps({
+            "nodes": [
+                {"id": "d", "label": "Document", "name": f"doc-{digest}", "properties": []},
+                {"id": "t", "label": "Topic", "name": f"topic-{digest[:2]}", "properties": []},
+            ],
+            "relationships": [{"source": "d", "type": "MENTIONS", "target": "t"}],
+        })
+    return (
+        "```cypher\n"
+        f"MERGE (d:Document {{name: 'doc-{digest}'}})\n"
+        f"MERGE (t:Topic {{name: 'topic-{digest[:2]}'}})\n"
+        "MERGE (d)-[:MENTIONS]->(t);\n"
+        "```"
+    )
+
+class FakeOpenAIServer:
+    def __init__(self, latency=0.5, jitter=0.1, rate_limit_ratio=0.0, retry_after_ms=200,
+                 responder=default_responder, completion_tokens=150, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after_ms = retry_after_ms
+        self.responder = responder
+        self.completion_tokens = completion_tokens
+        self.stats = {"requests": 0, "rate_limited": 0, "in_flight": 0, "max_in_flight": 0, "prompt_tokens": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with server._lock:
+                    server.stats["requests"] += 1
+                    server.stats["in_flight"] += 1
+                    server.stats["max_in_flight"] = max(server.stats["max_in_flight"], server.stats["in_flight"])
+                    limited = server._random.random() < server.rate_limit_ratio
+                    delay = max(0.0, server.latency + server._random.uniform(-server.jitter, server.jitter))
+                try:
+                    if limited:
+                        with server._lock:
+                            server.stats["rate_limited"] += 1
+                        self._send(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                                   {"retry-after-ms": str(server.retry_after_ms)})
+                        return
+                    time.sleep(delay)
+                    request_json = json.loads(body)
+                    content = server.responder(request_json)
+                    prompt_tokens = sum(len(str(m.get("content", ""))) for m in request_json["messages"]) // 4
+                    with server._lock:
+                        server.stats["prompt_tokens"] += prompt_tokens
+                    self._send(200, {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": request_json.get("model", "fake"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {
+                            "prompt_tokens": prompt_tokens,
+                            "completion_tokens": server.completion_tokens,
+                            "total_tokens": prompt_tokens + server.completion_tokens,
+                        },
+                    })
+                finally:
+                    with server._lock:
+                        server.stats["in_flight"] -= 1
+
+            def _send(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,298 @@
+"""
+An in-memory stand-in for Neo4j, for offline benchmarks.
+
+LocalGraph keeps nodes and relationships the way cypher_bulk.BulkLoad collects them
+(nodes keyed on label, merge keys and values; MERGE and SET semantics included) and
+understands the Cypher this project sends:
+  - what upload_to_neo4j.py runs per file: generated MERGE/SET scripts, including the
+    "MATCH (a:...), (b:...) MERGE ..." statements script_statements() re-binds them into,
+    the UNWIND batches of --bulk (cypher_bulk.BulkLoad.batches), the schema bootstrap
+    commands and the graph version bump;
+  - what graph_rag_service.py reads: the graph version, the entity names and single
+    MATCH patterns of up to one outgoing hop that return properties or a count, with
+    $parameters (the question router's templates).
+Anything else raises ValueError.
+
+driver() returns an object with the parts of the neo4j driver API that Neo4jUploader and
+bump_graph_version use, and LocalGraph itself is a GraphStore for GraphRAGService. Every
+query sleeps query_delay seconds, standing in for the database round trip.
+"""
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from langchain_neo4j.graphs.graph_store import GraphStore
+from cypher_bulk import BulkLoad, UnsupportedStatement, _hashable, format_literal, node_identity, parse_map
+from graph_version import BUMP_GRAPH_VERSION_QUERY, READ_GRAPH_VERSION_QUERY
+
+IDENTIFIER = r"`(?:[^`]|``)+`|[A-Za-z_][A-Za-z0-9_]*"
+NODE = rf"\(\s*(\w+)\s*:\s*({IDENTIFIER})\s*(\{{[^}}]*\}})?\s*\)"
+NODE_RE = re.compile(NODE)
+READ_RE = re.compile(
+    rf"^\s*MATCH\s+{NODE}(?:\s*-\[\s*:\s*({IDENTIFIER})\s*\]->\s*{NODE})?\s+RETURN\s+(.+?)(?:\s+LIMIT\s+(\d+))?\s*;?\s*$",
+    re.S | re.I,
+)
+RETURN_ITEM_RE = re.compile(r"^(?:count\(\s*(\w+)\s*\)|(\w+)\.(\w+))(?:\s+AS\s+(\w+))?$", re.I)
+ENTITY_NAMES_PREFIX = "MATCH (n) WHERE n.name IS NOT NULL"
+SCHEMA_COMMAND_RE = re.compile(r"^\s*CREATE\s+(?:CONSTRAINT|INDEX)\s+(\S+)", re.I)
+_ROW_MAP = r"\{([^}]*)\}"
+NODE_BATCH_RE = re.compile(
+    rf"^UNWIND \$rows AS row\s+MERGE \(n:({IDENTIFIER}) {_ROW_MAP}\)\s+SET n \+= row\.p$")
+RELATIONSHIP_BATCH_RE = re.compile(
+    rf"^UNWIND \$rows AS row\s+MATCH \(a:({IDENTIFIER}) {_ROW_MAP}\)\s+MATCH \(b:({IDENTIFIER}) {_ROW_MAP}\)\s+"
+    rf"MERGE \(a\)-\[r:({IDENTIFIER})(?: {_ROW_MAP})?\]->\(b\)\s+SET r \+= row\.p$")
+ROW_KEY_RE = re.compile(rf"({IDENTIFIER}): row\.\w\[\d+\]")
+DROP_CONSTRAINT_RE = re.compile(r"^\s*DROP\s+CONSTRAINT\s+(\S+)", re.I)
+PARAMETER_RE = re.compile(r"\$(\w+)")
+
+def _name(token):
+    return token[1:-1].replace("``", "`") if token.startswith("`") else token
+
+def _pattern(label, map_text):
+    return _name(label), parse_map(map_text) if map_text else {}
+
+class LocalGraph(GraphStore):
+    """
+    An in-memory graph answering the Cypher described in the module docstring.
+    """
+    def __init__(self, query_delay=0.0):
+        self.query_delay = query_delay
+        self.load = BulkLoad()
+        self.schema_objects = set()
+        self.version = None
+        self.structured_schema = {"node_props": {}, "rel_props": {}, "relationships": []}
+        self.schema = ""
+        self._enhanced_schema = False
+        self.stats = {"queries": 0, "writes": 0, "reads": 0, "unsupported_writes": 0}
+        self._lock = threading.Lock()
+        self._index = None
+
+    # --- GraphStore ---
+    @property
+    def get_schema(self):
+        return self.schema
+
+    @property
+    def get_structured_schema(self):
+        return self.structured_schema
+
+    def refresh_schema(self):
+        node_props = defaultdict(set)
+        relationships = set()
+        with self._lock:
+            for (label, keys, _), props in self.load.nodes.items():
+                node_props[label].update(keys, props)
+            for rel_type, start, end, _, _ in self.load.relationships:
+                relationships.add((start[0], rel_type, end[0]))
+        self.structured_schema = {
+            "node_props": {label: [{"property": prop, "type": "STRING"} for prop in sorted(props)]
+                           for label, props in sorted(node_props.items())},
+            "rel_props": {},
+            "relationships": [{"start": s, "type": t, "end": e} for s, t, e in sorted(relationships)],
+        }
+        self.schema = "\n".join(f"(:{s})-[:{t}]->(:{e})" for s, t, e in sorted(relationships))
+
+    def add_graph_documents(self, graph_documents, include_source=False):
+        raise NotImplementedError
+
+    def query(self, query, params=None):
+        time.sleep(self.query_delay)
+        with self._lock:
+            self.stats["queries"] += 1
+            return self._run(query.strip(), params or {})
+
+    def driver(self):
+        return _LocalDriver(self)
+
+    def snapshot_rows(self):
+        """
+        Returns (nodes, relationships) in the form graph_snapshot.write_snapshot takes.
+        """
+        with self._lock:
+            nodes = [(identity, [identity[0]], {**dict(zip(identity[1], identity[2])), **props})
+                     for identity, props in self.load.nodes.items()]
+            relationships = [(start, rel_type, end) for rel_type, start, end, _, _ in self.load.relationships]
+        return nodes, relationships
+
+    # --- Execution ---
+    def _run(self, query, params):
+        if query == BUMP_GRAPH_VERSION_QUERY:
+            self.version = {"stamp": str(uuid.uuid4()), "version": (self.version or {}).get("version", 0) + 1}
+            return [dict(self.version)]
+        if query == READ_GRAPH_VERSION_QUERY:
+            return [dict(self.version)] if self.version else []
+        if query.startswith(ENTITY_NAMES_PREFIX):
+            rows = [{"name": name, "label": label} for label, name, _ in self._named_nodes()]
+            return rows[: params.get("limit", len(rows))]
+        if query.upper().startswith("SHOW "):
+            return [{"name": name} for name in sorted(self.schema_objects)]
+        if query.upper().startswith("CALL DB.AWAITINDEXES"):
+            return []
+        command = SCHEMA_COMMAND_RE.match(query)
+        if command:
+            self.schema_objects.add(command.group(1))
+            return []
+        command = DROP_CONSTRAINT_RE.match(query)
+        if command:
+            self.schema_objects.discard(command.group(1))
+            return []
+        if query.startswith("UNWIND $rows"):
+            self._write_batch(query, params["rows"])
+            return []
+        if re.search(r"\bMERGE\b", query, re.I):
+            self._write(query)
+            return []
+        return self._read(PARAMETER_RE.sub(lambda m: format_literal(params[m.group(1)]), query))
+
+    def _write(self, statement):
+        self.stats["writes"] += 1
+        self._index = None
+        if statement.upper().startswith("MATCH"):
+            # A re-bound statement: MATCH its nodes, and only if all exist MERGE the rest.
+            merge_at = re.search(r"\bMERGE\b", statement, re.I).start()
+            merges = []
+            for var, label, map_text in NODE_RE.findall(statement[:merge_at]):
+                try:
+                    identity = node_identity(*_pattern(label, map_text))
+                except UnsupportedStatement:
+                    identity = None
+                if identity not in self.load.nodes:
+                    return
+                merges.append(f"MERGE ({var}:{label} {map_text})")
+            statement = "\n".join(merges + [statement[merge_at:]])
+        raw = len(self.load.raw_statements)
+        self.load.add_script(statement)
+        self.stats["unsupported_writes"] += len(self.load.raw_statements) - raw
+
+    def _write_batch(self, query, rows):
+        self.stats["writes"] += 1
+        self._index = None
+
+        def identity(label, map_text, values):
+            keys = tuple(_name(key) for key in ROW_KEY_RE.findall(map_text or ""))
+            return _name(label), keys, tuple(_hashable(value) for value in values)
+
+        match = NODE_BATCH_RE.match(query)
+        if match:
+            for row in rows:
+                self.load.nodes.setdefault(identity(match.group(1), match.group(2), row["k"]), {}).update(row["p"])
+            return
+        match = RELATIONSHIP_BATCH_RE.match(query)
+        if not match:
+            raise ValueError(f"LocalGraph cannot run this batch: {query}")
+        start_label, start_map, end_label, end_map, rel_type, rel_map = match.groups()
+        keys = tuple(_name(key) for key in ROW_KEY_RE.findall(rel_map or ""))
+        for row in rows:
+            start, end = identity(start_label, start_map, row["a"]), identity(end_label, end_map, row["b"])
+            if start in self.load.nodes and end in self.load.nodes:
+                key = (_name(rel_type), start, end, keys, tuple(_hashable(value) for value in row["k"]))
+                self.load.relationships.setdefault(key, {}).update(row["p"])
+
+    def _named_nodes(self):
+        for (label, keys, values), props in self.load.nodes.items():
+            properties = {**dict(zip(keys, values)), **props}
+            if isinstance(properties.get("name"), str):
+                yield label, properties["name"], properties
+
+    def _build_index(self):
+        by_label = defaultdict(list)
+        for identity, props in self.load.nodes.items():
+            label, keys, values = identity
+            by_label[label].append((identity, {**dict(zip(keys, values)), **props}))
+        outgoing = defaultdict(list)
+        for rel_type, start, end, _, _ in self.load.relationships:
+            outgoing[(start, rel_type)].append(end)
+        properties = {identity: props for nodes in by_label.values() for identity, props in nodes}
+        self._index = (by_label, outgoing, properties)
+
+    def _read(self, query):
+        match = READ_RE.match(query)
+        if not match:
+            raise ValueError(f"LocalGraph does not understand this query: {query}")
+        self.stats["reads"] += 1
+        if self._index is None:
+            self._build_index()
+        by_label, outgoing, properties = self._index
+        left_var, left_label, left_map, rel_type, right_var, right_label, right_map, returns, limit = match.groups()
+        left_label, left_props = _pattern(left_label, left_map)
+
+        def matches(props, wanted):
+            return all(props.get(key) == value for key, value in wanted.items())
+
+        bindings = []
+        for identity, props in by_label.get(left_label, []):
+            if not matches(props, left_props):
+                continue
+            if rel_type is None:
+                bindings.append({left_var: props})
+                continue
+            right_label, right_props = _pattern(right_label, right_map)
+            for end in outgoing.get((identity, _name(rel_type)), []):
+                if end[0] == right_label and matches(properties[end], right_props):
+                    bindings.append({left_var: props, right_var: properties[end]})
+
+        items = []
+        for item in returns.split(","):
+            parsed = RETURN_ITEM_RE.match(item.strip())
+            if not parsed:
+                raise ValueError(f"LocalGraph does not understand this RETURN item: {item.strip()}")
+            count_var, var, prop, alias = parsed.groups()
+            items.append((count_var, var, prop, alias or item.strip()))
+        if all(count_var for count_var, _, _, _ in items):
+            return [{alias: len(bindings) for _, _, _, alias in items}]
+        if any(count_var for count_var, _, _, _ in items):
+            raise ValueError(f"LocalGraph does not group counts: {query}")
+        rows = [{alias: binding[var].get(prop) for _, var, prop, alias in items} for binding in bindings]
+        return rows[: int(limit)] if limit else rows
+
+# --- Driver API ---
+class _LocalResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def single(self):
+        return self._rows[0] if self._rows else None
+
+    def data(self):
+        return list(self._rows)
+
+    def consume(self):
+        return None
+
+class _LocalSession:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **kwargs):
+        return _LocalResult(self.graph.query(query, {**(parameters or {}), **kwargs}))
+
+    def execute_write(self, work, *args, **kwargs):
+        return work(self, *args, **kwargs)
+
+    execute_read = execute_write
+
+    def close(self):
+        pass
+
+class _LocalDriver:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def session(self, **kwargs):
+        return _LocalSession(self.graph)
+
+    def verify_connectivity(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,38 @@
+"""
+The list of pages a batch crawl changed (changed_files.txt), which clean_data.py,
+generate_cypher.py and upload_to_neo4j.py take with --changed-list to skip unchanged pages.
+
+crawl.py adds one markdown file name per line; the later stages match their own files
+on the name without its extension (insat_3d.md -> insat_3d.txt, insat_3d.cypher, ...).
+The list accumulates over crawls, so pages changed by a crawl whose list was never
+consumed are not lost, until upload_to_neo4j.py --changed-list clears it after an
+upload without failures.
+"""
+import os
+
+CHANGED_FILES_FILENAME = "changed_files.txt"
+
+def write_changed_list(path, filenames):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(f"{name}\n" for name in sorted(filenames))
+
+def add_to_changed_list(path, filenames):
+    """
+    Adds filenames to the changed list at path, keeping the names already in it.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            listed = {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        listed = set()
+    write_changed_list(path, listed | set(filenames))
+
+def clear_changed_list(path):
+    write_changed_list(path, [])
+
+def read_changed_list(path):
+    """
+    Returns the file names in a changed list without their extensions.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return {os.path.splitext(line.strip())[0] for line in f if line.strip()}
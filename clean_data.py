@@ -1,14 +1,198 @@
+import argparse
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from changed_files import read_changed_list
+
+# Define common regex flags:
+# re.M (MULTILINE): Makes ^ and $ match start/end of lines.
+# re.S (DOTALL): Makes . match newlines as well (important for .*?).
+# re.U (UNICODE): Makes \s match all Unicode whitespace (CRUCIAL for non-breaking spaces).
+REGEX_FLAGS = re.M | re.S | re.U
+
+DEFAULT_START_HEADING_PATTERN = r'^#\s(.+?)\n'
+# This pattern combines finding an H2+ heading OR a list item with a link.
+# It marks the end of the main description.
+# The \s* correctly handles all Unicode whitespace thanks to re.U flag.
+DEFAULT_END_MARKER_PATTERN = r'(?:^\s*##+\s.*?\n)|(?:^\s*[\*\-]\s*\[(?:!\[.*?\]\(.*?\)|.*?\]\(.*?\)).*?\n)'
+
+# Patterns that scan_description() implements exactly. Any other pattern goes through the regex path.
+SCANNER_START_PATTERNS = {DEFAULT_START_HEADING_PATTERN, r'^#\s.+?\n'}
+SCANNER_END_PATTERNS = {DEFAULT_END_MARKER_PATTERN}
+
+# Status codes returned by extract_file() and counted in the parallel summary report.
+STATUS_EXTRACTED = "extracted"
+STATUS_EXTRACTED_TO_EOF = "extracted_to_eof"
+STATUS_NO_H1 = "no_h1"
+STATUS_EMPTY = "empty"
+STATUS_ERROR = "error"
+
+def extract_description(content: str, start_re: re.Pattern, end_re: re.Pattern) -> tuple[str | None, bool]:
+    """
+    Extracts the main description block from one document using precompiled patterns.
+
+    Returns:
+        tuple[str | None, bool]: The stripped block (None if no H1 heading was found) and
+                                 whether an end marker was found after the H1.
+    """
+    # Step 1: Find the first H1 heading in the *entire document*.
+    h1_match = start_re.search(content)
+    if not h1_match:
+        return None, False
+
+    # Search for the end marker *after* the H1 heading has finished, so that an end marker
+    # within the H1 line itself is never matched. Searching from a position avoids copying
+    # the rest of the document; the H1 pattern ends with a newline, so ^ still matches there.
+    end_match = end_re.search(content, h1_match.end())
+    if end_match:
+        # Extract content from the H1 start up to (but not including) the end marker.
+        return content[h1_match.start():end_match.start()].strip(), True
+    # If no general end marker is found, take everything from H1 to the end of the file.
+    return content[h1_match.start():].strip(), False
+
+# --- Streaming Section Scanner ---
+# Stages of a pending "list item with a link" end marker (the second alternative of
+# DEFAULT_END_MARKER_PATTERN). With re.S the link may span lines, so a candidate can stay
+# pending across lines until its '[', '](', ')' and trailing newline have all been seen.
+# A bare '##' line is pending until the next newline (_HEADING_NEWLINE).
+_LINK_BRACKET, _LINK_CLOSE, _LINK_PAREN, _LINK_NEWLINE, _HEADING_NEWLINE, _MATCHED, _FAILED = range(7)
+
+def _advance_link(stage: int, segment: str, has_newline: bool) -> int:
+    """Advances a link candidate over one line's text (without its newline)."""
+    offset = 0
+    if stage == _LINK_CLOSE:
+        index = segment.find('](')
+        if index < 0:
+            return stage
+        stage, offset = _LINK_PAREN, index + 2
+    if stage == _LINK_PAREN:
+        index = segment.find(')', offset)
+        if index < 0:
+            return stage
+        stage = _LINK_NEWLINE
+    if stage == _LINK_NEWLINE and has_newline:
+        return _MATCHED
+    return stage
+
+def scan_description(lines) -> tuple[str | None, bool]:
+    """
+    Extracts the main description block in one forward pass over the lines of a document
+    (e.g. an open file), without the regex engine. Produces exactly what extract_description()
+    produces for DEFAULT_START_HEADING_PATTERN and DEFAULT_END_MARKER_PATTERN, but in time
+    linear in the document size: lines before the H1 are discarded, and at most one pending
+    candidate per end-marker alternative is tracked, since an earlier pending link candidate
+    always wins over a later one.
+
+    Returns:
+        tuple[str | None, bool]: The stripped block (None if no H1 heading was found) and
+                                 whether an end marker was found after the H1.
+    """
+    lines = iter(lines)
+    offset = 0
+    buffer: list[str] = []
+
+    # Step 1: Find the first line starting with '#' plus whitespace. Like '^#\s(.+?)\n', the
+    # heading ends at the first newline at least three characters after the '#'.
+    h1_needs_newline_at = None
+    for line in lines:
+        if h1_needs_newline_at is None:
+            if len(line) > 1 and line[0] == '#' and line[1].isspace():
+                h1_needs_newline_at = offset + 3
+                buffer.append(line)
+        else:
+            buffer.append(line)
+        if h1_needs_newline_at is not None and line.find('\n', max(0, h1_needs_newline_at - offset)) >= 0:
+            break
+        offset += len(line)
+    else:
+        return None, False
+
+    # Step 2: Scan the following lines for the first end marker. Candidates are
+    # [start line index in buffer, stage] in order of appearance.
+    candidates: list[list[int]] = []
+    for line in lines:
+        line_index = len(buffer)
+        buffer.append(line)
+        has_newline = line.endswith('\n')
+        text = line[:-1] if has_newline else line
+        stripped = text.lstrip()
+
+        for candidate in candidates:
+            stage = candidate[1]
+            if stage == _LINK_BRACKET and stripped:
+                stage = _advance_link(_LINK_CLOSE, stripped[1:], has_newline) if stripped[0] == '[' else _FAILED
+            elif stage in (_LINK_CLOSE, _LINK_PAREN, _LINK_NEWLINE):
+                stage = _advance_link(stage, text, has_newline)
+            elif stage == _HEADING_NEWLINE and has_newline:
+                stage = _MATCHED
+            candidate[1] = stage
+        candidates = [c for c in candidates if c[1] != _FAILED]
+        if candidates and candidates[0][1] == _MATCHED:
+            break
+        if not stripped or any(c[1] == _MATCHED for c in candidates):
+            continue
+
+        if stripped[0] == '#':
+            # '##+\s.*?\n': two or more '#', a whitespace character, then a later newline.
+            run = len(stripped) - len(stripped.lstrip('#'))
+            if run >= 2:
+                if run < len(stripped):
+                    if stripped[run].isspace() and has_newline:
+                        candidates.append([line_index, _MATCHED])
+                elif has_newline:
+                    # The whitespace is this line's own newline; any later newline completes it.
+                    candidates.append([line_index, _HEADING_NEWLINE])
+        elif stripped[0] in '*-' and not any(c[1] in (_LINK_CLOSE, _LINK_PAREN, _LINK_NEWLINE) for c in candidates):
+            # '[\*\-]\s*\[...\]\(...\).*?\n', where the whitespace and the link may span lines.
+            rest = stripped[1:].lstrip()
+            if not rest:
+                candidates.append([line_index, _LINK_BRACKET])
+            elif rest[0] == '[':
+                candidates.append([line_index, _advance_link(_LINK_CLOSE, rest[1:], has_newline)])
+
+        if candidates and candidates[0][1] == _MATCHED:
+            break
+
+    matched = [c for c in candidates if c[1] == _MATCHED]
+    if not matched:
+        # If no general end marker is found, take everything from H1 to the end of the file.
+        return ''.join(buffer).strip(), False
+    return ''.join(buffer[:matched[0][0]]).strip(), True
+
+def _iter_lines(f_read, block_size: int = 1 << 16):
+    """Yields the lines of a text file, reading it in blocks (faster than line-by-line reads)."""
+    pending = ''
+    while True:
+        block = f_read.read(block_size)
+        if not block:
+            break
+        lines = (pending + block).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    if pending:
+        yield pending
+
+def read_description(source_filepath: str, start_re: re.Pattern, end_re: re.Pattern, use_scanner: bool) -> tuple[str | None, bool]:
+    """
+    Extracts the main description block of one file, streaming it through scan_description()
+    when use_scanner is set and reading it whole for the regex path otherwise.
+    """
+    with open(source_filepath, 'r', encoding='utf-8') as f_read:
+        if use_scanner:
+            return scan_description(_iter_lines(f_read))
+        return extract_description(f_read.read(), start_re, end_re)
+
+def _can_scan(start_heading_pattern: str, end_marker_pattern: str) -> bool:
+    return start_heading_pattern in SCANNER_START_PATTERNS and end_marker_pattern in SCANNER_END_PATTERNS
 
 def extract_main_description_by_structural_markers(
-    source_directory: str, 
-    output_directory: str, 
-    start_heading_pattern: str = r'^#\s(.+?)\n', 
-    # This pattern now combines finding an H2+ heading OR a list item with a link.
-    # It marks the end of the main description.
-    # The \s* now correctly handles all Unicode whitespace thanks to re.U flag.
-    end_marker_pattern: str = r'(?:^\s*##+\s.*?\n)|(?:^\s*[\*\-]\s*\[(?:!\[.*?\]\(.*?\)|.*?\]\(.*?\)).*?\n)'
+    source_directory: str,
+    output_directory: str,
+    start_heading_pattern: str = DEFAULT_START_HEADING_PATTERN,
+    end_marker_pattern: str = DEFAULT_END_MARKER_PATTERN,
+    only_files: set[str] | None = None,
+    use_scanner: bool = True
 ) -> None:
     """
     Reads markdown files from a source directory and extracts the main description block.
@@ -22,56 +206,37 @@ def extract_main_description_by_structural_markers(
                                      of the desired content block.
         end_marker_pattern (str): Regex pattern for the *first* structural element (H2+ heading
                                   or list item with link) that marks the end of the main description.
+        only_files (set[str] | None): If given, only files whose name without extension is in
+                                      this set are processed (e.g. the changed-files list
+                                      written by an incremental crawl).
+        use_scanner (bool): Use the linear-time streaming scanner instead of the regex engine
+                            when the patterns are ones it implements (the defaults).
     """
     os.makedirs(output_directory, exist_ok=True)
     print(f"Starting general description extraction from '{source_directory}'...")
 
+    start_re = re.compile(start_heading_pattern, REGEX_FLAGS)
+    end_re = re.compile(end_marker_pattern, REGEX_FLAGS)
+    use_scanner = use_scanner and _can_scan(start_heading_pattern, end_marker_pattern)
+
     for filename in os.listdir(source_directory):
         if filename.endswith(".md"):
+            if only_files is not None and os.path.splitext(filename)[0] not in only_files:
+                continue
             source_filepath = os.path.join(source_directory, filename)
             output_filepath = os.path.join(output_directory, filename)
 
             print(f"\nProcessing '{filename}'...")
 
             try:
-                with open(source_filepath, 'r', encoding='utf-8') as f_read:
-                    full_content = f_read.read()
+                extracted_content, found_end_marker = read_description(source_filepath, start_re, end_re, use_scanner)
 
-                # Define common regex flags:
-                # re.M (MULTILINE): Makes ^ and $ match start/end of lines.
-                # re.S (DOTALL): Makes . match newlines as well (important for .*?).
-                # re.U (UNICODE): Makes \s match all Unicode whitespace (CRUCIAL for non-breaking spaces).
-                regex_flags = re.M | re.S | re.U
-
-                # Step 1: Find the first H1 heading in the *entire document*.
-                h1_match = re.search(start_heading_pattern, full_content, regex_flags)
-
-                if not h1_match:
+                if extracted_content is None:
                     print(f"  Warning: No main H1 heading found (pattern: '{start_heading_pattern}') in '{filename}'. Skipping.")
                     continue
 
-                # The content we want starts from the beginning of this H1 line.
-                content_start_index = h1_match.start()
-                
-                # We need to search for the end marker *after* the H1 heading has finished.
-                # This prevents accidentally matching an end marker within the H1 line itself.
-                search_after_h1_index = h1_match.end() 
-                
-                # Search for the end marker pattern from this point onwards.
-                # The regex_flags (especially re.U) are now applied here.
-                end_match = re.search(end_marker_pattern, full_content[search_after_h1_index:], regex_flags)
-
-                if end_match:
-                    # Calculate the global end index.
-                    # This is the start of the matched end_marker_pattern in the original content.
-                    global_end_index = search_after_h1_index + end_match.start()
-                    
-                    # Extract content from the H1 start up to (but not including) the end marker.
-                    extracted_content = full_content[content_start_index:global_end_index].strip()
-                else:
-                    # If no general end marker is found, take everything from H1 to the end of the file.
+                if not found_end_marker:
                     print(f"  Warning: No general end marker found after H1 in '{filename}'. Saving from H1 to end of file.")
-                    extracted_content = full_content[content_start_index:].strip()
 
                 # Save the extracted content if it's not empty
                 if extracted_content:
@@ -88,16 +253,140 @@ def extract_main_description_by_structural_markers(
 
     print("\nExtraction process completed. Check the 'extracted_descriptions_general' folder.")
 
+# --- Parallel Extraction ---
+# Patterns compiled once per worker process by _init_worker().
+_worker_start_re = None
+_worker_end_re = None
+_worker_use_scanner = False
+
+def _init_worker(start_heading_pattern: str, end_marker_pattern: str, use_scanner: bool) -> None:
+    global _worker_start_re, _worker_end_re, _worker_use_scanner
+    _worker_start_re = re.compile(start_heading_pattern, REGEX_FLAGS)
+    _worker_end_re = re.compile(end_marker_pattern, REGEX_FLAGS)
+    _worker_use_scanner = use_scanner
+
+def extract_file(source_filepath: str, output_filepath: str) -> tuple[str, str, str | None]:
+    """
+    Extracts and saves the description block of one file inside a worker process.
+
+    Returns:
+        tuple[str, str, str | None]: (file name, status code, error message or None).
+    """
+    filename = os.path.basename(source_filepath)
+    try:
+        extracted_content, found_end_marker = read_description(
+            source_filepath, _worker_start_re, _worker_end_re, _worker_use_scanner
+        )
+        if extracted_content is None:
+            return filename, STATUS_NO_H1, None
+        if not extracted_content:
+            return filename, STATUS_EMPTY, None
+
+        with open(output_filepath, 'w', encoding='utf-8') as f_write:
+            f_write.write(extracted_content)
+        return filename, STATUS_EXTRACTED if found_end_marker else STATUS_EXTRACTED_TO_EOF, None
+    except Exception as e:
+        return filename, STATUS_ERROR, str(e)
+
+def _extract_file_pair(paths: tuple[str, str]) -> tuple[str, str, str | None]:
+    return extract_file(*paths)
+
+def extract_descriptions_parallel(
+    source_directory: str,
+    output_directory: str,
+    start_heading_pattern: str = DEFAULT_START_HEADING_PATTERN,
+    end_marker_pattern: str = DEFAULT_END_MARKER_PATTERN,
+    only_files: set[str] | None = None,
+    workers: int | None = None,
+    chunksize: int = 64,
+    use_scanner: bool = True
+) -> dict:
+    """
+    Same extraction as extract_main_description_by_structural_markers(), but fans the files
+    out across a process pool in chunks and returns a summary instead of printing per file.
+
+    Args:
+        source_directory (str): Path to the directory containing the original markdown files.
+        output_directory (str): Path to the directory where cleaned markdown files will be saved.
+        start_heading_pattern (str): Regex pattern for the H1 heading that marks the start.
+        end_marker_pattern (str): Regex pattern for the element that marks the end.
+        only_files (set[str] | None): If given, only files whose name without extension is in this set.
+        workers (int | None): Number of worker processes. Defaults to the number of CPUs.
+        chunksize (int): Number of files handed to a worker at a time.
+        use_scanner (bool): Use the streaming scanner when the patterns allow it.
+
+    Returns:
+        dict: Count per status code, plus 'errors' as a list of (file name, message).
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    jobs = [
+        (os.path.join(source_directory, filename), os.path.join(output_directory, filename))
+        for filename in os.listdir(source_directory)
+        if filename.endswith(".md")
+        and (only_files is None or os.path.splitext(filename)[0] in only_files)
+    ]
+
+    summary = {status: 0 for status in (STATUS_EXTRACTED, STATUS_EXTRACTED_TO_EOF, STATUS_NO_H1, STATUS_EMPTY, STATUS_ERROR)}
+    summary["errors"] = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(start_heading_pattern, end_marker_pattern, use_scanner and _can_scan(start_heading_pattern, end_marker_pattern)),
+    ) as executor:
+        for filename, status, error in executor.map(_extract_file_pair, jobs, chunksize=chunksize):
+            summary[status] += 1
+            if error:
+                summary["errors"].append((filename, error))
+    return summary
+
+def print_summary(summary: dict, output_directory: str) -> None:
+    print("\n--- Extraction Summary ---")
+    print(f"Description blocks saved: {summary[STATUS_EXTRACTED] + summary[STATUS_EXTRACTED_TO_EOF]}")
+    print(f"  of which saved from H1 to end of file (no end marker): {summary[STATUS_EXTRACTED_TO_EOF]}")
+    print(f"Files without an H1 heading: {summary[STATUS_NO_H1]}")
+    print(f"Files with no extractable content: {summary[STATUS_EMPTY]}")
+    print(f"Files with errors: {summary[STATUS_ERROR]}")
+    for filename, error in summary["errors"]:
+        print(f"  {filename}: {error}")
+    print(f"Output folder: '{output_directory}'")
+
 if __name__ == "__main__":
-    SOURCE_DIR = "cleaned_scraped_pages" 
-    OUTPUT_DIR = "extracted_data" 
-
-    extract_main_description_by_structural_markers(
-        SOURCE_DIR, 
-        OUTPUT_DIR,
-        start_heading_pattern=r'^#\s.+?\n', 
-        # This combines:
-        # 1. Start of a new H2/H3/etc. heading (##, ###, etc.)
-        # 2. Start of an unordered list item that contains a Markdown link (e.g., * [Text](URL) or * ![Alt](URL))
-        end_marker_pattern=r'(?:^\s*##+\s.*?\n)|(?:^\s*[\*\-]\s*\[(?:!\[.*?\]\(.*?\)|.*?\]\(.*?\)).*?\n)'
-    )
\ No newline at end of file
+    SOURCE_DIR = "cleaned_scraped_pages"
+    OUTPUT_DIR = "extracted_data"
+
+    parser = argparse.ArgumentParser(description="Extract the main description block from scraped markdown files.")
+    parser.add_argument("--changed-list", help="Only process the files named in this list (e.g. scraped_pages/changed_files.txt).")
+    parser.add_argument("--parallel", action="store_true", help="Process files in a process pool and print a summary report.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --parallel (default: number of CPUs).")
+    parser.add_argument("--regex", action="store_true", help="Use the regex engine instead of the streaming section scanner.")
+    args = parser.parse_args()
+
+    only_files = None
+    if args.changed_list:
+        only_files = read_changed_list(args.changed_list)
+
+    # This combines:
+    # 1. Start of a new H2/H3/etc. heading (##, ###, etc.)
+    # 2. Start of an unordered list item that contains a Markdown link (e.g., * [Text](URL) or * ![Alt](URL))
+    end_marker = DEFAULT_END_MARKER_PATTERN
+
+    if args.parallel:
+        summary = extract_descriptions_parallel(
+            SOURCE_DIR,
+            OUTPUT_DIR,
+            start_heading_pattern=r'^#\s.+?\n',
+            end_marker_pattern=end_marker,
+            only_files=only_files,
+            workers=args.workers,
+            use_scanner=not args.regex
+        )
+        print_summary(summary, OUTPUT_DIR)
+    else:
+        extract_main_description_by_structural_markers(
+            SOURCE_DIR,
+            OUTPUT_DIR,
+            start_heading_pattern=r'^#\s.+?\n',
+            end_marker_pattern=end_marker,
+            only_files=only_files,
+            use_scanner=not args.regex
+        )
@@ -1,8 +1,24 @@
+import argparse
 import asyncio
+import hashlib
+import json
 import os
 import re
-from urllib.parse import urlparse 
-from crawl4ai import AsyncWebCrawler
+import time
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from urllib.parse import urldefrag, urljoin, urlparse
+from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
+from changed_files import CHANGED_FILES_FILENAME, add_to_changed_list
+
+OUTPUT_DIRECTORY = "scraped_pages"
+MANIFEST_FILENAME = "crawl_manifest.json"
+
+# --- Batch Crawl Defaults ---
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_DEPTH = 1
+DEFAULT_HOST_DELAY = 0.2  # Minimum seconds between two requests to the same host
 
 # --- Helper Function to Create a Simple Filename from a URL ---
 def get_simple_filename_from_url(url: str, max_length: int = 100) -> str:
@@ -38,6 +54,288 @@ def get_simple_filename_from_url(url: str, max_length: int = 100) -> str:
 
     return filename_safe + ".md"
 
+def get_batch_filename_from_url(url: str, max_length: int = 100) -> str:
+    """
+    Builds a filename from the whole path of a normalized URL plus a short hash of the URL,
+    so distinct pages never share a file even when their last segments (or, after
+    sanitizing, their paths) are equal.
+    Example: https://mosdac.gov.in/a/overview becomes a_overview-<hash>.md
+    Example: https://mosdac.gov.in/ (homepage) becomes mosdac_gov_in-<hash>.md
+    """
+    parsed_url = urlparse(url)
+    path_segments = [s for s in parsed_url.path.split('/') if s]
+    filename_base = '_'.join(path_segments) if path_segments else parsed_url.netloc.replace('.', '_').replace('-', '_')
+    filename_safe = re.sub(r'[^\w\-\._]', '', filename_base).strip('_.') or "untitled_page"
+
+    suffix = "-" + hashlib.sha1(url.encode('utf-8')).hexdigest()[:10] + ".md"
+    return filename_safe[:max_length - len(suffix)] + suffix
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL for deduplication: drops the #fragment and lowercases the
+    scheme and host. Example: HTTPS://MOSDAC.gov.in/insat-3dr#overview becomes
+    https://mosdac.gov.in/insat-3dr
+    """
+    url, _ = urldefrag(url.strip())
+    parsed = urlparse(url)
+    return parsed._replace(scheme=parsed.scheme.lower(), netloc=parsed.netloc.lower()).geturl()
+
+def extract_markdown(result) -> str | None:
+    """
+    Returns the raw markdown of a crawl result, or None if the crawl produced none.
+    """
+    if not (result.success and result.markdown):
+        return None
+    if hasattr(result.markdown, 'raw_markdown') and result.markdown.raw_markdown:
+        return result.markdown.raw_markdown
+    if isinstance(result.markdown, str) and result.markdown.strip():
+        return result.markdown
+    return None
+
+# --- Seed Loading ---
+def load_seed_file(path: str) -> list[str]:
+    """
+    Reads one URL per line from a text file. Blank lines and lines starting with '#' are ignored.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+def load_sitemap(location: str) -> list[str]:
+    """
+    Reads the <loc> entries of a sitemap.xml given as a URL or a local path.
+    Nested sitemap indexes are followed.
+    """
+    if urlparse(location).scheme in ("http", "https"):
+        with urllib.request.urlopen(location, timeout=30) as response:
+            xml_bytes = response.read()
+    else:
+        with open(location, 'rb') as f:
+            xml_bytes = f.read()
+
+    root = ET.fromstring(xml_bytes)
+    locs = [el.text.strip() for el in root.iter() if el.tag.endswith('loc') and el.text]
+    if root.tag.endswith('sitemapindex'):
+        urls = []
+        for nested in locs:
+            urls.extend(load_sitemap(nested))
+        return urls
+    return locs
+
+# --- Incremental Crawl Manifest ---
+def normalize_markdown(markdown: str) -> str:
+    """
+    Normalizes markdown so that whitespace-only differences between two crawls
+    do not count as a change: unifies line endings, strips trailing spaces and
+    collapses runs of blank lines.
+    """
+    lines = [line.rstrip() for line in markdown.replace('\r\n', '\n').split('\n')]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+def content_hash(markdown: str) -> str:
+    return hashlib.sha256(normalize_markdown(markdown).encode('utf-8')).hexdigest()
+
+def load_manifest(path: str) -> dict:
+    """
+    Loads the URL -> {etag, last_modified, content_hash, filename, links} manifest
+    written by a previous batch crawl. A missing or unreadable manifest starts empty.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(path: str, manifest: dict) -> None:
+    """
+    Writes the manifest atomically so an interrupted run never leaves a truncated file.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _get_header(headers: dict | None, name: str) -> str | None:
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+def _is_not_modified(url: str, entry: dict, timeout: float = 30) -> bool:
+    """
+    Sends a conditional HEAD request with the validators stored in the manifest.
+    Returns True only when the server answers 304 Not Modified.
+    """
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    if not headers:
+        return False
+
+    request = urllib.request.Request(url, headers=headers, method="HEAD")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout):
+            return False
+    except urllib.error.HTTPError as e:
+        return e.code == 304
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+
+# --- Batch Crawl Engine ---
+class HostRateLimiter:
+    """
+    Enforces a minimum delay between the starts of two requests to the same host,
+    while requests to different hosts proceed independently.
+    """
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._next_slot: dict[str, float] = {}
+
+    async def wait(self, url: str) -> None:
+        if self.min_interval <= 0:
+            return
+        host = urlparse(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = self._next_slot.get(host, now)
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            self._next_slot[host] = max(slot, now) + self.min_interval
+
+def _write_file(filepath: str, content: str) -> None:
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write(content)
+
+async def batch_crawl(
+    seed_urls: list[str],
+    output_directory: str = OUTPUT_DIRECTORY,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    host_delay: float = DEFAULT_HOST_DELAY,
+    same_domain_only: bool = True,
+    crawler_strategy=None,
+    verbose: bool = True,
+    incremental: bool = True,
+) -> dict:
+    """
+    Crawls the seed URLs and the pages they link to with a bounded number of
+    concurrent fetches over a single shared AsyncWebCrawler.
+
+    Args:
+        seed_urls (list[str]): URLs to start from (depth 0).
+        output_directory (str): Directory where the markdown files are saved.
+        concurrency (int): Number of pages fetched at the same time.
+        max_depth (int): How many link hops to follow from the seeds. 0 crawls only the seeds.
+        host_delay (float): Minimum seconds between two requests to the same host.
+        same_domain_only (bool): Only follow links that stay on a seed's host.
+        crawler_strategy: Optional crawl4ai strategy passed to AsyncWebCrawler
+                          (e.g. AsyncHTTPCrawlerStrategy for browser-less fetching).
+        verbose (bool): Let crawl4ai log every fetch.
+        incremental (bool): Use the manifest in the output directory to send conditional
+                            requests and only rewrite pages whose normalized markdown changed.
+                            Every fetched page is rewritten when False.
+
+    Returns:
+        dict: Counts of crawled, saved, unchanged and failed pages plus elapsed seconds.
+              Names of the files written in this run are added to changed_files.txt
+              in the output directory (see changed_files.py).
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    allowed_hosts = {urlparse(normalize_url(u)).netloc for u in seed_urls}
+    rate_limiter = HostRateLimiter(host_delay)
+    frontier: asyncio.Queue = asyncio.Queue()
+    seen: set[str] = set()
+    stats = {"crawled": 0, "saved": 0, "unchanged": 0, "not_modified": 0, "failed": 0, "empty": 0}
+    manifest_path = os.path.join(output_directory, MANIFEST_FILENAME)
+    manifest = load_manifest(manifest_path) if incremental else {}
+    changed_files: list[str] = []
+
+    def enqueue(url: str, depth: int) -> None:
+        url = normalize_url(url)
+        if urlparse(url).scheme not in ("http", "https", "file") or url in seen:
+            return
+        if same_domain_only and urlparse(url).netloc not in allowed_hosts:
+            return
+        seen.add(url)
+        frontier.put_nowait((url, depth))
+
+    for url in seed_urls:
+        enqueue(url, 0)
+
+    async def worker(crawler: AsyncWebCrawler) -> None:
+        while True:
+            url, depth = await frontier.get()
+            try:
+                entry = manifest.get(url)
+                filename = get_batch_filename_from_url(url)
+                filepath = os.path.join(output_directory, filename)
+                # Entries written under another naming scheme are crawled again into their new file.
+                on_disk = entry is not None and entry.get("filename") == filename and os.path.exists(filepath)
+
+                await rate_limiter.wait(url)
+                if on_disk and await asyncio.to_thread(_is_not_modified, url, entry):
+                    stats["not_modified"] += 1
+                    if depth < max_depth:
+                        for href in entry.get("links", []):
+                            enqueue(href, depth + 1)
+                    continue
+
+                result = await crawler.arun(url=url, config=run_config)
+                stats["crawled"] += 1
+
+                if not result.success:
+                    stats["failed"] += 1
+                    print(f"Crawl failed for {url}: {result.error_message}")
+                    continue
+
+                links = [urljoin(url, link["href"]) for link in (result.links or {}).get("internal", []) if link.get("href")]
+                markdown_content = extract_markdown(result)
+                if markdown_content:
+                    digest = content_hash(markdown_content)
+                    if on_disk and entry.get("content_hash") == digest:
+                        stats["unchanged"] += 1
+                    else:
+                        await asyncio.to_thread(_write_file, filepath, markdown_content)
+                        changed_files.append(filename)
+                        stats["saved"] += 1
+                    manifest[url] = {
+                        "filename": filename,
+                        "content_hash": digest,
+                        "etag": _get_header(result.response_headers, "etag"),
+                        "last_modified": _get_header(result.response_headers, "last-modified"),
+                        "links": links,
+                    }
+                else:
+                    stats["empty"] += 1
+
+                if depth < max_depth:
+                    for href in links:
+                        enqueue(href, depth + 1)
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"Error while crawling {url}: {e}")
+            finally:
+                frontier.task_done()
+
+    run_config = CrawlerRunConfig(verbose=verbose)
+    start = time.perf_counter()
+    async with AsyncWebCrawler(crawler_strategy=crawler_strategy, config=BrowserConfig(verbose=verbose)) as crawler:
+        workers = [asyncio.create_task(worker(crawler)) for _ in range(max(1, concurrency))]
+        await frontier.join()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    save_manifest(manifest_path, manifest)
+    add_to_changed_list(os.path.join(output_directory, CHANGED_FILES_FILENAME), changed_files)
+
+    stats["elapsed_seconds"] = time.perf_counter() - start
+    stats["pages_per_second"] = stats["crawled"] / stats["elapsed_seconds"] if stats["elapsed_seconds"] else 0.0
+    return stats
+
 async def main():
 
     async with AsyncWebCrawler() as crawler:
@@ -64,44 +362,62 @@ async def main():
 
             result = await crawler.arun(url=target_url)
 
+            markdown_content = extract_markdown(result)
+            if markdown_content:
+                output_filename = get_simple_filename_from_url(target_url)
+                os.makedirs(OUTPUT_DIRECTORY, exist_ok=True)
+                filepath = os.path.join(OUTPUT_DIRECTORY, output_filename)
 
-            if result.success and result.markdown:
-                markdown_content = None
-                
+                try:
+                    with open(filepath, "w", encoding="utf-8") as f:
+                        f.write(markdown_content)
+                    print(f"Markdown content successfully saved to: {filepath}")
+                except IOError as e:
 
-                if hasattr(result.markdown, 'raw_markdown') and result.markdown.raw_markdown:
-                    markdown_content = result.markdown.raw_markdown
-                elif isinstance(result.markdown, str) and result.markdown.strip():
-                    markdown_content = result.markdown
-                
-               
-                if markdown_content:
-                    
-                    output_filename = get_simple_filename_from_url(target_url)
-                    
-                   
-                    output_directory = "scraped_pages"
-                  
-                    os.makedirs(output_directory, exist_ok=True)
-
-                    
-                    filepath = os.path.join(output_directory, output_filename)
-
-
-                    try:
-                        with open(filepath, "w", encoding="utf-8") as f:
-                            f.write(markdown_content)
-                        print(f"Markdown content successfully saved to: {filepath}")
-                    except IOError as e:
-
-                        print(f"Error saving markdown to file: {e}")
-                else:
-                    print(f"No valid markdown content found for {target_url}.")
+                    print(f"Error saving markdown to file: {e}")
+            elif result.success:
+                print(f"No valid markdown content found for {target_url}.")
             else:
 
                 print(f"Crawl failed for {target_url}.")
                 if result and result.error_message: 
                     print(f"Error: {result.error_message}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape web pages to markdown. Runs interactively unless seeds are given.")
+    parser.add_argument("--seeds", help="Text file with one seed URL per line (enables batch mode).")
+    parser.add_argument("--sitemap", help="Sitemap URL or local path whose <loc> entries are used as seeds (enables batch mode).")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Pages fetched at the same time.")
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH, help="Link hops to follow from the seeds.")
+    parser.add_argument("--host-delay", type=float, default=DEFAULT_HOST_DELAY, help="Minimum seconds between requests to one host.")
+    parser.add_argument("--output", default=OUTPUT_DIRECTORY, help="Directory for the markdown files.")
+    parser.add_argument("--full", action="store_true", help="Ignore the crawl manifest and rewrite every fetched page.")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    if args.seeds or args.sitemap:
+        seeds = []
+        if args.seeds:
+            seeds.extend(load_seed_file(args.seeds))
+        if args.sitemap:
+            seeds.extend(load_sitemap(args.sitemap))
+        print(f"Batch crawling {len(seeds)} seed URLs (concurrency={args.concurrency}, max depth={args.max_depth})...")
+        stats = asyncio.run(batch_crawl(
+            seeds,
+            output_directory=args.output,
+            concurrency=args.concurrency,
+            max_depth=args.max_depth,
+            host_delay=args.host_delay,
+            incremental=not args.full,
+        ))
+        print("\n--- Batch Crawl Complete ---")
+        print(f"Pages crawled: {stats['crawled']}")
+        print(f"Pages saved: {stats['saved']}")
+        print(f"Pages unchanged: {stats['unchanged']} (plus {stats['not_modified']} answered 304 Not Modified)")
+        print(f"Pages without markdown: {stats['empty']}")
+        print(f"Pages failed: {stats['failed']}")
+        print(f"Elapsed: {stats['elapsed_seconds']:.1f}s ({stats['pages_per_second']:.1f} pages/s)")
+        print(f"Changed files listed in: {os.path.join(args.output, CHANGED_FILES_FILENAME)}")
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,354 @@
+"""
+Translates generated MERGE scripts into a few parameterized UNWIND batches.
+
+Every generated statement inlines its values, so Neo4j parses and plans each one
+separately. This module parses the statements the prompt produces (node MERGEs with
+literal property maps, SETs of literal values and single- or multi-hop relationship
+MERGEs between such nodes) into rows grouped by (label, merge keys) and by
+(relationship type, endpoint labels and keys). Each group is loaded with one cached
+statement, e.g.
+
+    UNWIND $rows AS row
+    MERGE (n:Spacecraft {name: row.k[0]})
+    SET n += row.p
+
+Statements it cannot parse are kept as raw statements (re-bound with
+cypher_script.bind_statements) and run after the batches, when every node they can
+refer to exists. A relationship MERGE is loaded as a MERGE of its endpoint nodes
+followed by a MERGE of the relationship, which is what the prompt intends.
+"""
+import re
+from cypher_script import TOKEN_RE, bind_statements, pattern_variables, quote_identifier, split_statements
+
+DEFAULT_BULK_BATCH_SIZE = 1000
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+class UnsupportedStatement(Exception):
+    pass
+
+def _decode_string(token):
+    return re.sub(
+        r"\\(u[0-9a-fA-F]{4}|.)",
+        lambda m: chr(int(m.group(1)[1:], 16)) if m.group(1)[0] == "u" and len(m.group(1)) == 5
+        else _ESCAPES.get(m.group(1), m.group(1)),
+        token[1:-1],
+    )
+
+def _name(token):
+    return token[1:-1].replace("``", "`") if token.startswith("`") else token
+
+class _Parser:
+    """
+    A recursive-descent parser for the subset of Cypher the extraction prompt produces.
+    Raises UnsupportedStatement on anything else.
+    """
+    def __init__(self, statement):
+        self.tokens = [t for t in TOKEN_RE.findall(statement) if not t.isspace() and not t.startswith("//")]
+        self.pos = 0
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else ""
+
+    def take(self, expected=None):
+        token = self.peek()
+        if expected is not None and token.upper() != expected.upper():
+            raise UnsupportedStatement(f"expected {expected!r}, got {token!r}")
+        if not token:
+            raise UnsupportedStatement("unexpected end of statement")
+        self.pos += 1
+        return token
+
+    def identifier(self):
+        token = self.take()
+        if not (token[0].isalpha() or token[0] in "_`"):
+            raise UnsupportedStatement(f"expected a name, got {token!r}")
+        return _name(token)
+
+    def literal(self):
+        token = self.take()
+        if token[0] in "'\"":
+            return _decode_string(token)
+        if token == "-" and self.peek()[:1].isdigit():
+            return -self._number(self.take())
+        if token[0].isdigit():
+            return self._number(token)
+        if token.lower() in ("true", "false"):
+            return token.lower() == "true"
+        if token.lower() == "null":
+            return None
+        if token == "[":
+            values = []
+            while self.peek() != "]":
+                values.append(self.literal())
+                if self.peek() == ",":
+                    self.take()
+            self.take("]")
+            return values
+        raise UnsupportedStatement(f"expected a literal, got {token!r}")
+
+    @staticmethod
+    def _number(token):
+        return float(token) if any(c in token for c in ".eE") else int(token)
+
+    def literal_map(self):
+        self.take("{")
+        values = {}
+        while self.peek() != "}":
+            key = self.identifier()
+            self.take(":")
+            values[key] = self.literal()
+            if self.peek() == ",":
+                self.take()
+        self.take("}")
+        return values
+
+    def node(self):
+        """
+        Parses (var:Label {map}) into (var or None, label or None, map or None).
+        """
+        self.take("(")
+        var = label = props = None
+        if self.peek() not in (":", ")", "{"):
+            var = self.identifier()
+        if self.peek() == ":":
+            self.take()
+            label = self.identifier()
+            if self.peek() == ":":
+                raise UnsupportedStatement("multiple labels")
+        if self.peek() == "{":
+            props = self.literal_map()
+        self.take(")")
+        return var, label, props
+
+    def relationship(self):
+        """
+        Parses -[var:TYPE {map}]-> or <-[...]- into (var, type, map, points_right).
+        """
+        points_left = False
+        token = self.take()
+        if token == "<":
+            points_left = True
+            self.take("-")
+        elif token != "-":
+            raise UnsupportedStatement(f"expected a relationship, got {token!r}")
+        self.take("[")
+        var = props = None
+        if self.peek() != ":":
+            var = self.identifier()
+        self.take(":")
+        rel_type = self.identifier()
+        if self.peek() == "{":
+            props = self.literal_map()
+        self.take("]")
+        self.take("-")
+        if self.peek() == ">":
+            if points_left:
+                raise UnsupportedStatement("relationship with two directions")
+            self.take()
+            return var, rel_type, props, True
+        if not points_left:
+            raise UnsupportedStatement("undirected relationship")
+        return var, rel_type, props, False
+
+def node_identity(label, props):
+    if not label or not props or any(value is None for value in props.values()):
+        raise UnsupportedStatement("node without a label and a non-null property map")
+    keys = tuple(sorted(props))
+    return label, keys, tuple(_hashable(props[key]) for key in keys)
+
+def _hashable(value):
+    return tuple(value) if isinstance(value, list) else value
+
+class BulkLoad:
+    """
+    Nodes and relationships collected from scripts (or graph records), deduplicated by
+    identity, plus the statements that could not be translated.
+
+    Nodes are keyed by (label, merge keys, merge values) and relationships by
+    (type, start node, end node, merge keys, merge values); properties set on the same
+    node or relationship in several places are combined, later values winning, as they
+    would be if the scripts ran one after the other.
+    """
+    def __init__(self):
+        self.nodes = {}
+        self.relationships = {}
+        self.raw_statements = []
+        self.stats = {"statements": 0, "translated": 0, "raw": 0}
+
+    def add_script(self, cypher_script):
+        statements = split_statements(cypher_script)
+        bound = None
+        variables = {}
+        for index, statement in enumerate(statements):
+            self.stats["statements"] += 1
+            try:
+                operations, variables = self._parse(statement, variables)
+            except UnsupportedStatement:
+                if bound is None:
+                    bound = bind_statements(statements)
+                self.raw_statements.append(bound[index])
+                self.stats["raw"] += 1
+                for var in pattern_variables(statement):
+                    variables.pop(var, None)
+                continue
+            self._apply(operations)
+            self.stats["translated"] += 1
+
+    def add_records(self, records):
+        """
+        Adds graph records in the format of graph_records.py (nodes keyed on name).
+        """
+        for record in records:
+            if "type" in record:
+                start = (record["start"][0], ("name",), (record["start"][1],))
+                end = (record["end"][0], ("name",), (record["end"][1],))
+                for identity in (start, end):
+                    self.nodes.setdefault(identity, {})
+                self.relationships.setdefault((record["type"], start, end, (), ()), {})
+            else:
+                identity = (record["label"], ("name",), (record["name"],))
+                self.nodes.setdefault(identity, {}).update(record.get("properties", {}))
+
+    def _parse(self, statement, variables):
+        """
+        Parses one statement into a list of operations, ('node', identity), ('rel', key)
+        and ('set', (kind, identity or key), properties), without changing any state.
+        Returns (operations, variables bound after the statement).
+        """
+        parser = _Parser(statement)
+        local = dict(variables)
+        operations = []
+
+        def resolve(var, label, props):
+            if label is None and props is None:
+                if var not in local or local[var][0] != "node":
+                    raise UnsupportedStatement(f"unbound variable {var!r}")
+                return local[var][1]
+            identity = node_identity(label, props)
+            operations.append(("node", identity))
+            if var:
+                local[var] = ("node", identity)
+            return identity
+
+        if not parser.peek():
+            raise UnsupportedStatement("empty statement")
+        while parser.peek():
+            clause = parser.take().upper()
+            if clause == "MERGE":
+                left = resolve(*parser.node())
+                while parser.peek() in ("-", "<"):
+                    rel_var, rel_type, rel_props, points_right = parser.relationship()
+                    right = resolve(*parser.node())
+                    start, end = (left, right) if points_right else (right, left)
+                    rel_props = rel_props or {}
+                    keys = tuple(sorted(rel_props))
+                    key = (rel_type, start, end, keys, tuple(_hashable(rel_props[k]) for k in keys))
+                    operations.append(("rel", key))
+                    if rel_var:
+                        local[rel_var] = ("rel", key)
+                    left = right
+            elif clause == "SET":
+                while True:
+                    var = parser.identifier()
+                    if var not in local:
+                        raise UnsupportedStatement(f"SET on unbound variable {var!r}")
+                    if parser.peek() == ".":
+                        parser.take()
+                        prop = parser.identifier()
+                        parser.take("=")
+                        operations.append(("set", local[var], {prop: parser.literal()}))
+                    elif parser.peek() == "+":
+                        parser.take()
+                        parser.take("=")
+                        operations.append(("set", local[var], parser.literal_map()))
+                    else:
+                        raise UnsupportedStatement("unsupported SET item")
+                    if parser.peek() != ",":
+                        break
+                    parser.take()
+            else:
+                raise UnsupportedStatement(f"unsupported clause {clause!r}")
+        return operations, local
+
+    def _apply(self, operations):
+        for operation in operations:
+            if operation[0] == "node":
+                self.nodes.setdefault(operation[1], {})
+            elif operation[0] == "rel":
+                self.relationships.setdefault(operation[1], {})
+            else:
+                kind, identity = operation[1]
+                target = self.nodes if kind == "node" else self.relationships
+                target.setdefault(identity, {}).update(operation[2])
+
+    def batches(self, batch_size=DEFAULT_BULK_BATCH_SIZE):
+        """
+        Returns the load as (query, rows) pairs: all node batches first, then all
+        relationship batches, so every relationship finds its endpoints.
+        """
+        node_groups = {}
+        for (label, keys, values), props in self.nodes.items():
+            node_groups.setdefault((label, keys), []).append({"k": _row_values(values), "p": props})
+        rel_groups = {}
+        for (rel_type, start, end, keys, values), props in self.relationships.items():
+            group = (rel_type, start[:2], end[:2], keys)
+            rel_groups.setdefault(group, []).append(
+                {"a": _row_values(start[2]), "b": _row_values(end[2]), "k": _row_values(values), "p": props}
+            )
+
+        result = []
+        for (label, keys), rows in node_groups.items():
+            query = f"UNWIND $rows AS row\nMERGE (n:{quote_identifier(label)} {_row_map(keys, 'row.k')})\nSET n += row.p"
+            result.extend((query, rows[i:i + batch_size]) for i in range(0, len(rows), batch_size))
+        for (rel_type, (start_label, start_keys), (end_label, end_keys), keys), rows in rel_groups.items():
+            query = (
+                "UNWIND $rows AS row\n"
+                f"MATCH (a:{quote_identifier(start_label)} {_row_map(start_keys, 'row.a')})\n"
+                f"MATCH (b:{quote_identifier(end_label)} {_row_map(end_keys, 'row.b')})\n"
+                f"MERGE (a)-[r:{quote_identifier(rel_type)}{' ' + _row_map(keys, 'row.k') if keys else ''}]->(b)\n"
+                "SET r += row.p"
+            )
+            result.extend((query, rows[i:i + batch_size]) for i in range(0, len(rows), batch_size))
+        return result
+
+def parse_map(text):
+    """
+    Parses a literal property map such as "{name: 'INSAT-3D', level: 3}" into a dict.
+    Raises UnsupportedStatement if it contains anything but literals.
+    """
+    parser = _Parser(text)
+    values = parser.literal_map()
+    if parser.peek():
+        raise UnsupportedStatement("text after the map")
+    return values
+
+def format_literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(format_literal(item) for item in value) + "]"
+    return repr(value)
+
+def format_map(props):
+    return "{" + ", ".join(f"{quote_identifier(key)}: {format_literal(value)}" for key, value in props.items()) + "}"
+
+def _row_values(values):
+    return [list(value) if isinstance(value, tuple) else value for value in values]
+
+def _row_map(keys, source):
+    return "{" + ", ".join(f"{quote_identifier(key)}: {source}[{i}]" for i, key in enumerate(keys)) + "}"
+
+def translate_scripts(scripts):
+    """
+    Builds a BulkLoad from Cypher scripts.
+    """
+    load = BulkLoad()
+    for cypher_script in scripts:
+        load.add_script(cypher_script)
+    return load
@@ -0,0 +1,164 @@
+"""
+Checks LLM-generated Cypher before it runs, so one bad statement cannot pin the database.
+
+CypherGuard.check() first rewrites the statement's text:
+  - variable-length relationships without an upper bound ([:R*], [:R*2..]) get one of
+    max_hops hops;
+  - a statement that returns rows without a LIMIT gets LIMIT auto_limit.
+It then rejects, by raising UnsafeCypher with the name of the guard that fired,
+  - statements with write clauses (CREATE, MERGE, SET, DELETE, ...);
+  - on a Neo4jGraph, statements whose EXPLAIN plan contains a cartesian product, a scan of
+    all nodes or an unbounded expansion, is not read-only, or that do not compile.
+Other GraphStores (the offline fakes) have no EXPLAIN, so only the text checks run there.
+
+Statements that pass are run read-only under a transaction timeout (result_context.py).
+stats counts how often each guard fires, so they can be watched and tuned.
+"""
+import re
+import threading
+from neo4j import READ_ACCESS, Query
+from neo4j.exceptions import ClientError
+
+DEFAULT_AUTO_LIMIT = 1000
+DEFAULT_MAX_HOPS = 5
+DEFAULT_TIMEOUT_SECONDS = 10.0
+
+# Clauses that change the graph. Procedures that write are caught by EXPLAIN's query type
+# and, failing that, by running read-only.
+WRITE_CLAUSE_RE = re.compile(
+    r"(?<![.\w$])(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|FOREACH|LOAD\s+CSV|IN\s+TRANSACTIONS)(?![\w])", re.I
+)
+# A keyword preceded by one of these, or followed by ':', is a name: a label or relationship
+# type (n:Create), an alias (AS set) or a map key ({set: 1}).
+_NAME_BEFORE_RE = re.compile(r"(?::|\bAS)\s*$", re.I)
+_NAME_AFTER_RE = re.compile(r"\s*:")
+REJECTED_OPERATORS = {"CartesianProduct": "cartesian_product", "AllNodesScan": "all_nodes_scan"}
+_LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`(?:[^`]|``)*`|//[^\n]*")
+_VAR_LENGTH_RE = re.compile(r"(-\[[^\[\]]*?)\*\s*(\d*)\s*(\.\.)?\s*(\d*)(?=[^\[\]]*\])")
+_UNBOUNDED_DETAILS_RE = re.compile(r"\*\s*\d*\s*\.\.\s*[\]\s{]|\*\s*\]")
+_LIMIT_AT_END_RE = re.compile(r"\bLIMIT\s+\S+\s*$", re.I)
+_TRAILING_SEMICOLON_RE = re.compile(r"\s*;\s*$")
+
+class UnsafeCypher(Exception):
+    """
+    Raised by CypherGuard.check; guard names the check that rejected the statement.
+    """
+    def __init__(self, guard, message):
+        super().__init__(message)
+        self.guard = guard
+
+def _mask_literals(cypher):
+    """
+    Returns cypher with the contents of strings and quoted names, and whole comments,
+    blanked out, so that keyword searches only see Cypher syntax. Offsets are unchanged.
+    """
+    def blank(match):
+        text = match.group(0)
+        return " " * len(text) if text.startswith("//") else text[0] + " " * (len(text) - 1)
+    return _LITERAL_RE.sub(blank, cypher)
+
+def write_clause(cypher):
+    """
+    Returns the first write clause keyword in cypher, or None. Labels, relationship types,
+    aliases, map keys and properties that happen to be spelled like one are ignored.
+    """
+    masked = _mask_literals(cypher)
+    for match in WRITE_CLAUSE_RE.finditer(masked):
+        if _NAME_BEFORE_RE.search(masked, 0, match.start()) or _NAME_AFTER_RE.match(masked, match.end()):
+            continue
+        return match.group(1).upper()
+    return None
+
+def bound_cypher(cypher, auto_limit=DEFAULT_AUTO_LIMIT, max_hops=DEFAULT_MAX_HOPS):
+    """
+    Applies the text rewrites of the module docstring.
+    Returns (query to run, query to count its rows by, names of the rewrites applied);
+    the count query is the statement before its LIMIT was added.
+    """
+    cypher = _TRAILING_SEMICOLON_RE.sub("", cypher.strip())
+    rewrites = []
+    masked = _mask_literals(cypher)
+    for match in reversed(list(_VAR_LENGTH_RE.finditer(masked))):
+        low, dots, high = match.group(2), match.group(3), match.group(4)
+        if high or (low and not dots):
+            continue
+        star = match.start() + len(match.group(1))
+        cypher = f"{cypher[:star]}*{low or 1}..{max(max_hops, int(low or 1))}{cypher[match.end():]}"
+        rewrites.append("bounded_expansion")
+    masked = _mask_literals(cypher)
+    count_query = cypher
+    if re.search(r"\bRETURN\b", masked, re.I) and not re.search(r"\bUNION\b", masked, re.I) \
+            and not _LIMIT_AT_END_RE.search(masked):
+        cypher = f"{cypher}\nLIMIT {auto_limit}"
+        rewrites.append("limit_injected")
+    return cypher, count_query, rewrites
+
+def _operators(plan):
+    yield plan
+    for child in plan.get("children", []):
+        yield from _operators(child)
+
+class CypherGuard:
+    """
+    Validates and bounds Cypher for graph (see module docstring). Thread-safe.
+    """
+    def __init__(self, graph, auto_limit=DEFAULT_AUTO_LIMIT, max_hops=DEFAULT_MAX_HOPS,
+                 timeout_seconds=DEFAULT_TIMEOUT_SECONDS):
+        self.graph = graph
+        self.auto_limit = auto_limit
+        self.max_hops = max_hops
+        self.timeout_seconds = timeout_seconds
+        self._lock = threading.Lock()
+        self.stats = {
+            "checked": 0, "passed": 0, "rejected": 0, "bounded_expansion": 0, "limit_injected": 0,
+            "write": 0, "invalid": 0, "cartesian_product": 0, "all_nodes_scan": 0, "unbounded_expansion": 0,
+            "repairs": 0, "repaired": 0, "timeouts": 0,
+        }
+
+    def count(self, *names):
+        with self._lock:
+            for name in names:
+                self.stats[name] += 1
+
+    def check(self, cypher, explain=True):
+        """
+        Returns {"query": ..., "count_query": ..., "rewrites": [...]} for cypher, or raises
+        UnsafeCypher. explain=False skips the EXPLAIN round trip, for statements whose shape
+        has been checked before (plans from the plan cache).
+        """
+        query, count_query, rewrites = bound_cypher(cypher, self.auto_limit, self.max_hops)
+        self.count("checked")
+        try:
+            write = write_clause(query)
+            if write:
+                raise UnsafeCypher("write", f"The statement writes to the graph ({write}).")
+            if explain and getattr(self.graph, "_driver", None) is not None:
+                self._check_plan(query)
+        except UnsafeCypher as e:
+            self.count("rejected", e.guard)
+            raise
+        self.count("passed", *rewrites)
+        return {"query": query, "count_query": count_query, "rewrites": rewrites}
+
+    def _check_plan(self, query):
+        try:
+            with self.graph._driver.session(database=getattr(self.graph, "_database", None),
+                                            default_access_mode=READ_ACCESS) as session:
+                summary = session.run(Query(f"EXPLAIN {query}", timeout=self.timeout_seconds)).consume()
+        except ClientError as e:
+            if self.is_timeout(e):
+                raise
+            raise UnsafeCypher("invalid", f"The statement does not compile: {e.message}") from e
+        if summary.query_type not in (None, "r"):
+            raise UnsafeCypher("write", f"The statement is not read-only (query type '{summary.query_type}').")
+        for operator in _operators(summary.plan or {}):
+            name = operator.get("operatorType", "").split("@")[0]
+            if name in REJECTED_OPERATORS:
+                raise UnsafeCypher(REJECTED_OPERATORS[name], f"The plan contains {name}.")
+            details = str(operator.get("args", {}).get("Details", ""))
+            if ("VarLengthExpand" in name or "ShortestPath" in name) and _UNBOUNDED_DETAILS_RE.search(details):
+                raise UnsafeCypher("unbounded_expansion", f"The plan contains an unbounded {name}.")
+
+    @staticmethod
+    def is_timeout(error):
+        return isinstance(error, ClientError) and "TimedOut" in (error.code or "")
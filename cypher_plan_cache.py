@@ -0,0 +1,189 @@
+"""
+A semantic cache of generated Cypher, so paraphrased questions skip the Cypher LLM.
+
+Questions are first templated: every mention of a known entity name is replaced by a
+slot for its label ("what is the launch mass of INSAT-3D?" becomes "what is the launch
+mass of <spacecraft>"), and the string literals of the generated Cypher that name those
+entities become slots as well. Templates are embedded offline with hashed content-word
+and character n-grams (no model, no network) into L2-normalized NumPy vectors, so a
+nearest-neighbour lookup is one matrix-vector product. A cached plan is reused when its
+template is at least `threshold` cosine-similar and has the same slot labels in the same
+order; the new question's entity names are substituted into the cached Cypher.
+
+Hashed n-grams only see surface wording: they match reorderings, filler words ("tell
+me", "what was") and small edits, not synonyms ("how heavy" for "mass"). The threshold is therefore
+kept high, because a wrong plan returns a confidently wrong answer.
+"""
+import re
+import threading
+import zlib
+import numpy as np
+from gazetteer import WORD_RE as _WORD_RE, Gazetteer, fold as _fold
+
+DEFAULT_DIMENSIONS = 2048
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_MAX_PLANS = 2000
+
+# Words that carry no meaning for the Cypher to run. Interrogatives that change the
+# query's shape ("how many", "when", "where") are kept.
+STOPWORDS = set(
+    "a an the of for to in on at by with is are was were be been what what's whats which who "
+    "whom tell me give show list please do does did i you about and or from its it this that there".split()
+)
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+
+def _literal_value(literal):
+    return re.sub(r"\\(.)", r"\1", literal[1:-1])
+
+def _slot_marker(index):
+    return f"\x00slot{index}\x00"
+
+def _cypher_string(value):
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+def load_entity_names(graph, limit=100000):
+    """
+    Reads (name, label) pairs for every named node from a Neo4jGraph.
+    """
+    rows = graph.query(
+        "MATCH (n) WHERE n.name IS NOT NULL AND size(labels(n)) > 0 "
+        "RETURN n.name AS name, labels(n)[0] AS label LIMIT $limit",
+        {"limit": limit},
+    )
+    return [(row["name"], row["label"]) for row in rows if isinstance(row["name"], str)]
+
+def template_question(question, mentions):
+    """
+    Replaces entity mentions by <label> slots and normalizes case and spacing.
+    Returns (template, [(name, label)] in order of appearance).
+    """
+    parts, slots, position = [], [], 0
+    for start, end, name, label in mentions:
+        parts.append(question[position:start])
+        parts.append(f" <{re.sub(r'[^a-z_]', '_', label.lower())}> ")
+        slots.append((name, label))
+        position = end
+    parts.append(question[position:])
+    words = _WORD_RE.findall(_fold(''.join(parts)))
+    return ' '.join(words), slots
+
+def _stem(word):
+    if word.endswith('sses'):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+def embed(text, dimensions=DEFAULT_DIMENSIONS):
+    """
+    Embeds a question template as a signed, hashed bag of features, L2-normalized:
+    content words (stop words dropped, plurals stemmed), content-word bigrams at half
+    weight and character 3- and 4-grams of each word at a quarter, which absorb small
+    spelling differences. Deterministic across processes and platforms.
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    words = [word if word.startswith('<') else _stem(word) for word in text.split() if word not in STOPWORDS]
+    features = [(f"w:{word}", 1.0) for word in words]
+    features += [(f"b:{a} {b}", 0.5) for a, b in zip(words, words[1:])]
+    for word in words:
+        if not word.startswith('<'):
+            padded = f" {word} "
+            for n in (3, 4):
+                features += [(f"c:{padded[i:i + n]}", 0.25) for i in range(len(padded) - n + 1)]
+    for feature, weight in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dimensions] += weight if h & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class CypherPlanCache:
+    """
+    Nearest-neighbour cache of validated question -> Cypher pairs (see module docstring).
+
+    add() should only be called with Cypher that ran and returned rows. lookup() returns
+    (cypher, similarity) or None. stats counts lookups, hits, misses, plans stored and
+    the Cypher LLM seconds saved (hits times the mean measured generation time).
+    """
+    def __init__(self, threshold=DEFAULT_THRESHOLD, dimensions=DEFAULT_DIMENSIONS, max_plans=DEFAULT_MAX_PLANS):
+        self.threshold = threshold
+        self.dimensions = dimensions
+        self.max_plans = max_plans
+        self.matcher = Gazetteer([])
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "plans": 0, "generations": 0,
+                      "generation_seconds": 0.0, "saved_seconds": 0.0}
+        self._vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self._plans = []
+        self._keys = set()
+        self._lock = threading.Lock()
+
+    def set_entity_names(self, names):
+        self.matcher = Gazetteer(names)
+
+    def record_generation(self, seconds):
+        """
+        Records how long one Cypher LLM call took, for the saved-latency estimate.
+        """
+        with self._lock:
+            self.stats["generations"] += 1
+            self.stats["generation_seconds"] += seconds
+
+    def lookup(self, question):
+        template, slots = template_question(question, self.matcher.find(question))
+        labels = tuple(label for _, label in slots)
+        with self._lock:
+            self.stats["lookups"] += 1
+            if self._plans:
+                scores = self._vectors @ embed(template, self.dimensions)
+                for index in np.argsort(-scores)[:8]:
+                    if scores[index] < self.threshold:
+                        break
+                    plan_labels, cypher_template, _ = self._plans[index]
+                    if plan_labels == labels:
+                        self.stats["hits"] += 1
+                        if self.stats["generations"]:
+                            self.stats["saved_seconds"] += self.stats["generation_seconds"] / self.stats["generations"]
+                        cypher = cypher_template
+                        for i, (name, _) in enumerate(slots):
+                            cypher = cypher.replace(_slot_marker(i), _cypher_string(name))
+                        return cypher, min(float(scores[index]), 1.0)
+            self.stats["misses"] += 1
+            return None
+
+    def add(self, question, cypher):
+        """
+        Stores a validated plan. Literals in the Cypher that equal an entity named in the
+        question become slots. Returns False if the plan was not stored (already known,
+        or not every entity of the question appears in it as a literal).
+        """
+        template, slots = template_question(question, self.matcher.find(question))
+        slot_of = {}
+        for i, (name, _) in enumerate(slots):
+            slot_of.setdefault(_fold(name), i)
+
+        def replace(match):
+            slot = slot_of.get(_fold(_literal_value(match.group(0))))
+            return match.group(0) if slot is None else _slot_marker(slot)
+
+        labels = tuple(label for _, label in slots)
+        cypher_template = _STRING_LITERAL_RE.sub(replace, cypher)
+        if any(_slot_marker(i) not in cypher_template for i in range(len(slots))):
+            # The Cypher does not quote every entity of the question verbatim (the LLM
+            # respelled one, or answered with a hard-coded value); reusing it for other
+            # entities would be wrong.
+            return False
+        key = (template, labels, cypher_template)
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            self._vectors = np.vstack([self._vectors, embed(template, self.dimensions)[None, :]])
+            self._plans.append((labels, cypher_template, key))
+            if len(self._plans) > self.max_plans:
+                self._vectors = self._vectors[1:]
+                self._keys.discard(self._plans.pop(0)[2])
+            self.stats["plans"] = len(self._plans)
+            return True
+
+    def hit_rate(self):
+        return self.stats["hits"] / self.stats["lookups"] if self.stats["lookups"] else 0.0
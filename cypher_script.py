@@ -0,0 +1,287 @@
+import re
+
+# Tokens of a generated Cypher script: string literals, comments, identifiers and single characters.
+# String literals and comments are matched first so that nothing inside them is ever rewritten.
+TOKEN_RE = re.compile(
+    r"'(?:[^'\\]|\\.)*'"
+    r'|"(?:[^"\\]|\\.)*"'
+    r"|`[^`]*`"
+    r"|//[^\n]*"
+    r"|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?"
+    r"|[A-Za-z_][A-Za-z0-9_]*"
+    r"|\s+"
+    r"|.",
+    re.S,
+)
+
+# A labelled node pattern with an optional inline property map, e.g. (s:Spacecraft {name: 'INSAT-3D'}).
+_NODE_PATTERN = (
+    r"\(\s*(?P<var>[A-Za-z_][A-Za-z0-9_]*)\s*:\s*(?P<label>`[^`]+`|[A-Za-z_][A-Za-z0-9_]*)\s*"
+    r"(?P<props>\{(?:'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|[^{}'\"])*\})?\s*\)"
+)
+NODE_PATTERN_RE = re.compile(_NODE_PATTERN, re.I)
+
+# A node MERGE, e.g. MERGE (s:Spacecraft {name: 'INSAT-3D'}).
+NODE_MERGE_RE = re.compile(r"MERGE\s*" + _NODE_PATTERN, re.I)
+
+def split_statements(script):
+    """
+    Splits a script on the ';' separators that are outside string literals and comments.
+    Returns the non-empty statements, stripped and without their trailing ';'.
+    """
+    statements = []
+    current = []
+    for token in TOKEN_RE.findall(script):
+        if token == ';':
+            statements.append(''.join(current))
+            current = []
+        else:
+            current.append(token)
+    statements.append(''.join(current))
+    return [statement.strip() for statement in statements if strip_comments(statement).strip()]
+
+def strip_comments(text):
+    return ''.join(token for token in TOKEN_RE.findall(text) if not token.startswith('//'))
+
+def normalize_statement(statement):
+    """
+    Collapses whitespace outside string literals, so formatting differences do not matter
+    when statements are compared.
+    """
+    tokens = [' ' if token.isspace() else token for token in TOKEN_RE.findall(strip_comments(statement))]
+    return ''.join(tokens).strip()
+
+def node_merges(statement):
+    """
+    Yields (variable, label, property map with whitespace removed) for each node MERGE with a label.
+    """
+    for match in NODE_MERGE_RE.finditer(statement):
+        props = ''.join(token for token in TOKEN_RE.findall(match.group('props') or '') if not token.isspace())
+        yield match.group('var'), match.group('label').strip('`'), props
+
+# Keywords that end the pattern of a MERGE clause.
+_CLAUSE_KEYWORDS = {'ON', 'MERGE', 'MATCH', 'OPTIONAL', 'CREATE', 'SET', 'WITH', 'RETURN', 'DELETE', 'DETACH',
+                    'REMOVE', 'UNWIND', 'FOREACH', 'CALL', 'WHERE'}
+
+def path_merges(statement):
+    """
+    Yields (label, property map with whitespace removed) for each labelled node pattern with
+    properties inside a MERGE of a path, e.g. Orbit in MERGE (s)-[:ORBITS_IN]->(o:Orbit {name: 'GEO'}).
+    Such a MERGE creates the whole path, including a second node with those properties,
+    when the path does not exist yet.
+    """
+    tokens = TOKEN_RE.findall(statement)
+    significant = _significant(tokens)
+    n = 0
+    while n < len(significant):
+        if tokens[significant[n]].upper() != 'MERGE':
+            n += 1
+            continue
+        start, depth, is_path = significant[n] + 1, 0, False
+        n += 1
+        while n < len(significant):
+            token = tokens[significant[n]]
+            if token in ('(', '[', '{'):
+                depth += 1
+            elif token in (')', ']', '}'):
+                depth -= 1
+            elif depth == 0 and token.upper() in _CLAUSE_KEYWORDS:
+                break
+            elif depth == 0 and token in ('-', '<', '>'):
+                is_path = True
+            n += 1
+        end = significant[n] if n < len(significant) else len(tokens)
+        if is_path:
+            for match in NODE_PATTERN_RE.finditer(''.join(tokens[start:end])):
+                if match.group('props'):
+                    props = ''.join(token for token in TOKEN_RE.findall(match.group('props')) if not token.isspace())
+                    yield match.group('label').strip('`'), props
+
+def map_keys(props):
+    """
+    Returns the top-level keys of a property map such as "{name: 'Imager', channels_count: 6}".
+    """
+    keys = []
+    depth = 0
+    previous = ''
+    tokens = [token for token in TOKEN_RE.findall(props) if not token.isspace()]
+    for i, token in enumerate(tokens):
+        if token in ('{', '['):
+            depth += 1
+        elif token in ('}', ']'):
+            depth -= 1
+        elif depth == 1 and previous in ('{', ',') and i + 1 < len(tokens) and tokens[i + 1] == ':':
+            keys.append(token.strip('`'))
+        previous = token
+    return keys
+
+def rename_variables(statement, mapping):
+    """
+    Renames variables in a statement. Identifiers used as labels or relationship types
+    (after ':'), property names (after '.', or keys in a property map) and anything inside
+    string literals are left alone.
+    """
+    if not mapping:
+        return statement
+    tokens = TOKEN_RE.findall(statement)
+    for i in _variable_positions(tokens):
+        if tokens[i] in mapping:
+            tokens[i] = mapping[tokens[i]]
+    return ''.join(tokens)
+
+def _variable_positions(tokens):
+    """
+    Yields the indexes of identifier tokens that can be variable references.
+    """
+    significant = _significant(tokens)
+    for n, i in enumerate(significant):
+        token = tokens[i]
+        if not (token[0].isalpha() or token[0] == '_'):
+            continue
+        previous = tokens[significant[n - 1]] if n > 0 else ''
+        following = tokens[significant[n + 1]] if n + 1 < len(significant) else ''
+        if previous in (':', '.'):
+            continue
+        if following == ':' and previous in ('{', ','):
+            continue
+        yield i
+
+def _significant(tokens):
+    return [i for i, token in enumerate(tokens) if not token.isspace() and not token.startswith('//')]
+
+def pattern_variables(statement):
+    """
+    Returns the variables bound in node and relationship patterns, in order of first use,
+    e.g. ['s', 'r', 'o'] for MERGE (s:Spacecraft)-[r:ORBITS_IN]->(o).
+    """
+    tokens = TOKEN_RE.findall(statement)
+    significant = _significant(tokens)
+    variables = []
+    for n in range(1, len(significant) - 1):
+        token = tokens[significant[n]]
+        if (
+            (token[0].isalpha() or token[0] == '_')
+            and tokens[significant[n - 1]] in ('(', '[')
+            and tokens[significant[n + 1]] in (':', ')', ']', '{')
+            and token not in variables
+        ):
+            variables.append(token)
+    return variables
+
+def drop_incomplete_statement(script):
+    """
+    Cuts a script after its last ';' outside string literals, dropping a trailing
+    statement that was truncated mid-way (e.g. when the LLM hit its output token limit).
+    """
+    offset = 0
+    last_end = 0
+    for token in TOKEN_RE.findall(script):
+        offset += len(token)
+        if token == ';':
+            last_end = offset
+    return script[:last_end].strip()
+
+def bind_statements(statements):
+    """
+    Makes statements of one script runnable on their own, in order.
+
+    A script like "MERGE (s:Spacecraft {name: 'INSAT-3D'}); MERGE (s)-[:ORBITS_IN]->(o:Orbit {name: 'GEO'});"
+    relies on `s` still being bound in the second statement, which is only true if the
+    whole script runs as one query. Run separately, `MERGE (s)-...` would create a new
+    anonymous node. Each statement that refers to a variable defined by a labelled node
+    pattern with properties in an earlier statement (and not bound in the statement itself) is prefixed
+    with a MATCH for that node.
+    """
+    definitions = {}
+    bound = []
+    for statement in statements:
+        tokens = TOKEN_RE.findall(statement)
+        local = set(pattern_variables(statement)) - _unlabelled_node_variables(tokens)
+        missing = []
+        for i in _variable_positions(tokens):
+            var = tokens[i]
+            if var in definitions and var not in local and var not in missing:
+                missing.append(var)
+        if missing:
+            patterns = ', '.join(f"({var}:{definitions[var][0]} {definitions[var][1]})" for var in missing)
+            bound.append(f"MATCH {patterns}\n{statement}")
+        else:
+            bound.append(statement)
+        for match in NODE_PATTERN_RE.finditer(statement):
+            if match.group('props'):
+                props = ''.join(token for token in TOKEN_RE.findall(match.group('props')) if not token.isspace())
+                definitions[match.group('var')] = (quote_identifier(match.group('label').strip('`')), props)
+    return bound
+
+def _unlabelled_node_variables(tokens):
+    """
+    Variables that appear in the statement only as bare node patterns like (s).
+    """
+    significant = _significant(tokens)
+    bare, labelled = set(), set()
+    for n in range(1, len(significant) - 1):
+        token = tokens[significant[n]]
+        if tokens[significant[n - 1]] != '(' or not (token[0].isalpha() or token[0] == '_'):
+            continue
+        if tokens[significant[n + 1]] == ')':
+            bare.add(token)
+        else:
+            labelled.add(token)
+    return bare - labelled
+
+def quote_identifier(name):
+    """
+    Backtick-quotes a label, relationship type or property name unless it is a plain identifier.
+    """
+    return name if re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', name) else "`" + name.replace("`", "``") + "`"
+
+def merge_scripts(scripts):
+    """
+    Merges Cypher scripts extracted from chunks of one document into one script.
+
+    Variables that MERGE the same node (same label and property map) in different scripts
+    are given the same name; other variables that would clash with a name already used
+    by an earlier script get a numeric suffix. Statements that are identical after this
+    renaming are emitted once.
+    """
+    if len(scripts) == 1:
+        return scripts[0]
+
+    canonical = {}
+    used = set()
+    seen = set()
+    merged = []
+    for index, script in enumerate(scripts, start=1):
+        statements = split_statements(script)
+        definitions = {}
+        for statement in statements:
+            for var, label, props in node_merges(statement):
+                if props:
+                    definitions.setdefault(var, (label, props))
+
+        mapping = {}
+        for statement in statements:
+            for var in pattern_variables(statement):
+                if var in mapping:
+                    continue
+                key = definitions.get(var)
+                if key in canonical:
+                    name = canonical[key]
+                else:
+                    name = var
+                    suffix = index
+                    while name in used:
+                        name = f"{var}_{suffix}"
+                        suffix += 1
+                    if key:
+                        canonical[key] = name
+                mapping[var] = name
+                used.add(name)
+
+        for statement in statements:
+            renamed = rename_variables(statement, {k: v for k, v in mapping.items() if k != v})
+            normalized = normalize_statement(renamed)
+            if normalized not in seen:
+                seen.add(normalized)
+                merged.append(renamed + ';')
+    return '\n\n'.join(merged)
@@ -0,0 +1,100 @@
+"""
+A gazetteer of the graph's entity names, for finding them in questions.
+
+Names are split into case-folded words and loaded into an Aho-Corasick automaton over
+words: a trie of the names with failure links, so one left-to-right pass over a question
+finds every occurrence of every name, however many names there are. Overlapping matches
+are resolved leftmost-longest ("INSAT-3D Imager" wins over "INSAT-3D" when both are names).
+"""
+import re
+from collections import deque
+
+MAX_ENTITY_WORDS = 8
+
+WORD_RE = re.compile(r"<[a-z_]+>|[^\W_]+(?:[-.'][^\W_]+)*", re.UNICODE)
+
+def fold(text):
+    return text.casefold()
+
+class Gazetteer:
+    """
+    Finds mentions of known entity names in a question, on whole words, ignoring case.
+    """
+    def __init__(self, names):
+        """
+        names is an iterable of (name, label) pairs, e.g. from load_entity_names(). A name
+        known under several labels keeps the first.
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._entry = [None]  # (name, label, word count) of the name ending at each state
+        self._longest = [0]   # word count of the longest name ending at each state or its suffixes
+        self.size = 0
+        for name, label in names:
+            words = [fold(word) for word in WORD_RE.findall(str(name))]
+            if words and len(words) <= MAX_ENTITY_WORDS:
+                self._insert(words, str(name), label)
+        self._link()
+
+    def __len__(self):
+        return self.size
+
+    def _insert(self, words, name, label):
+        state = 0
+        for word in words:
+            following = self._goto[state].get(word)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][word] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._entry.append(None)
+                self._longest.append(0)
+            state = following
+        if self._entry[state] is None:
+            self._entry[state] = (name, label, len(words))
+            self._longest[state] = len(words)
+            self.size += 1
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[following] = self._goto[fallback].get(word, 0)
+                self._longest[following] = max(self._longest[following], self._longest[self._fail[following]])
+
+    def _matches(self, words):
+        """
+        Yields (first word index, word count, name, label) for every name occurrence.
+        """
+        state = 0
+        for i, word in enumerate(words):
+            while state and word not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(word, 0)
+            output = state
+            while output and self._longest[output]:
+                entry = self._entry[output]
+                if entry:
+                    name, label, length = entry
+                    yield i - length + 1, length, name, label
+                output = self._fail[output]
+
+    def find(self, question):
+        """
+        Returns [(start, end, name, label)] for the entity mentions in question, as
+        character offsets, non-overlapping and leftmost-longest.
+        """
+        tokens = [(m.start(), m.end(), fold(m.group(0))) for m in WORD_RE.finditer(question)]
+        matches = sorted(self._matches([token[2] for token in tokens]), key=lambda m: (m[0], -m[1]))
+        mentions, next_free = [], 0
+        for first, length, name, label in matches:
+            if first >= next_free:
+                mentions.append((tokens[first][0], tokens[first + length - 1][1], name, label))
+                next_free = first + length
+        return mentions
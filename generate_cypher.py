@@ -1,7 +1,17 @@
+import argparse
+import asyncio
+import json
 import os
+import random
+import time
 import openai
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from dotenv import load_dotenv
+from changed_files import read_changed_list
+from cypher_script import drop_incomplete_statement, merge_scripts
+from graph_records import RESPONSE_FORMAT, dumps_records, loads_records, merge_records, validate_extraction
+from llm_cache import DEFAULT_CACHE_PATH, LLMResultCache
+import tracing
 load_dotenv()
 
 
@@ -10,7 +20,29 @@ client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 INPUT_FOLDER = 'extracted_data'  
 OUTPUT_FOLDER = 'neo4j_cypher_queries' 
+JSON_OUTPUT_FOLDER = 'neo4j_graph_records'
 MODEL_NAME = 'gpt-4o-mini'
+TEMPERATURE = 0.1
+MAX_TOKENS = 2000
+
+# --- Output Formats ---
+# 'cypher' asks the LLM for a Cypher script; 'json' asks for nodes and relationships through
+# structured outputs and stores them as JSONL records (see graph_records.py).
+OUTPUT_FORMATS = ('cypher', 'json')
+OUTPUT_EXTENSIONS = {'cypher': '.cypher', 'json': '.jsonl'}
+
+# --- Chunking ---
+# Documents longer than CHUNK_TOKENS are split on markdown structure and extracted chunk by chunk,
+# so that no single response has to fit a whole long page into MAX_TOKENS.
+CHUNK_TOKENS = 3000
+CHUNK_OVERLAP_TOKENS = 200
+
+# --- Async Extraction Defaults ---
+# Budgets should match the account's rate limits for MODEL_NAME.
+DEFAULT_CONCURRENCY = 32
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 200000
+DEFAULT_MAX_RETRIES = 6
 
 
 PROMPT_MESSAGES = [
@@ -135,10 +167,267 @@ MERGE (param)-[:AIDS_IN]->(app);
     }
 ]
 
-def process_markdown_files(input_folder, output_folder, model_name):
+JSON_PROMPT_MESSAGES = [
+    {
+        "role": "system",
+        "content": """You are an expert Knowledge Graph engineer. Your task is to extract all relevant entities and their relationships from the provided scientific and technical text as graph nodes and relationships.
+
+Nodes: Give each entity a short id that is unique within your answer, a label and a name. Use generalized labels (e.g., `Spacecraft`, `Instrument`, `Component`, `Technology`, `Location`, `Date`, `Organization`, `DataProduct`, `Parameter`, `Phenomenon`, `Orbit`, `Channel`, `MeasurementPoint`, `Application`) and invent new ones only when necessary. The name is the unique identifier of the entity (for dates use the ISO date, for quantities the value with its unit, e.g. '95 K'). Put other attributes in properties with meaningful keys; for numerical values with units, include the unit in the key (e.g., `launch_mass_kg: 2000`).
+
+Relationships: Connect node ids with descriptive relationship types (e.g., `HAS_INSTRUMENT`, `CARRIES_PAYLOAD`, `ORBITS_IN`, `HAS_PROPERTY`, `INCORPORATES_TECHNOLOGY`, `COOLED_BY`, `MAINTAINED_AT_TEMPERATURE`, `HAS_CHANNEL`, `DISTRIBUTED_BY`, `USED_FOR`)."""
+    },
+    {
+        "role": "user",
+        "content": """Input: "SCATSAT-1 provided ocean surface wind vector data for the Bay of Bengal from March 1, 2024 to March 31, 2024. This Level-3 Binned Data is crucial for cyclone monitoring. Data processed at SAC."""
+    },
+    {
+        "role": "assistant",
+        "content": """{"nodes":[{"id":"s","label":"Satellite","name":"SCATSAT-1","properties":[]},{"id":"p","label":"Parameter","name":"ocean surface wind vector","properties":[{"key":"type","value":"Oceanographic"}]},{"id":"l","label":"Location","name":"Bay of Bengal","properties":[{"key":"type","value":"Oceanic"}]},{"id":"dps","label":"Date","name":"2024-03-01","properties":[]},{"id":"dpe","label":"Date","name":"2024-03-31","properties":[]},{"id":"dp","label":"DataProduct","name":"Level-3 Binned Data","properties":[{"key":"level","value":3},{"key":"format","value":"Binned"}]},{"id":"app","label":"Application","name":"cyclone monitoring","properties":[]},{"id":"org","label":"Organization","name":"SAC","properties":[]}],"relationships":[{"source":"s","type":"COLLECTS_PARAMETER","target":"p"},{"source":"p","type":"COLLECTED_AT","target":"l"},{"source":"p","type":"COLLECTED_FROM_DATE","target":"dps"},{"source":"p","type":"COLLECTED_TO_DATE","target":"dpe"},{"source":"s","type":"GENERATES_PRODUCT","target":"dp"},{"source":"dp","type":"IS_USED_FOR","target":"app"},{"source":"dp","type":"PROCESSED_BY","target":"org"}]}"""
+    }
+]
+
+def build_messages(markdown_content, output_format='cypher'):
+    """
+    Appends a document to the few-shot PROMPT_MESSAGES (or JSON_PROMPT_MESSAGES).
+    """
+    if output_format == 'json':
+        messages_for_api = list(JSON_PROMPT_MESSAGES)
+        messages_for_api.append({
+            "role": "user",
+            "content": f"Process the following input text and extract the graph nodes and relationships:\n\n{markdown_content}"
+        })
+        return messages_for_api
+    messages_for_api = list(PROMPT_MESSAGES)
+    messages_for_api.append({
+        "role": "user",
+        "content": f"Process the following input text and generate the Neo4j Cypher query:\n\n{markdown_content}"
+    })
+    return messages_for_api
+
+def request_options(output_format):
+    """
+    Extra chat completion parameters for an output format.
+    """
+    return {"response_format": RESPONSE_FORMAT} if output_format == 'json' else {}
+
+def strip_code_fences(cypher_query):
+    """
+    Removes the ```cypher ... ``` fence the model wraps its answer in.
+    """
+    cypher_query = cypher_query.strip()
+    if cypher_query.startswith("```cypher") and cypher_query.endswith("```"):
+        cypher_query = cypher_query[len("```cypher"):-len("```")].strip()
+    elif cypher_query.startswith("```") and cypher_query.endswith("```"):
+        cypher_query = cypher_query[len("```"):-len("```")].strip()
+    return cypher_query
+
+def clean_response(content, finish_reason):
+    """
+    Strips the code fence from a response. If the model ran out of output tokens, the
+    statement it was writing is cut off, so everything after the last complete statement is dropped.
+    """
+    if finish_reason != "length":
+        return strip_code_fences(content)
+    print("Warning: response was truncated at MAX_TOKENS; dropping the incomplete last statement.")
+    content = content.strip().removeprefix("```cypher").removeprefix("```")
+    return drop_incomplete_statement(content)
+
+def parse_graph_response(message, finish_reason):
+    """
+    Validates a structured-output response and returns it as JSONL records.
+    Raises ValueError if the model refused or its JSON was cut off at MAX_TOKENS.
+    """
+    if getattr(message, "refusal", None):
+        raise ValueError(f"Model refused the extraction: {message.refusal}")
+    if finish_reason == "length":
+        raise ValueError("Structured response was truncated at MAX_TOKENS; lower CHUNK_TOKENS.")
+    nodes, relationships, dropped = validate_extraction(json.loads(message.content))
+    if dropped:
+        print(f"Warning: dropped {dropped} invalid nodes/relationships from the extraction.")
+    return dumps_records(nodes + relationships)
+
+def parse_response(message, finish_reason, output_format='cypher'):
+    if output_format == 'json':
+        return parse_graph_response(message, finish_reason)
+    return clean_response(message.content, finish_reason)
+
+def merge_results(results, output_format='cypher'):
+    """
+    Combines the per-chunk results of one document.
+    """
+    if output_format == 'json':
+        return dumps_records(merge_records(loads_records(result) for result in results))
+    return merge_scripts(results)
+
+_token_encoding = None
+
+def count_tokens(text):
+    """
+    Counts tokens with tiktoken when its encoding for MODEL_NAME can be loaded,
+    otherwise estimates about 4 characters per token.
+    """
+    global _token_encoding
+    if _token_encoding is None:
+        try:
+            import tiktoken
+            _token_encoding = tiktoken.encoding_for_model(MODEL_NAME)
+        except Exception:
+            _token_encoding = False
+    if _token_encoding:
+        return len(_token_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+def _hard_split(word, max_tokens):
+    """
+    Cuts a word longer than max_tokens into consecutive pieces of at most max_tokens,
+    each the longest prefix of the rest that fits.
+    """
+    pieces = []
+    while word:
+        low, high = 1, len(word)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count_tokens(word[:middle]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        pieces.append(word[:low])
+        word = word[low:]
+    return pieces
+
+def _split_block(block, max_tokens):
+    """
+    Splits a block that is too large on its own into pieces of at most max_tokens,
+    at line boundaries first, at word boundaries for overlong lines and inside words
+    longer than max_tokens. Pieces of one line are rejoined with the spaces they had.
+    """
+    units = []  # (separator from the previous unit, text)
+    for line in block.split('\n'):
+        if count_tokens(line) <= max_tokens:
+            units.append(('\n', line))
+            continue
+        for index, word in enumerate(line.split(' ')):
+            separator = '\n' if index == 0 else ' '
+            if count_tokens(word) <= max_tokens:
+                units.append((separator, word))
+            else:
+                units.extend((separator if i == 0 else '', piece) for i, piece in enumerate(_hard_split(word, max_tokens)))
+    pieces, current = [], None
+    for separator, unit in units:
+        candidate = unit if current is None else current + separator + unit
+        if current is not None and count_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            current = unit
+        else:
+            current = candidate
+    if current is not None:
+        pieces.append(current)
+    return pieces
+
+def chunk_markdown(markdown_content, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    Splits a markdown document into chunks of at most max_tokens tokens.
+
+    The document is cut between paragraphs, preferring the start of a heading once a chunk
+    is half full. Each chunk repeats the last paragraphs of the previous one (up to
+    overlap_tokens) so that facts straddling a boundary are seen whole, and chunks after
+    the first are prefixed with the document's H1 heading so entities stay anchored to
+    what the page is about. A document that fits is returned unchanged as a single chunk.
+    """
+    if count_tokens(markdown_content) <= max_tokens:
+        return [markdown_content]
+
+    title = next((line for line in markdown_content.split('\n') if line.startswith('# ')), '')
+    budget = max_tokens - count_tokens(title) - 2
+
+    blocks = []
+    for paragraph in markdown_content.split('\n\n'):
+        if not paragraph.strip():
+            continue
+        if count_tokens(paragraph) > budget:
+            blocks.extend(_split_block(paragraph, budget))
+        else:
+            blocks.append(paragraph)
+
+    chunks, current, current_tokens = [], [], 0
+    for block in blocks:
+        block_tokens = count_tokens(block) + 1
+        starts_section = block.lstrip().startswith('#')
+        if current and (
+            current_tokens + block_tokens > budget
+            or (starts_section and current_tokens > budget // 2)
+        ):
+            chunks.append(current)
+            overlap, overlap_size = [], 0
+            for previous in reversed(current):
+                size = count_tokens(previous) + 1
+                if overlap_size + size > overlap_tokens or overlap_size + size + block_tokens > budget:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += size
+            current, current_tokens = overlap, overlap_size
+        current.append(block)
+        current_tokens += block_tokens
+    if current:
+        chunks.append(current)
+
+    texts = []
+    for index, chunk in enumerate(chunks):
+        text = '\n\n'.join(chunk)
+        if index > 0 and title and not text.startswith(title):
+            text = f"{title}\n\n{text}"
+        texts.append(text)
+    return texts
+
+def extract_cypher(markdown_content, model_name, cache=None, output_format='cypher'):
+    """
+    Extracts Cypher (or JSONL graph records) for one document or chunk with a blocking
+    API call, unless an identical request is cached. Returns (result, whether it came from the cache).
+    """
+    messages_for_api = build_messages(markdown_content, output_format)
+    key = cache_key(model_name, messages_for_api, output_format)
+    cypher_query = cache.get(key) if cache else None
+    if cypher_query is not None:
+        return cypher_query, True
+
+    with tracing.span("generate.llm_request", model=model_name) as span:
+        response = client.chat.completions.create(
+            model=model_name,
+            messages=messages_for_api,
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            **request_options(output_format),
+        )
+        span.set(**usage_attributes(response))
+    cypher_query = parse_response(response.choices[0].message, response.choices[0].finish_reason, output_format)
+    if cache:
+        cache.put(key, cypher_query)
+    return cypher_query, False
+
+def usage_attributes(response):
+    """
+    Token counts of an API response, as tracing span attributes.
+    """
+    if not response.usage:
+        return {}
+    return {"prompt_tokens": response.usage.prompt_tokens, "completion_tokens": response.usage.completion_tokens}
+
+def cache_key(model_name, messages, output_format='cypher'):
+    """
+    Key under which an extraction result is cached: the model, the full prompt
+    (few-shot examples plus document) and the sampling parameters.
+    """
+    return LLMResultCache.make_key(
+        model_name, messages, temperature=TEMPERATURE, max_tokens=MAX_TOKENS, **request_options(output_format)
+    )
+
+def process_markdown_files(input_folder, output_folder, model_name, only_files=None, cache=None, output_format='cypher'):
     """
     Reads markdown files from an input folder, sends their content to an LLM for NER
     and Cypher generation, and saves the results to an output folder.
+    If only_files is given, only files whose name without extension is in it are sent.
+    If cache (an LLMResultCache) is given, results for identical requests are reused.
+    With output_format='json', nodes and relationships are extracted as JSONL records instead.
     """
     if not os.path.exists(input_folder):
         print(f"Error: Input folder '{input_folder}' does not exist.")
@@ -146,53 +435,51 @@ def process_markdown_files(input_folder, output_folder, model_name):
 
     os.makedirs(output_folder, exist_ok=True)
     print(f"Processing Markdown files from '{input_folder}'...")
-    print(f"Generated Cypher queries will be saved to '{output_folder}'.")
+    print(f"Generated {'graph records' if output_format == 'json' else 'Cypher queries'} will be saved to '{output_folder}'.")
 
     processed_count = 0
     skipped_count = 0
     error_count = 0
+    cached_count = 0
 
     for filename in os.listdir(input_folder):
         if filename.endswith(".md"):
+            if only_files is not None and os.path.splitext(filename)[0] not in only_files:
+                continue
             input_filepath = os.path.join(input_folder, filename)
-            output_filename = os.path.splitext(filename)[0] + ".cypher"
+            output_filename = os.path.splitext(filename)[0] + OUTPUT_EXTENSIONS[output_format]
             output_filepath = os.path.join(output_folder, output_filename)
 
             print(f"\n--- Processing '{filename}' ---")
 
+            span = tracing.span("generate.file", file=filename)
             try:
-                with open(input_filepath, 'r', encoding='utf-8') as f:
-                    markdown_content = f.read()
-
-
-                messages_for_api = list(PROMPT_MESSAGES)
-                
-                messages_for_api.append({
-                    "role": "user",
-                    "content": f"Process the following input text and generate the Neo4j Cypher query:\n\n{markdown_content}"
-                })
-
-                print("Sending request to OpenAI API...")
-                response = client.chat.completions.create(
-                    model=model_name,
-                    messages=messages_for_api,
-                    temperature=0.1,  
-                    max_tokens=2000,
-                )
-
-                cypher_query = response.choices[0].message.content.strip()
-
-                
-                if cypher_query.startswith("```cypher") and cypher_query.endswith("```"):
-                    cypher_query = cypher_query[len("```cypher"):-len("```")].strip()
-                elif cypher_query.startswith("```") and cypher_query.endswith("```"):
-                    cypher_query = cypher_query[len("```"):-len("```")].strip()
-
-
-                with open(output_filepath, 'w', encoding='utf-8') as f:
-                    f.write(cypher_query)
-
-                print(f"Successfully generated Cypher for '{filename}' and saved to '{output_filepath}'")
+                with span:
+                    with open(input_filepath, 'r', encoding='utf-8') as f:
+                        markdown_content = f.read()
+
+
+                    chunks = chunk_markdown(markdown_content)
+                    if len(chunks) > 1:
+                        print(f"Document split into {len(chunks)} chunks.")
+
+                    chunk_queries = []
+                    cached_chunks = 0
+                    for chunk in chunks:
+                        print("Sending request to OpenAI API...")
+                        chunk_query, from_cache = extract_cypher(chunk, model_name, cache, output_format)
+                        if from_cache:
+                            print("Using cached result for identical request.")
+                            cached_count += 1
+                            cached_chunks += 1
+                        chunk_queries.append(chunk_query)
+                    cypher_query = merge_results(chunk_queries, output_format)
+
+                    with open(output_filepath, 'w', encoding='utf-8') as f:
+                        f.write(cypher_query)
+                    span.set(chunks=len(chunks), cached_chunks=cached_chunks, output_chars=len(cypher_query))
+
+                print(f"Successfully extracted '{filename}' and saved to '{output_filepath}'")
                 processed_count += 1
 
             except openai.APIError as e:
@@ -209,10 +496,290 @@ def process_markdown_files(input_folder, output_folder, model_name):
     print(f"Total files processed: {processed_count}")
     print(f"Total files skipped: {skipped_count}")
     print(f"Total files with errors: {error_count}")
-    print("Please review the generated .cypher files in the output folder.")
+    print(f"Total results served from cache: {cached_count}")
+    print(f"Please review the generated {OUTPUT_EXTENSIONS[output_format]} files in the output folder.")
 
-# --- Run the processing ---
-if __name__ == "__main__":
+# --- Async Extraction with Rate Limiting ---
+class TokenBucket:
+    """
+    A bucket holding up to `per_minute` units that refills continuously at
+    `per_minute / 60` units per second. Waiters are served in arrival order.
+    """
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.refill_per_second = per_minute / 60.0
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    async def acquire(self, amount):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.available < amount:
+                await asyncio.sleep((amount - self.available) / self.refill_per_second)
+                self._refill()
+            self.available -= amount
+
+    def refund(self, amount):
+        self._refill()
+        self.available = min(self.capacity, self.available + amount)
+
+class RateLimiter:
+    """
+    Enforces requests-per-minute and tokens-per-minute budgets. Each call reserves its
+    estimated token count up front; the unused part is refunded once the real usage is known,
+    and all of it when the call fails.
+    """
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    async def acquire(self, estimated_tokens):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(estimated_tokens)
+
+    def settle(self, estimated_tokens, used_tokens):
+        if used_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - used_tokens)
+
+def estimate_tokens(messages, max_tokens):
+    """
+    Cheap upper-bound estimate of a request's token cost (about 4 characters per token
+    for the prompt, plus the full completion budget).
+    """
+    return sum(len(m["content"]) for m in messages) // 4 + max_tokens
 
+def retry_delay(error, attempt, base_delay=1.0, max_delay=60.0):
+    """
+    Seconds to wait before retrying: the server's retry-after hint if it sent one,
+    otherwise exponential backoff with full jitter.
+    """
+    response = getattr(error, "response", None)
+    headers = response.headers if response is not None else {}
+    hint = None
+    for header, scale in (("retry-after-ms", 1000.0), ("retry-after", 1.0)):
+        if headers.get(header):
+            try:
+                hint = float(headers[header]) / scale
+                break
+            except ValueError:
+                continue
+    backoff = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+    return max(hint, backoff) if hint is not None else backoff
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+async def generate_cypher_async(async_client, limiter, markdown_content, model_name, max_retries=DEFAULT_MAX_RETRIES,
+                                output_format='cypher'):
+    """
+    Sends one document to the LLM under the rate limiter, retrying rate-limit,
+    connection and server errors. Returns (cypher query or JSONL records, total tokens used).
+    """
+    messages = build_messages(markdown_content, output_format)
+    estimated_tokens = estimate_tokens(messages, MAX_TOKENS)
+    with tracing.span("generate.llm_request", model=model_name) as span:
+        for attempt in range(max_retries + 1):
+            await limiter.acquire(estimated_tokens)
+            try:
+                response = await async_client.chat.completions.create(
+                    model=model_name,
+                    messages=messages,
+                    temperature=TEMPERATURE,
+                    max_tokens=MAX_TOKENS,
+                    **request_options(output_format),
+                )
+            except RETRYABLE_ERRORS as e:
+                # A rejected or failed request used no tokens; give its reservation back.
+                limiter.settle(estimated_tokens, 0)
+                if attempt == max_retries:
+                    raise
+                await asyncio.sleep(retry_delay(e, attempt))
+                continue
+            except BaseException:
+                limiter.settle(estimated_tokens, 0)
+                raise
+
+            used_tokens = response.usage.total_tokens if response.usage else estimated_tokens
+            limiter.settle(estimated_tokens, used_tokens)
+            span.set(attempts=attempt + 1, **usage_attributes(response))
+            choice = response.choices[0]
+            return parse_response(choice.message, choice.finish_reason, output_format), used_tokens
+
+def _read_text(filepath):
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def _write_text(filepath, content):
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+async def process_markdown_files_async(
+    input_folder,
+    output_folder,
+    model_name,
+    only_files=None,
+    concurrency=DEFAULT_CONCURRENCY,
+    requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+    tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE,
+    max_retries=DEFAULT_MAX_RETRIES,
+    async_client=None,
+    cache=None,
+    output_format='cypher',
+):
+    """
+    Same as process_markdown_files(), but keeps up to `concurrency` requests in flight
+    within the requests/tokens-per-minute budgets. Long documents are chunked and their
+    chunks extracted concurrently. Each .cypher file is written as soon as its last chunk
+    arrives. Identical requests share one API call, and with a cache, earlier results are
+    reused. Returns a dict of counts, tokens used, elapsed seconds and, under "file_seconds",
+    the seconds each processed file took.
+    """
+    if not os.path.exists(input_folder):
+        print(f"Error: Input folder '{input_folder}' does not exist.")
+        return None
 
-    process_markdown_files(INPUT_FOLDER, OUTPUT_FOLDER, MODEL_NAME)
\ No newline at end of file
+    os.makedirs(output_folder, exist_ok=True)
+    filenames = [
+        filename for filename in os.listdir(input_folder)
+        if filename.endswith(".md")
+        and (only_files is None or os.path.splitext(filename)[0] in only_files)
+    ]
+    print(f"Processing {len(filenames)} Markdown files from '{input_folder}' "
+          f"({concurrency} concurrent, {requests_per_minute} RPM, {tokens_per_minute} TPM)...")
+
+    # The scheduler owns retries, so the SDK's own retry loop is disabled.
+    async_client = async_client or AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    file_slots = asyncio.Semaphore(concurrency)
+    request_slots = asyncio.Semaphore(concurrency)
+    stats = {"processed": 0, "errors": 0, "tokens": 0, "cached": 0, "chunked": 0, "file_seconds": []}
+    in_flight = {}
+
+    async def call_llm(markdown_chunk):
+        async with request_slots:
+            return await generate_cypher_async(async_client, limiter, markdown_chunk, model_name, max_retries, output_format)
+
+    async def extract(markdown_chunk):
+        """
+        Returns (result, whether it was shared or cached rather than requested).
+        """
+        key = cache_key(model_name, build_messages(markdown_chunk, output_format), output_format)
+        cypher_query = cache.get(key) if cache else None
+        if cypher_query is not None:
+            stats["cached"] += 1
+            return cypher_query, True
+        if key in in_flight:
+            # A byte-identical document or chunk is already being extracted; share its result.
+            cypher_query, _ = await in_flight[key]
+            stats["cached"] += 1
+            return cypher_query, True
+
+        in_flight[key] = asyncio.ensure_future(call_llm(markdown_chunk))
+        try:
+            cypher_query, used_tokens = await in_flight[key]
+        finally:
+            del in_flight[key]
+        stats["tokens"] += used_tokens
+        if cache:
+            cache.put(key, cypher_query)
+        return cypher_query, False
+
+    async def process_file(filename):
+        input_filepath = os.path.join(input_folder, filename)
+        output_filepath = os.path.join(output_folder, os.path.splitext(filename)[0] + OUTPUT_EXTENSIONS[output_format])
+        async with file_slots:
+            start = time.perf_counter()
+            try:
+                with tracing.span("generate.file", file=filename) as span:
+                    markdown_content = await asyncio.to_thread(_read_text, input_filepath)
+                    chunks = chunk_markdown(markdown_content)
+                    if len(chunks) > 1:
+                        stats["chunked"] += 1
+                    results = await asyncio.gather(*(extract(chunk) for chunk in chunks))
+                    cypher_query = merge_results([query for query, _ in results], output_format)
+
+                    await asyncio.to_thread(_write_text, output_filepath, cypher_query)
+                    span.set(chunks=len(chunks), cached_chunks=sum(cached for _, cached in results),
+                             output_chars=len(cypher_query))
+                stats["processed"] += 1
+                stats["file_seconds"].append(time.perf_counter() - start)
+                print(f"Saved extraction for '{filename}' to '{output_filepath}'")
+            except openai.APIError as e:
+                print(f"OpenAI API Error for '{filename}': {e}")
+                stats["errors"] += 1
+            except Exception as e:
+                print(f"An unexpected error occurred while processing '{filename}': {e}")
+                stats["errors"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(process_file(filename) for filename in filenames))
+    stats["elapsed_seconds"] = time.perf_counter() - start
+
+    print("\n--- Processing Complete ---")
+    print(f"Total files processed: {stats['processed']}")
+    print(f"Total files with errors: {stats['errors']}")
+    print(f"Total files split into chunks: {stats['chunked']}")
+    print(f"Total tokens used: {stats['tokens']}")
+    print(f"Total results served from cache: {stats['cached']}")
+    print(f"Elapsed: {stats['elapsed_seconds']:.1f}s")
+    return stats
+
+# --- Run the processing ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Neo4j Cypher from markdown files with an LLM.")
+    parser.add_argument("--changed-list", help="Only process the files named in this list (e.g. scraped_pages/changed_files.txt).")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Send requests concurrently under RPM/TPM budgets.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Maximum requests in flight with --async.")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_REQUESTS_PER_MINUTE, help="Requests-per-minute budget with --async.")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TOKENS_PER_MINUTE, help="Tokens-per-minute budget with --async.")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help="SQLite file caching LLM results.")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the LLM, ignoring cached results.")
+    parser.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default='cypher',
+                        help=f"'json' extracts nodes and relationships as JSONL records into '{JSON_OUTPUT_FOLDER}'.")
+    parser.add_argument("--trace", help="Append tracing spans (per file and per API request) to this JSONL file.")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracing.configure(args.trace)
+
+    output_folder = JSON_OUTPUT_FOLDER if args.output_format == 'json' else OUTPUT_FOLDER
+
+    cache = None if args.no_cache else LLMResultCache(args.cache_path)
+
+    only_files = None
+    if args.changed_list:
+        only_files = read_changed_list(args.changed_list)
+
+    if args.use_async:
+        asyncio.run(process_markdown_files_async(
+            INPUT_FOLDER,
+            output_folder,
+            MODEL_NAME,
+            only_files=only_files,
+            concurrency=args.concurrency,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+            cache=cache,
+            output_format=args.output_format,
+        ))
+    else:
+        process_markdown_files(INPUT_FOLDER, output_folder, MODEL_NAME, only_files=only_files, cache=cache,
+                               output_format=args.output_format)
+
+    if cache:
+        entries, stored_bytes = cache.size()
+        print(f"LLM cache: {cache.stats['hits']} hits, {cache.stats['misses']} misses "
+              f"({cache.hit_rate():.0%} hit rate), {entries} entries, {stored_bytes / 1024:.0f} KiB, "
+              f"{cache.stats['evictions']} evicted")
+        cache.close()
\ No newline at end of file
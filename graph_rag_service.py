@@ -1,11 +1,28 @@
 import os
 import logging
+import re
+import threading
+import time
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
 from langchain_neo4j import Neo4jGraph
+from neo4j.exceptions import ServiceUnavailable
 from langchain_openai import ChatOpenAI
 from langchain_neo4j import GraphCypherQAChain
+from langchain_neo4j.chains.graph_qa.cypher import construct_schema, extract_cypher
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts.prompt import PromptTemplate
+import tracing
+from answer_formatter import AnswerFormatter
+from answer_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL_SECONDS, AnswerCache
+from cypher_guard import DEFAULT_AUTO_LIMIT, DEFAULT_MAX_HOPS, DEFAULT_TIMEOUT_SECONDS, CypherGuard, UnsafeCypher, bound_cypher
+from cypher_plan_cache import CypherPlanCache, load_entity_names
+from graph_snapshot import DEFAULT_GRAPH_SNAPSHOT_PATH, GraphSnapshot, UnsupportedQuery
+from graph_version import GRAPH_VERSION_LABEL, read_graph_version
+from question_router import QuestionRouter
+from result_context import DEFAULT_MAX_ROWS, DEFAULT_TOKEN_BUDGET, count_rows_query, fetch_context, qa_context
+from schema_selector import SchemaSelector
+from schema_snapshot import DEFAULT_SNAPSHOT_PATH, SchemaSnapshot, schema_fingerprint
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -22,6 +39,78 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CYPHER_LLM_MODEL = "gpt-4o-mini"
 QA_LLM_MODEL = "gpt-4o"
 
+# --- Answer Cache ---
+# Answers are cached per normalized question in memory and, if ANSWER_CACHE_PATH is set,
+# in a SQLite file. The graph version stamp is re-read at most every
+# GRAPH_VERSION_CHECK_SECONDS; a new stamp (bumped by upload_to_neo4j.py) drops the cache.
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH")
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+GRAPH_VERSION_CHECK_SECONDS = 10
+
+# --- Schema Snapshot ---
+# The enhanced schema samples values from every label and relationship type, so reading
+# it takes longer the larger the graph. It is saved to SCHEMA_SNAPSHOT_PATH with a cheap
+# fingerprint of the graph; startup loads the snapshot and re-reads the schema in the
+# background only when the fingerprint has changed.
+SCHEMA_SNAPSHOT_PATH = os.getenv("SCHEMA_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+
+# --- Graph Snapshot ---
+# If `python graph_snapshot.py` has exported the graph to GRAPH_SNAPSHOT_PATH, property
+# lookups and 1-2 hop queries are answered from that memory-mapped snapshot in-process;
+# anything else goes to Neo4j. The snapshot is only used while its version stamp matches
+# the graph's, and also while Neo4j cannot be reached. With a snapshot and a schema
+# snapshot, the service starts even if Neo4j is down at startup.
+GRAPH_SNAPSHOT_PATH = os.getenv("GRAPH_SNAPSHOT_PATH", DEFAULT_GRAPH_SNAPSHOT_PATH)
+
+# --- Schema Pruning ---
+# The Cypher prompt gets only the labels relevant to the question and their 1-hop
+# neighbourhood (schema_selector.py) instead of the whole schema.
+SCHEMA_PRUNING = os.getenv("SCHEMA_PRUNING", "1") != "0"
+
+# --- Concurrency Limits ---
+# At most this many LLM calls (Cypher generation and answer streaming) and database queries
+# run at once across all threads using one service; further calls wait for a free slot.
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 8))
+DB_CONCURRENCY = int(os.getenv("DB_CONCURRENCY", 16))
+# Marks the end of the QA LLM stream in _stream_answer.
+_STREAM_END = object()
+
+# --- Result Context ---
+# Query results are streamed from the driver and projected (result_context.py); fetching
+# stops once the rows reach CONTEXT_TOKEN_BUDGET estimated tokens or CONTEXT_MAX_ROWS rows,
+# and the answer model is told the total row count instead.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+CONTEXT_MAX_ROWS = int(os.getenv("CONTEXT_MAX_ROWS", DEFAULT_MAX_ROWS))
+
+# --- Cypher Guard ---
+# Generated Cypher is checked before it runs (cypher_guard.py): write clauses and EXPLAIN
+# plans with cartesian products, all-node scans or unbounded expansions are rejected and
+# sent back to the Cypher LLM once for repair. Unbounded variable-length relationships are
+# cut to CYPHER_MAX_HOPS, statements without a LIMIT get CYPHER_AUTO_LIMIT, and queries run
+# read-only under a QUERY_TIMEOUT_SECONDS transaction timeout.
+CYPHER_AUTO_LIMIT = int(os.getenv("CYPHER_AUTO_LIMIT", DEFAULT_AUTO_LIMIT))
+CYPHER_MAX_HOPS = int(os.getenv("CYPHER_MAX_HOPS", DEFAULT_MAX_HOPS))
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS))
+
+# --- Question Router ---
+# Common question shapes ("What instruments does INSAT-3D carry?") are answered from a
+# parameterized Cypher template (question_router.py) without the Cypher LLM; entity names
+# are found with a gazetteer of every node name. Other questions go to the LLM.
+QUESTION_ROUTER = os.getenv("QUESTION_ROUTER", "1") != "0"
+
+# --- Answer Synthesis ---
+# Empty results, single values, single rows and short lists are answered from deterministic
+# templates (answer_formatter.py) without a QA LLM call; set ANSWER_FORMATTING=0 to send
+# every result to the QA LLM. Other results go to QA_LLM_MODEL or, if QA_CHEAP_LLM_MODEL is
+# set, first to that model, escalating to QA_LLM_MODEL when its answer says it does not know.
+ANSWER_FORMATTING = os.getenv("ANSWER_FORMATTING", "1") != "0"
+QA_CHEAP_LLM_MODEL = os.getenv("QA_CHEAP_LLM_MODEL")
+ESCALATE_ANSWER_RE = re.compile(
+    r"\b(?:don't|do not|can't|cannot|unable to) (?:know|answer|determine|find|tell)|\bnot (?:sure|provided|available)\b",
+    re.I,
+)
+
 # --- Cypher Generation Prompt Template ---
 CYPHER_GENERATION_TEMPLATE = """Task: Generate Cypher statement to query a graph database.
 Instructions:
@@ -52,20 +141,75 @@ CYPHER_GENERATION_PROMPT = PromptTemplate(
     input_variables=["schema", "question"], template=CYPHER_GENERATION_TEMPLATE
 )
 
+# Takes the place of the question when a rejected statement is sent back for repair.
+CYPHER_REPAIR_TEMPLATE = """{question}
+
+This Cypher statement was rejected before it ran:
+{cypher}
+Reason: {reason}
+Write a corrected read-only statement for the question. Start every pattern from a labelled node, connect all patterns to each other and give variable-length relationships an upper bound."""
+
 class GraphRAGService:
     """
     Manages the GraphCypherQAChain for RAG, assuming a connected Neo4jGraph is provided.
+    Answers are served from answer_cache (an AnswerCache configured from the environment
+    by default) while the graph version stamp is unchanged. On an answer cache miss,
+    router may answer the question with a Cypher template, or plan_cache may supply the
+    Cypher for a paraphrase of an earlier question, so only the database query and the
+    answer LLM run. Statements a graph_snapshot can answer run in-process instead of on
+    Neo4j. If a schema_snapshot is given, the graph
+    schema is re-read in the background whenever the graph's fingerprint no longer matches it.
+    Simple results are answered by answer_formatter without the QA LLM.
+    cypher_llm, qa_llm and cheap_qa_llm replace the OpenAI chat models, e.g. with fakes in
+    benchmarks.
     """
-    def __init__(self, neo4j_graph: Neo4jGraph):
+    def __init__(self, neo4j_graph: Neo4jGraph, answer_cache=None, plan_cache=None, schema_snapshot=None,
+                 cypher_llm=None, qa_llm=None, router=None, cheap_qa_llm=None, answer_formatter=None,
+                 graph_snapshot=None):
         self.graph = neo4j_graph
+        self.graph_snapshot = graph_snapshot
+        # Until the graph version has been read, e.g. while Neo4j is down, a snapshot is trusted.
+        self._graph_snapshot_current = graph_snapshot is not None
+        self.snapshot_stats = {"queries": 0, "unsupported": 0, "stale": 0}
+        self._snapshot_stats_lock = threading.Lock()
+        self.cypher_llm = cypher_llm
+        self.qa_llm = qa_llm
+        self.cheap_qa_llm = cheap_qa_llm
         self.qa_chain = None
+        self.cheap_qa_chain = None
+        self.answer_formatter = answer_formatter if answer_formatter is not None else AnswerFormatter(
+            enabled=ANSWER_FORMATTING)
+        self.schema_snapshot = schema_snapshot
+        self._schema_check_lock = threading.Lock()
+        self.answer_cache = answer_cache if answer_cache is not None else AnswerCache(
+            max_entries=ANSWER_CACHE_MAX_ENTRIES, ttl_seconds=ANSWER_CACHE_TTL_SECONDS, path=ANSWER_CACHE_PATH
+        )
+        self.plan_cache = plan_cache if plan_cache is not None else CypherPlanCache()
+        self.router = router if router is not None else (QuestionRouter() if QUESTION_ROUTER else None)
+        self._version_checked_at = None
+        self._entity_names_loaded = False
+        self.schema_selector = None
+        self._llm_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+        self._db_slots = threading.BoundedSemaphore(DB_CONCURRENCY)
+        self.cypher_guard = CypherGuard(neo4j_graph, auto_limit=CYPHER_AUTO_LIMIT, max_hops=CYPHER_MAX_HOPS,
+                                        timeout_seconds=QUERY_TIMEOUT_SECONDS)
         self._initialize_qa_chain()
+        if self.qa_chain and self.router:
+            if getattr(self.graph, "connect_error", None) is not None and self.graph_snapshot is not None:
+                # Neo4j was down at startup: take the gazetteer from the snapshot instead of
+                # waiting out the driver's retries.
+                self._version_checked_at = time.monotonic()
+                self._set_entity_names(self.graph_snapshot.entity_names(), "the graph snapshot")
+            else:
+                # Loads the gazetteer now rather than on the first question.
+                self._refresh_graph_version()
+        self.start_schema_check()
 
     def _initialize_qa_chain(self):
         """
         Initializes the GraphCypherQAChain.
         """
-        if not OPENAI_API_KEY:
+        if not OPENAI_API_KEY and not (self.cypher_llm and self.qa_llm):
             logger.error("OPENAI_API_KEY environment variable is not set. Cannot initialize LLM chains.")
             return
         if not self.graph:
@@ -73,75 +217,566 @@ class GraphRAGService:
             return
 
         try:
-            cypher_llm = ChatOpenAI(temperature=0, model=CYPHER_LLM_MODEL, openai_api_key=OPENAI_API_KEY)
-            qa_llm = ChatOpenAI(temperature=0, model=QA_LLM_MODEL, openai_api_key=OPENAI_API_KEY)
+            cypher_llm = self.cypher_llm or ChatOpenAI(temperature=0, model=CYPHER_LLM_MODEL, openai_api_key=OPENAI_API_KEY)
+            qa_llm = self.qa_llm or ChatOpenAI(temperature=0, model=QA_LLM_MODEL, openai_api_key=OPENAI_API_KEY,
+                                               stream_usage=True)
 
             self.qa_chain = GraphCypherQAChain.from_llm(
                 graph=self.graph,
                 cypher_llm=cypher_llm,
                 qa_llm=qa_llm,
                 cypher_prompt=CYPHER_GENERATION_PROMPT,
+                exclude_types=[GRAPH_VERSION_LABEL],
                 verbose=True, 
                 return_intermediate_steps=True, 
                 allow_dangerous_requests=True 
             )
+            cheap_qa_llm = self.cheap_qa_llm
+            if cheap_qa_llm is None and QA_CHEAP_LLM_MODEL:
+                cheap_qa_llm = ChatOpenAI(temperature=0, model=QA_CHEAP_LLM_MODEL, openai_api_key=OPENAI_API_KEY)
+            if cheap_qa_llm is not None:
+                # The QA chain's prompt, answered by the cheaper model.
+                self.cheap_qa_chain = self.qa_chain.qa_chain.first | cheap_qa_llm | StrOutputParser()
+            self._build_schema_selector()
             logger.info("GraphCypherQAChain initialized successfully.")
         except Exception as e:
             logger.error(f"Error initializing GraphCypherQAChain: {e}")
             self.qa_chain = None
 
-    def query_graph(self, query_text: str) -> dict:
+    def _refresh_graph_version(self):
         """
-        Executes a natural language query against the graph RAG chain.
-        Returns a dictionary containing the result and intermediate steps.
+        Re-reads the graph version stamp if the last check is older than
+        GRAPH_VERSION_CHECK_SECONDS and hands it to the answer cache.
+        """
+        now = time.monotonic()
+        if self._version_checked_at is not None and now - self._version_checked_at < GRAPH_VERSION_CHECK_SECONDS:
+            return
+        try:
+            stamp = read_graph_version(self.graph)
+        except Exception as e:
+            logger.warning(f"Could not read the graph version, keeping the cached answers: {e}")
+            # Retried after GRAPH_VERSION_CHECK_SECONDS, so an outage does not slow every question.
+            self._version_checked_at = now
+            if self.graph_snapshot is not None and not self._entity_names_loaded:
+                self._set_entity_names(self.graph_snapshot.entity_names(), "the graph snapshot")
+            return
+        self._version_checked_at = now
+        if self.graph_snapshot is not None:
+            current = self.graph_snapshot.stamp == stamp
+            if current != self._graph_snapshot_current:
+                logger.info(f"The graph snapshot at '{self.graph_snapshot.path}' is "
+                            f"{'current' if current else 'stale; querying Neo4j until it is exported again'}.")
+            self._graph_snapshot_current = current
+        changed = self.answer_cache.set_graph_version(stamp)
+        if changed:
+            logger.info(f"Graph version is now {stamp}; answer cache cleared.")
+            self.start_schema_check()
+        if changed or not self._entity_names_loaded:
+            try:
+                names = load_entity_names(self.graph)
+            except Exception as e:
+                logger.warning(f"Could not load entity names for the Cypher plan cache: {e}")
+                return
+            self._set_entity_names(names, "Neo4j")
+
+    def _set_entity_names(self, names, source):
+        self.plan_cache.set_entity_names(names)
+        if self.router:
+            self.router.set_gazetteer(self.plan_cache.matcher)
+        self._entity_names_loaded = True
+        logger.info(f"Loaded {len(names)} entity names from {source} for the Cypher plan cache and the question router.")
+
+    def start_schema_check(self):
+        """
+        Starts a background check of the schema snapshot, unless one is already running.
+        """
+        if self.schema_snapshot is None or not self.graph or not self._schema_check_lock.acquire(blocking=False):
+            return
+        threading.Thread(target=self._check_schema, name="schema-check", daemon=True).start()
+
+    def _check_schema(self):
+        """
+        Compares the graph's fingerprint with the snapshot's and, if they differ, reads the
+        full schema, saves a new snapshot and hands the new schema to the QA chain.
+        """
+        try:
+            fingerprint = schema_fingerprint(self.graph)
+            if fingerprint == self.schema_snapshot.fingerprint:
+                logger.info("Schema snapshot is up to date.")
+                return
+            start = time.perf_counter()
+            self.graph.refresh_schema()
+            self.schema_snapshot.capture(self.graph, fingerprint)
+            if self.qa_chain:
+                self.qa_chain.graph_schema = construct_schema(
+                    self.graph.get_structured_schema, [], [GRAPH_VERSION_LABEL],
+                    bool(getattr(self.graph, "_enhanced_schema", False)),
+                )
+                self._build_schema_selector()
+            logger.info(f"Graph schema refreshed in the background in {time.perf_counter() - start:.1f}s.")
+        except Exception as e:
+            logger.warning(f"Background schema refresh failed, keeping the current schema: {e}")
+        finally:
+            self._schema_check_lock.release()
+
+    def _build_schema_selector(self):
+        if self.router:
+            self.router.set_schema(self.graph.get_structured_schema)
+        if SCHEMA_PRUNING:
+            self.schema_selector = SchemaSelector(
+                self.graph.get_structured_schema,
+                bool(getattr(self.graph, "_enhanced_schema", False)),
+                exclude_types=[GRAPH_VERSION_LABEL],
+            )
+
+    def _generate_cypher(self, query_text, span=tracing.NOOP_SPAN, rejected=None):
+        """
+        Asks the Cypher LLM for a statement, with the schema pruned to the question.
+        rejected=(cypher, reason) asks for a repair of a statement the guard rejected.
+        Token usage and the schema size are recorded on span.
+        """
+        schema = self.qa_chain.graph_schema
+        if self.schema_selector:
+            entity_labels = [label for _, _, _, label in self.plan_cache.matcher.find(query_text)]
+            schema = self.schema_selector.select(query_text, entity_labels)
+        question = query_text
+        if rejected:
+            question = CYPHER_REPAIR_TEMPLATE.format(question=query_text, cypher=rejected[0], reason=rejected[1])
+        usage, config = _usage_tracking()
+        with self._llm_slots:
+            start = time.perf_counter()
+            cypher = extract_cypher(self.qa_chain.cypher_generation_chain.invoke(
+                {"question": question, "schema": schema}, config=config))
+        self.plan_cache.record_generation(time.perf_counter() - start)
+        span.set(schema_chars=len(schema), **_token_counts(usage))
+        logger.info(f"Generated Cypher: {cypher}")
+        return cypher
+
+    def _guard_cypher(self, query_text, cypher, parent):
+        """
+        Checks cypher with the guard. A rejected statement gets one repair round trip to the
+        Cypher LLM. Returns (cypher, checked): the last statement and the guard's result for
+        it, or None if the repaired statement was rejected as well. Statements the graph
+        snapshot will answer skip the EXPLAIN round trip, so they are served while Neo4j is down.
+        """
+        for attempt in range(2):
+            with tracing.span("query.guard", parent=parent, attempt=attempt) as span:
+                try:
+                    if self._snapshot_answers(bound_cypher(cypher, self.cypher_guard.auto_limit,
+                                                           self.cypher_guard.max_hops)[0]):
+                        span.set(snapshot=True)
+                        checked = self.cypher_guard.check(cypher, explain=False)
+                    else:
+                        with self._db_slots:
+                            checked = self.cypher_guard.check(cypher)
+                except UnsafeCypher as e:
+                    logger.warning(f"Cypher rejected by the '{e.guard}' guard: {e}")
+                    span.set(rejected=e.guard)
+                    rejected = (cypher, str(e))
+                else:
+                    span.set(rewrites=checked["rewrites"])
+                    if attempt:
+                        self.cypher_guard.count("repaired")
+                    return cypher, checked
+            if attempt:
+                return cypher, None
+            self.cypher_guard.count("repairs")
+            with tracing.span("query.cypher_repair", parent=parent) as span:
+                cypher = self._generate_cypher(query_text, span, rejected=rejected)
+        return cypher, None
+
+    def _snapshot_answers(self, query, params=None):
+        """
+        Returns whether the graph snapshot is current and can answer query.
+        """
+        return self.graph_snapshot is not None and self._graph_snapshot_current and \
+            self.graph_snapshot.supports(query, params)
+
+    def _run_cypher(self, checked, span=tracing.NOOP_SPAN):
+        """
+        Returns the token-bounded result of a statement the guard passed or a routed
+        template, with its "params" (see result_context.fetch_context), or an empty result
+        for None. The graph snapshot answers the statement if it can and is current.
+        A template that returns its "limit" of rows may have been cut short, so its rows
+        are counted without the LIMIT and the result is marked truncated if there are more.
+        """
+        result = None
+        if not checked or not checked["query"]:
+            result = {"rows": [], "tokens": 0, "truncated": False, "total_rows": 0}
+        elif self.graph_snapshot is not None:
+            if not self._graph_snapshot_current:
+                self._count_snapshot("stale")
+            else:
+                try:
+                    result = fetch_context(self.graph_snapshot, checked["query"], params=checked.get("params"),
+                                           token_budget=CONTEXT_TOKEN_BUDGET, max_rows=CONTEXT_MAX_ROWS)
+                except UnsupportedQuery as e:
+                    logger.info(f"The graph snapshot cannot answer this statement ({e}); querying Neo4j.")
+                    self._count_snapshot("unsupported")
+                else:
+                    self._count_snapshot("queries")
+                    span.set(snapshot=True)
+        if result is None:
+            try:
+                with self._db_slots:
+                    result = fetch_context(self.graph, checked["query"], params=checked.get("params"),
+                                           token_budget=CONTEXT_TOKEN_BUDGET,
+                                           max_rows=CONTEXT_MAX_ROWS, timeout=QUERY_TIMEOUT_SECONDS,
+                                           count_query=checked["count_query"])
+            except Exception as e:
+                if self.cypher_guard.is_timeout(e):
+                    self.cypher_guard.count("timeouts")
+                raise
+        limit = checked.get("limit") if checked else None
+        if limit and (result["total_rows"] is None or result["total_rows"] >= limit):
+            result["total_rows"] = self._count_rows(checked)
+            result["truncated"] = result["truncated"] or result["total_rows"] is None or \
+                result["total_rows"] > len(result["rows"])
+        span.set(rows=len(result["rows"]), context_tokens=result["tokens"], truncated=result["truncated"],
+                 total_rows=result["total_rows"])
+        if result["truncated"]:
+            logger.info(f"Result truncated to {len(result['rows'])} of {result['total_rows']} rows.")
+        return result
+
+    def _count_rows(self, checked):
+        """
+        Returns the number of rows of checked["count_query"], or None if counting fails.
+        """
+        query, params = checked["count_query"], checked.get("params") or {}
+        if self.graph_snapshot is not None and self._graph_snapshot_current:
+            try:
+                return len(self.graph_snapshot.query(query, params))
+            except UnsupportedQuery:
+                pass
+        try:
+            with self._db_slots:
+                if getattr(self.graph, "_driver", None) is None:
+                    return len(self.graph.query(query, params))
+                return self.graph.query(count_rows_query(query), params)[0]["total"]
+        except Exception as e:
+            logger.warning(f"Could not count the rows of a limited result: {e}")
+            return None
+
+    def _subject(self, query_text):
+        """
+        Returns the entity name the question mentions, if it mentions exactly one.
+        """
+        names = {name for _, _, name, _ in self.plan_cache.matcher.find(query_text)}
+        return names.pop() if len(names) == 1 else None
+
+    def _stream_answer(self, query_text, fetched, cypher, chunks, timings, start, span=tracing.NOOP_SPAN):
+        """
+        Yields token events for the answer and appends their text to chunks: formatted by
+        answer_formatter for simple results, else from the cheap QA model (whole, since it
+        may be escalated) or streamed from the QA LLM. Returns the answer source:
+        "template", "cheap_qa_llm" or "qa_llm".
+        """
+        def emit(chunk):
+            if not chunks:
+                timings["first_token_seconds"] = time.perf_counter() - start
+            chunks.append(chunk)
+            return {"type": "token", "text": chunk}
+
+        shape, formatted = self.answer_formatter.answer(fetched, self._subject(query_text), cypher)
+        span.set(shape=shape)
+        if formatted is not None:
+            span.set(answer_source="template")
+            yield emit(formatted)
+            return "template"
+        inputs = {"question": query_text, "context": qa_context(fetched)}
+        usage, config = _usage_tracking()
+        try:
+            if self.cheap_qa_chain is not None:
+                self.answer_formatter.count("cheap_qa_llm")
+                with self._llm_slots:
+                    draft = self.cheap_qa_chain.invoke(inputs, config=config)
+                if draft and not ESCALATE_ANSWER_RE.search(draft):
+                    span.set(answer_source="cheap_qa_llm")
+                    yield emit(draft)
+                    return "cheap_qa_llm"
+                logger.info(f"Escalating to {QA_LLM_MODEL}; the cheap QA model answered: {draft!r}")
+                self.answer_formatter.count("escalated")
+            self.answer_formatter.count("qa_llm")
+            span.set(answer_source="qa_llm")
+            # The slot is held only while pulling each chunk, so a consumer that stops reading
+            # (a Streamlit rerun, a dropped client) does not keep it until garbage collection.
+            stream = self.qa_chain.qa_chain.stream(inputs, config=config)
+            try:
+                while True:
+                    with self._llm_slots:
+                        chunk = next(stream, _STREAM_END)
+                    if chunk is _STREAM_END:
+                        break
+                    if chunk:
+                        yield emit(chunk)
+            finally:
+                stream.close()
+            return "qa_llm"
+        finally:
+            span.set(**_token_counts(usage))
+
+    def _count_snapshot(self, name):
+        with self._snapshot_stats_lock:
+            self.snapshot_stats[name] += 1
+
+    def stream_query(self, query_text: str):
+        """
+        Answers a natural language query step by step, yielding events as they happen:
+            {"type": "cypher", "query": ..., "source": "llm" | "template" | "plan_cache" | "answer_cache", "rejected": bool}
+            {"type": "rows", "context": [...], "truncated": bool, "total_rows": n}
+            {"type": "token", "text": ...}   (answer chunks, as the QA LLM produces them)
+            {"type": "done", "result": ..., "intermediate_steps": [...], "cached": bool, "timings": {...},
+             "answer_source": "template" | "cheap_qa_llm" | "qa_llm"}   (not for cached answers)
+        or a single {"type": "error", "message": ...}. Timings are seconds since the call
+        for the Cypher, the rows, the first answer token and the whole answer.
+
+        Rows are fetched up to CONTEXT_TOKEN_BUDGET tokens. For a truncated result the answer
+        model is told the total row count; total_rows is None if it could not be counted.
+        Simple results are answered without the answer model (answer_formatter.py).
+
+        The Cypher comes from the question router's template when the question has a common
+        shape, else from the plan cache when a paraphrase of the question was answered
+        before; a template or reused plan that returns no rows falls back to the Cypher LLM. Cypher from
+        the LLM passes the guard (repaired once if rejected) before it runs; a statement
+        rejected twice does not run and the answer gets no rows. Cypher from the LLM that
+        returns rows is added to the plan cache.
         """
         if not self.qa_chain:
             logger.error("QA Chain is not initialized. Cannot process query.")
-            return {"result": "Error: RAG service not ready. Please check logs.", "intermediate_steps": []}
+            yield {"type": "error", "message": "Error: RAG service not ready. Please check logs."}
+            return
 
+        start = time.perf_counter()
+        timings = {}
+        root = tracing.span("query", question=query_text)
         try:
+            self._refresh_graph_version()
+            graph_version = self.answer_cache.graph_version
+            with tracing.span("query.answer_cache", parent=root) as span:
+                cached = self.answer_cache.get(query_text)
+                span.set(cache_hit=cached is not None)
+            if cached is not None:
+                logger.info(f"Answer cache hit for query: '{query_text}'")
+                for step in cached.get("intermediate_steps", []):
+                    if "query" in step:
+                        yield {"type": "cypher", "query": step["query"], "source": "answer_cache",
+                               "rejected": step.get("rejected", False)}
+                    if "context" in step:
+                        yield {"type": "rows", "context": step["context"], "truncated": step.get("truncated", False),
+                               "total_rows": step.get("total_rows", len(step["context"]))}
+                timings["first_token_seconds"] = timings["total_seconds"] = time.perf_counter() - start
+                root.set(cached=True)
+                yield {"type": "token", "text": cached["result"]}
+                yield {"type": "done", **cached, "cached": True, "timings": timings}
+                return
+
             logger.info(f"Processing query: '{query_text}'")
-            result = self.qa_chain.invoke({"query": query_text})
-            logger.info(f"Query processed. Result: {result.get('result')}")
-            return result
+            source, fetched, route, plan = "llm", None, None, None
+            if self.router:
+                with tracing.span("query.router", parent=root) as span:
+                    route = self.router.route(query_text)
+                    span.set(intent=route["intent"] if route else None)
+            if route:
+                logger.info(f"Routed to the '{route['intent']}' template: '{query_text}'")
+                checked = {"query": route["query"], "count_query": route["count_query"], "params": route["params"],
+                           "limit": route["limit"]}
+                with tracing.span("query.graph", parent=root, source="template") as span:
+                    fetched = self._run_cypher(checked, span)
+                if fetched["rows"]:
+                    source, cypher = "template", route["query"]
+                else:
+                    logger.info("Template returned no rows; trying the plan cache.")
+            if source == "llm":
+                with tracing.span("query.plan_cache", parent=root) as span:
+                    plan = self.plan_cache.lookup(query_text)
+                    span.set(cache_hit=plan is not None, similarity=plan[1] if plan else None)
+            if plan:
+                cypher, similarity = plan
+                logger.info(f"Cypher plan cache hit (similarity {similarity:.2f}) for query: '{query_text}'")
+                try:
+                    # Plans were checked when first generated; only the text checks run again.
+                    checked = self.cypher_guard.check(cypher, explain=False)
+                except UnsafeCypher as e:
+                    logger.warning(f"Planned Cypher rejected by the '{e.guard}' guard: {e}")
+                    checked = None
+                if checked:
+                    with tracing.span("query.graph", parent=root, source="plan_cache") as span:
+                        fetched = self._run_cypher(checked, span)
+                    if fetched["rows"]:
+                        source, cypher = "plan_cache", checked["query"]
+                    else:
+                        logger.info("Planned Cypher returned no rows; generating Cypher instead.")
+            if source == "llm":
+                with tracing.span("query.cypher_generation", parent=root) as span:
+                    cypher = self._generate_cypher(query_text, span)
+                cypher, checked = self._guard_cypher(query_text, cypher, root)
+                if checked:
+                    cypher = checked["query"]
+                timings["cypher_seconds"] = time.perf_counter() - start
+                yield {"type": "cypher", "query": cypher, "source": source, "rejected": checked is None}
+                with tracing.span("query.graph", parent=root, source="llm") as span:
+                    fetched = self._run_cypher(checked, span)
+                if fetched["rows"]:
+                    # Without the guard's LIMIT, which it adds again when the plan is reused.
+                    self.plan_cache.add(query_text, checked["count_query"])
+            else:
+                timings["cypher_seconds"] = time.perf_counter() - start
+                yield {"type": "cypher", "query": cypher, "source": source, "rejected": False}
+            timings["rows_seconds"] = time.perf_counter() - start
+            context = fetched["rows"]
+            yield {"type": "rows", "context": context, "truncated": fetched["truncated"],
+                   "total_rows": fetched["total_rows"]}
+
+            chunks = []
+            answer_span = tracing.span("query.answer", parent=root)
+            try:
+                answer_source = yield from self._stream_answer(query_text, fetched, cypher if checked else None,
+                                                               chunks, timings, start, answer_span)
+            finally:
+                answer_span.set(chunks=len(chunks)).end()
+            result = "".join(chunks)
+            timings["total_seconds"] = time.perf_counter() - start
+            timings.setdefault("first_token_seconds", timings["total_seconds"])
+            logger.info(f"Query processed in {timings['total_seconds']:.2f}s "
+                        f"(first token after {timings['first_token_seconds']:.2f}s). "
+                        f"Result: {result}")
+
+            context_step = {"context": context}
+            if fetched["truncated"]:
+                context_step.update(truncated=True, total_rows=fetched["total_rows"])
+            query_step = {"query": cypher}
+            if source == "template":
+                query_step["params"] = route["params"]
+            if checked is None:
+                query_step["rejected"] = True
+            intermediate_steps = [query_step, context_step]
+            # An answer without rows because the guard rejected the Cypher is not cached.
+            if result and checked is not None:
+                self.answer_cache.put(query_text, {"result": result, "intermediate_steps": intermediate_steps},
+                                      graph_version=graph_version)
+            root.set(cached=False, cypher_source=source, answer_source=answer_source,
+                     first_token_ms=round(timings["first_token_seconds"] * 1000, 3))
+            yield {"type": "done", "result": result, "intermediate_steps": intermediate_steps,
+                   "cached": False, "cypher_source": source, "answer_source": answer_source, "timings": timings}
         except Exception as e:
             logger.error(f"Error during graph query for '{query_text}': {e}")
-            return {"result": f"An error occurred while querying the graph: {e}", "intermediate_steps": []}
+            root.set(error=f"{type(e).__name__}: {e}")
+            yield {"type": "error", "message": f"An error occurred while querying the graph: {e}"}
+        finally:
+            root.end()
 
-# Global instance of the service (initially None)
-graph_rag_service = None
+    def query_graph(self, query_text: str) -> dict:
+        """
+        Executes a natural language query against the graph RAG chain.
+        Returns a dictionary containing the result and intermediate steps,
+        with "cached" set if it came from the answer cache.
+        """
+        for event in self.stream_query(query_text):
+            if event["type"] == "done":
+                return {key: value for key, value in event.items() if key != "type"}
+            if event["type"] == "error":
+                return {"result": event["message"], "intermediate_steps": []}
+        return {"result": "", "intermediate_steps": []}
 
-if __name__ == "__main__":
-    print("--- Initializing Neo4j Graph Connection ---")
-    neo4j_graph_instance = None
+def _usage_tracking():
+    """
+    Returns (callback handler, runnable config) that collect LLM token usage while tracing
+    is on, or (None, None).
+    """
+    if not tracing.enabled():
+        return None, None
+    handler = UsageMetadataCallbackHandler()
+    return handler, {"callbacks": [handler]}
 
-    if not all([NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD]):
-        logger.error("Neo4j connection details (URI, Username, Password) are not fully set in environment variables. Please check your .env file.")
-    else:
+def _token_counts(handler):
+    if handler is None:
+        return {}
+    usage = handler.usage_metadata.values()
+    return {"prompt_tokens": sum(u.get("input_tokens", 0) for u in usage),
+            "completion_tokens": sum(u.get("output_tokens", 0) for u in usage)}
+
+class _DeferredNeo4jGraph(Neo4jGraph):
+    """
+    A Neo4jGraph that can be created while Neo4j is unreachable: its driver connects on
+    demand, so queries fail until Neo4j is back and then succeed. connect_error holds the
+    error seen at creation, or None.
+    """
+    def __init__(self, **kwargs):
+        self.connect_error = None
         try:
-            # Test basic connectivity first
-            temp_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
-            temp_driver.verify_connectivity()
-            temp_driver.close() # Close temporary driver
-
-            neo4j_graph_instance = Neo4jGraph(
-                url=NEO4J_URI,
-                username=NEO4J_USERNAME,
-                password=NEO4J_PASSWORD,
-                enhanced_schema=True
-            )
-            neo4j_graph_instance.refresh_schema()
-            logger.info("Successfully created and refreshed Neo4jGraph instance.")
-            logger.info(f"Neo4j Graph Schema: \n{neo4j_graph_instance.schema}")
+            super().__init__(**kwargs)
+        except ValueError as e:
+            # Neo4jGraph builds its driver before it verifies connectivity; only an
+            # unreachable server is deferred, not bad credentials or configuration.
+            if getattr(self, "_driver", None) is None or not isinstance(e.__context__, ServiceUnavailable):
+                raise
+            self.connect_error = e
 
-        except Exception as e:
-            logger.error(f"An unexpected error occurred during Neo4jGraph initialization: {e}")
+def connect_graph(snapshot_path=SCHEMA_SNAPSHOT_PATH, allow_offline=False):
+    """
+    Connects to Neo4j and loads the graph schema from the snapshot at snapshot_path.
+    Only when there is no usable snapshot is the full schema read now (and saved).
+    With allow_offline, an unreachable Neo4j is not an error as long as the schema
+    snapshot loads. Returns (Neo4jGraph, SchemaSnapshot).
+    """
+    graph = _DeferredNeo4jGraph(
+        url=NEO4J_URI,
+        username=NEO4J_USERNAME,
+        password=NEO4J_PASSWORD,
+        enhanced_schema=True,
+        refresh_schema=False,
+    )
+    snapshot = SchemaSnapshot(snapshot_path)
+    if snapshot.load(enhanced=True):
+        if graph.connect_error is not None and not allow_offline:
+            raise graph.connect_error
+        snapshot.apply(graph)
+        logger.info(f"Loaded the graph schema from '{snapshot_path}'.")
+    elif graph.connect_error is not None:
+        raise graph.connect_error
+    else:
+        logger.info(f"No schema snapshot at '{snapshot_path}'; reading the full schema.")
+        fingerprint = schema_fingerprint(graph)
+        graph.refresh_schema()
+        snapshot.capture(graph, fingerprint)
+    return graph, snapshot
 
- 
-    if neo4j_graph_instance:
-        graph_rag_service = GraphRAGService(neo4j_graph_instance)
+def create_graph_rag_service():
+    """
+    Connects to Neo4j and builds a GraphRAGService, or returns None if that fails. If
+    Neo4j is unreachable but the graph and schema snapshots load, the service starts
+    anyway and answers what the graph snapshot can until Neo4j is back.
+    """
+    if not all([NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD]):
+        logger.error("Neo4j connection details (URI, Username, Password) are not fully set in environment variables. Please check your .env file.")
+        return None
+    graph_snapshot = GraphSnapshot(GRAPH_SNAPSHOT_PATH)
+    if graph_snapshot.load():
+        logger.info(f"Mapped the graph snapshot at '{GRAPH_SNAPSHOT_PATH}' ({len(graph_snapshot)} nodes).")
     else:
+        graph_snapshot = None
+    try:
+        neo4j_graph_instance, snapshot = connect_graph(SCHEMA_SNAPSHOT_PATH, allow_offline=graph_snapshot is not None)
+        if neo4j_graph_instance.connect_error is not None:
+            logger.warning(f"Neo4j is unreachable ({neo4j_graph_instance.connect_error}); starting from the "
+                           f"graph snapshot at '{GRAPH_SNAPSHOT_PATH}' and the schema snapshot.")
+        else:
+            logger.info("Successfully created Neo4jGraph instance.")
+        logger.info(f"Neo4j Graph Schema: \n{neo4j_graph_instance.schema}")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during Neo4jGraph initialization: {e}")
         logger.critical("GraphRAGService cannot be initialized due to Neo4j connection failure.")
+        return None
+    if tracing.start_metrics_server():
+        logger.info(f"Serving Prometheus metrics on port {tracing.METRICS_PORT}.")
+    return GraphRAGService(neo4j_graph_instance, schema_snapshot=snapshot, graph_snapshot=graph_snapshot)
+
+# Global instance of the service (initially None)
+graph_rag_service = None
+
+if __name__ == "__main__":
+    print("--- Initializing Neo4j Graph Connection ---")
+    graph_rag_service = create_graph_rag_service()
 
     # --- Testing Graph RAG Service ---
     print("\n--- Testing Graph RAG Service ---")
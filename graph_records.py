@@ -0,0 +1,166 @@
+"""
+Compact, machine-readable graph records extracted by generate_cypher.py --format json.
+
+The LLM answers with a JSON object that follows EXTRACTION_SCHEMA (enforced with OpenAI
+structured outputs): nodes with a document-local id, a label, a name and properties,
+and relationships between those ids. After validation, each document is stored as JSONL
+with one record per line. Nodes are identified by (label, name) and relationship endpoints
+are resolved to that identity, so records from different documents can be batched and
+deduplicated:
+
+    {"label":"Spacecraft","name":"INSAT-3D","properties":{"launch_mass_kg":2000}}
+    {"type":"ORBITS_IN","start":["Spacecraft","INSAT-3D"],"end":["Orbit","Geostationary"]}
+"""
+import json
+import re
+
+# Labels, relationship types and property names end up in Cypher, so they must be plain identifiers.
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Strict structured outputs do not allow free-form maps, so properties are key/value pairs.
+EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "nodes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string"},
+                    "label": {"type": "string"},
+                    "name": {"type": "string"},
+                    "properties": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "key": {"type": "string"},
+                                "value": {"anyOf": [{"type": "string"}, {"type": "number"}, {"type": "boolean"}]},
+                            },
+                            "required": ["key", "value"],
+                            "additionalProperties": False,
+                        },
+                    },
+                },
+                "required": ["id", "label", "name", "properties"],
+                "additionalProperties": False,
+            },
+        },
+        "relationships": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "source": {"type": "string"},
+                    "type": {"type": "string"},
+                    "target": {"type": "string"},
+                },
+                "required": ["source", "type", "target"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["nodes", "relationships"],
+    "additionalProperties": False,
+}
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "graph_extraction", "strict": True, "schema": EXTRACTION_SCHEMA},
+}
+
+def sanitize_identifier(name):
+    """
+    Turns a label, relationship type or property name into a Cypher identifier
+    ('Data Product' -> 'Data_Product'). Returns None if nothing usable is left.
+    """
+    name = re.sub(r"\W+", "_", str(name).strip()).strip("_")
+    if name and name[0].isdigit():
+        name = f"_{name}"
+    return name if name and IDENTIFIER_RE.match(name) else None
+
+def _property_map(pairs):
+    properties = {}
+    for pair in pairs or []:
+        if not isinstance(pair, dict):
+            continue
+        key = sanitize_identifier(pair.get("key", ""))
+        value = pair.get("value")
+        if key and isinstance(value, (str, int, float, bool)) and value != "":
+            properties[key] = value
+    return properties
+
+def validate_extraction(payload):
+    """
+    Checks an extraction against what the loader needs and converts it to records.
+
+    Nodes without a usable label or name are dropped, as are relationships whose endpoints
+    are not among the valid nodes. Nodes repeated under another id are merged.
+    Returns (node records, relationship records, number of dropped items).
+    """
+    nodes = {}
+    endpoints = {}
+    dropped = 0
+    for node in payload.get("nodes", []):
+        label = sanitize_identifier(node.get("label", ""))
+        name = str(node.get("name", "")).strip()
+        if not label or not name:
+            dropped += 1
+            continue
+        record = nodes.setdefault((label, name), {"label": label, "name": name, "properties": {}})
+        record["properties"].update(_property_map(node.get("properties")))
+        record["properties"].pop("name", None)
+        endpoints[node.get("id")] = (label, name)
+
+    relationships = {}
+    for relationship in payload.get("relationships", []):
+        rel_type = sanitize_identifier(relationship.get("type", ""))
+        start = endpoints.get(relationship.get("source"))
+        end = endpoints.get(relationship.get("target"))
+        if not rel_type or start is None or end is None:
+            dropped += 1
+            continue
+        relationships.setdefault((rel_type, start, end), {"type": rel_type, "start": list(start), "end": list(end)})
+
+    return list(nodes.values()), list(relationships.values()), dropped
+
+def node_identity(record):
+    return record["label"], record["name"]
+
+def relationship_identity(record):
+    return record["type"], tuple(record["start"]), tuple(record["end"])
+
+def merge_records(record_lists):
+    """
+    Merges lists of records (e.g. from the chunks of one document, or from many documents)
+    into one list: nodes with the same label and name become one record whose properties
+    are combined, later values winning, and duplicate relationships are dropped.
+    Nodes come before relationships.
+    """
+    nodes = {}
+    relationships = {}
+    for records in record_lists:
+        for record in records:
+            if "type" in record:
+                relationships.setdefault(relationship_identity(record), record)
+            elif node_identity(record) in nodes:
+                nodes[node_identity(record)]["properties"].update(record["properties"])
+            else:
+                nodes[node_identity(record)] = {**record, "properties": dict(record["properties"])}
+    return list(nodes.values()) + list(relationships.values())
+
+def dumps_records(records):
+    """
+    Serializes records as compact JSONL.
+    """
+    return "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records)
+
+def loads_records(text):
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def load_records(path):
+    """
+    Reads a .jsonl file written by generate_cypher.py --format json.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return loads_records(f.read())
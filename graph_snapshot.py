@@ -0,0 +1,503 @@
+"""
+An in-process, memory-mapped snapshot of the graph for property lookups and 1-2 hop queries.
+
+The knowledge graph is small and read-mostly, yet every question pays a round trip to
+Neo4j, and a Neo4j outage takes the assistant down. export_snapshot() dumps the graph
+into a directory of flat NumPy arrays:
+  - strings.bin, string_offsets      every name, property key and value, interned once
+                                     (UTF-8); property values are kept as their JSON text
+  - node_labels, label_nodes         each node's labels and each label's nodes (CSR)
+  - node_prop_keys, node_prop_values each node's properties (CSR)
+  - rel_<i>_out, rel_<i>_in          adjacency per relationship type in both directions (CSR)
+  - name_slots, name_hashes          an open-addressing hash index from name to nodes
+  - meta.json                        labels, relationship types, counts and the graph
+                                     version stamp the snapshot was taken at
+GraphSnapshot memory-maps the arrays, so opening a snapshot costs next to nothing and its
+pages are shared by every process that opens it.
+
+GraphSnapshot.query() answers the read statements the question router and the Cypher LLM
+write for this graph: one MATCH path of up to MAX_HOPS relationships, anchored on a node
+given by name or label, with equality WHERE conditions and RETURN items that are
+properties, whole nodes or counts (grouped by the other items), optionally DISTINCT and
+LIMITed. Anything else raises UnsupportedQuery, and graph_rag_service.py sends it to Neo4j.
+
+Usage:
+    python graph_snapshot.py [--path graph_snapshot]
+"""
+import argparse
+import functools
+import json
+import os
+import shutil
+import time
+import zlib
+import numpy as np
+from cypher_bulk import UnsupportedStatement, _Parser
+from graph_version import GRAPH_VERSION_LABEL, read_graph_version
+
+DEFAULT_GRAPH_SNAPSHOT_PATH = "graph_snapshot"
+FORMAT_VERSION = 1
+MAX_HOPS = 2
+PARSE_CACHE_SIZE = 1024
+
+EXPORT_NODES_QUERY = (
+    f"MATCH (n) WHERE NOT n:{GRAPH_VERSION_LABEL} "
+    "RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS properties"
+)
+EXPORT_RELATIONSHIPS_QUERY = (
+    f"MATCH (a)-[r]->(b) WHERE NOT a:{GRAPH_VERSION_LABEL} AND NOT b:{GRAPH_VERSION_LABEL} "
+    "RETURN elementId(a) AS start, type(r) AS type, elementId(b) AS end"
+)
+
+class UnsupportedQuery(Exception):
+    pass
+
+def _name_hash(name):
+    return zlib.crc32(name.encode("utf-8"))
+
+# --- Writing ---
+def _csr(keys, size, *columns):
+    """
+    Groups columns by keys (ints below size). Returns (offsets, *columns sorted by key), so
+    that column[offsets[k]:offsets[k + 1]] holds the values of key k.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return (offsets, *(np.asarray(column, dtype=np.int32)[order] for column in columns))
+
+def _name_index(strings, names):
+    """
+    Returns (slots, hashes): a linear-probing table at most half full, whose slots hold
+    node + 1 (0 is empty) and the hash of that node's name.
+    """
+    named = [(node, _name_hash(strings[string])) for node, string in enumerate(names) if string >= 0]
+    size = 1 << max(3, (2 * len(named)).bit_length())
+    mask = size - 1
+    slots, hashes = [0] * size, [0] * size
+    for node, name_hash in named:
+        slot = name_hash & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot], hashes[slot] = node + 1, name_hash
+    return np.asarray(slots, dtype=np.int32), np.asarray(hashes, dtype=np.uint32)
+
+def write_snapshot(path, nodes, relationships, stamp=None):
+    """
+    Writes a snapshot directory at path, replacing any previous one.
+    nodes is an iterable of (key, labels, properties), relationships one of
+    (start key, type, end key); relationships to unknown keys are skipped.
+    Returns the snapshot's meta data.
+    """
+    strings, string_ids = [], {}
+
+    def intern(text):
+        index = string_ids.get(text)
+        if index is None:
+            index = string_ids[text] = len(strings)
+            strings.append(text)
+        return index
+
+    keys, label_ids = {}, {}
+    label_owners, node_label_ids, prop_owners, prop_keys, prop_values, names = [], [], [], [], [], []
+    for key, node_labels, properties in nodes:
+        if key in keys:
+            continue
+        node = keys[key] = len(keys)
+        for label in node_labels:
+            label_owners.append(node)
+            node_label_ids.append(label_ids.setdefault(label, len(label_ids)))
+        for prop, value in properties.items():
+            if value is not None:
+                prop_owners.append(node)
+                prop_keys.append(intern(prop))
+                prop_values.append(intern(json.dumps(value, ensure_ascii=False, default=str)))
+        name = properties.get("name")
+        names.append(intern(name) if isinstance(name, str) else -1)
+
+    adjacency, relationship_count = {}, 0
+    for start, rel_type, end in relationships:
+        if start in keys and end in keys:
+            starts, ends = adjacency.setdefault(rel_type, ([], []))
+            starts.append(keys[start])
+            ends.append(keys[end])
+            relationship_count += 1
+
+    count = len(keys)
+    arrays = {}
+    arrays["node_label_offsets"], arrays["node_labels"] = _csr(label_owners, count, node_label_ids)
+    arrays["label_offsets"], arrays["label_nodes"] = _csr(node_label_ids, len(label_ids), label_owners)
+    arrays["node_prop_offsets"], arrays["node_prop_keys"], arrays["node_prop_values"] = _csr(
+        prop_owners, count, prop_keys, prop_values)
+    arrays["node_names"] = np.asarray(names, dtype=np.int32)
+    for index, (starts, ends) in enumerate(adjacency.values()):
+        arrays[f"rel_{index}_out_offsets"], arrays[f"rel_{index}_out"] = _csr(starts, count, ends)
+        arrays[f"rel_{index}_in_offsets"], arrays[f"rel_{index}_in"] = _csr(ends, count, starts)
+    arrays["name_slots"], arrays["name_hashes"] = _name_index(strings, names)
+    encoded = [text.encode("utf-8") for text in strings]
+    arrays["string_offsets"] = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.asarray([len(data) for data in encoded], dtype=np.int64), out=arrays["string_offsets"][1:])
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "stamp": stamp,
+        "created_at": time.time(),
+        "nodes": count,
+        "relationships": relationship_count,
+        "labels": list(label_ids),
+        "relationship_types": list(adjacency),
+        "property_keys": {key: string_ids[key] for key in sorted({strings[k] for k in prop_keys})},
+    }
+    temporary = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(temporary, ignore_errors=True)
+    os.makedirs(temporary)
+    for name, array in arrays.items():
+        np.save(os.path.join(temporary, f"{name}.npy"), array)
+    with open(os.path.join(temporary, "strings.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+    with open(os.path.join(temporary, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    # Processes that still map the old files keep reading them until they reopen.
+    previous = None
+    if os.path.exists(path):
+        previous = f"{path}.old{os.getpid()}"
+        os.rename(path, previous)
+    os.rename(temporary, path)
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+    return meta
+
+def export_snapshot(graph, path=DEFAULT_GRAPH_SNAPSHOT_PATH):
+    """
+    Writes every node and relationship of a Neo4jGraph, except the version stamp node, to
+    a snapshot at path. The stamp is read first, so a load that runs during the export
+    leaves a snapshot with the old stamp, which the service will not use.
+    """
+    stamp = read_graph_version(graph)
+    nodes = ((row["id"], row["labels"], row["properties"]) for row in graph.query(EXPORT_NODES_QUERY))
+    relationships = ((row["start"], row["type"], row["end"]) for row in graph.query(EXPORT_RELATIONSHIPS_QUERY))
+    return write_snapshot(path, nodes, relationships, stamp)
+
+# --- Reading ---
+class _Parameter(str):
+    """
+    A $parameter in a parsed statement, bound to its value when the statement runs.
+    """
+
+def _bind(value, params):
+    if isinstance(value, _Parameter):
+        if value not in params:
+            raise UnsupportedQuery(f"missing parameter ${value}")
+        return params[value]
+    if isinstance(value, list):
+        return [_bind(item, params) for item in value]
+    return value
+
+class _QueryParser(_Parser):
+    """
+    cypher_bulk's parser, with $parameters allowed where it expects literals.
+    """
+    def literal(self):
+        if self.peek() != "$":
+            return super().literal()
+        self.take()
+        return _Parameter(self.identifier())
+
+class GraphSnapshot:
+    """
+    A snapshot written by write_snapshot(), memory-mapped read-only (see module docstring).
+    Nodes are ints; load() must succeed before anything else is called.
+    """
+    def __init__(self, path=DEFAULT_GRAPH_SNAPSHOT_PATH):
+        self.path = path
+        self.meta = None
+        self.stamp = None
+
+    def load(self):
+        """
+        Maps the snapshot at path. Returns False if it is missing, unreadable or of
+        another format version.
+        """
+        try:
+            with open(os.path.join(self.path, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") != FORMAT_VERSION:
+                return False
+            # Plain ndarray views of the maps: slicing a np.memmap costs several times more.
+            arrays = {name[:-4]: np.load(os.path.join(self.path, name), mmap_mode="r").view(np.ndarray)
+                      for name in os.listdir(self.path) if name.endswith(".npy")}
+            strings_path = os.path.join(self.path, "strings.bin")
+            strings = (np.memmap(strings_path, dtype=np.uint8, mode="r").view(np.ndarray)
+                       if os.path.getsize(strings_path) else np.zeros(0, dtype=np.uint8))
+        except (OSError, ValueError):
+            return False
+        self.meta, self.stamp = meta, meta["stamp"]
+        self._arrays, self._strings = arrays, strings
+        self._string_offsets = arrays["string_offsets"]
+        self._label_ids = {label: index for index, label in enumerate(meta["labels"])}
+        self._rel_ids = {rel_type: index for index, rel_type in enumerate(meta["relationship_types"])}
+        self._key_ids = meta["property_keys"]
+        self._name_key = self._key_ids.get("name")
+        self._mask = len(arrays["name_slots"]) - 1
+        return True
+
+    def __len__(self):
+        return self.meta["nodes"]
+
+    def string(self, index):
+        return bytes(self._strings[self._string_offsets[index]:self._string_offsets[index + 1]]).decode("utf-8")
+
+    # --- Lookups ---
+    def find(self, name):
+        """
+        Returns the nodes whose name is exactly name.
+        """
+        name_hash = _name_hash(name)
+        slots, hashes, names = self._arrays["name_slots"], self._arrays["name_hashes"], self._arrays["node_names"]
+        found, slot = [], name_hash & self._mask
+        while slots[slot]:
+            node = int(slots[slot]) - 1
+            if hashes[slot] == name_hash and self.string(names[node]) == name:
+                found.append(node)
+            slot = (slot + 1) & self._mask
+        return found
+
+    def labels(self, node):
+        offsets = self._arrays["node_label_offsets"]
+        return [self.meta["labels"][i] for i in self._arrays["node_labels"][offsets[node]:offsets[node + 1]]]
+
+    def has_label(self, node, label):
+        label_id = self._label_ids.get(label)
+        offsets = self._arrays["node_label_offsets"]
+        return label_id is not None and label_id in self._arrays["node_labels"][offsets[node]:offsets[node + 1]]
+
+    def nodes_with_label(self, label):
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            return []
+        offsets = self._arrays["label_offsets"]
+        return self._arrays["label_nodes"][offsets[label_id]:offsets[label_id + 1]].tolist()
+
+    def properties(self, node):
+        offsets = self._arrays["node_prop_offsets"]
+        start, end = offsets[node], offsets[node + 1]
+        return {self.string(key): json.loads(self.string(value)) for key, value in
+                zip(self._arrays["node_prop_keys"][start:end], self._arrays["node_prop_values"][start:end])}
+
+    def property(self, node, key):
+        if key == "name" and self._name_key is not None:
+            name = self._arrays["node_names"][node]
+            if name >= 0:
+                return self.string(name)
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            return None
+        offsets = self._arrays["node_prop_offsets"]
+        start, end = offsets[node], offsets[node + 1]
+        for index, candidate in enumerate(self._arrays["node_prop_keys"][start:end].tolist()):
+            if candidate == key_id:
+                return json.loads(self.string(self._arrays["node_prop_values"][start + index]))
+        return None
+
+    def neighbors(self, node, rel_type, outgoing=True):
+        """
+        Returns the nodes at the other end of node's rel_type relationships, in the
+        given direction.
+        """
+        rel_id = self._rel_ids.get(rel_type)
+        if rel_id is None:
+            return []
+        direction = "out" if outgoing else "in"
+        offsets = self._arrays[f"rel_{rel_id}_{direction}_offsets"]
+        return self._arrays[f"rel_{rel_id}_{direction}"][offsets[node]:offsets[node + 1]].tolist()
+
+    def entity_names(self):
+        """
+        Returns (name, first label) for every named node, like cypher_plan_cache.load_entity_names.
+        """
+        names = self._arrays["node_names"]
+        return [(self.string(names[node]), labels[0]) for node in np.flatnonzero(names >= 0).tolist()
+                if (labels := self.labels(node))]
+
+    # --- Queries ---
+    def supports(self, query, params=None):
+        """
+        Returns whether query() can answer query with params, without running it.
+        """
+        try:
+            self._bind_query(query, params or {})
+        except UnsupportedQuery:
+            return False
+        return True
+
+    def query(self, query, params=None):
+        """
+        Runs a read statement of the subset in the module docstring, returning rows like
+        Neo4jGraph.query (nodes as property maps). Raises UnsupportedQuery otherwise.
+        """
+        path, rels, distinct, items, limit, positions, conditions, anchor = self._bind_query(query, params or {})
+
+        def matches(node, index):
+            label = path[index][1]
+            return (label is None or self.has_label(node, label)) and \
+                all(self.property(node, prop) == value for prop, value in conditions[index])
+
+        name = next((value for prop, value in conditions[anchor] if prop == "name"), None)
+        candidates = self.find(name) if isinstance(name, str) else self.nodes_with_label(path[anchor][1])
+        bindings = [{anchor: node} for node in candidates if matches(node, anchor)]
+        for index in range(anchor + 1, len(path)):
+            _, rel_type, points_right = rels[index - 1]
+            bindings = [{**binding, index: node} for binding in bindings
+                        for node in self.neighbors(binding[index - 1], rel_type, points_right) if matches(node, index)]
+        for index in range(anchor - 1, -1, -1):
+            _, rel_type, points_right = rels[index]
+            bindings = [{**binding, index: node} for binding in bindings
+                        for node in self.neighbors(binding[index + 1], rel_type, not points_right) if matches(node, index)]
+        if len(rels) == 2 and rels[0][1] == rels[1][1] and rels[0][2] != rels[1][2]:
+            # (a)-[:T]->(b)<-[:T]-(c) with c = a would use one relationship twice, which
+            # Cypher does not match (MERGE leaves no parallel relationships of one type).
+            bindings = [binding for binding in bindings if binding[0] != binding[2]]
+        return self._project(bindings, positions, items, distinct, limit)
+
+    def _bind_query(self, query, params):
+        """
+        Parses query and binds params. Returns (path, rels, distinct, items, limit, variable
+        positions, conditions per path node, anchor index) or raises UnsupportedQuery.
+        """
+        path, rels, where, distinct, items, limit = _parse(query)
+        path = [(var, label, {key: _bind(value, params) for key, value in (props or {}).items()})
+                for var, label, props in path]
+        where = [(var, prop, _bind(value, params)) for var, prop, value in where]
+        limit = _bind(limit, params)
+        if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool)):
+            raise UnsupportedQuery("LIMIT is not an integer")
+        positions = {var: index for index, (var, _, _) in enumerate(path) if var}
+        if len(positions) != len([var for var, _, _ in path if var]):
+            raise UnsupportedQuery("a variable is bound twice")
+        conditions = [list(props.items()) for _, _, props in path]
+        for var, prop, value in where:
+            if var not in positions:
+                raise UnsupportedQuery(f"WHERE on an unknown or relationship variable {var!r}")
+            conditions[positions[var]].append((prop, value))
+        for kind, var, _, _ in items:
+            if var != "*" and var not in positions:
+                raise UnsupportedQuery(f"RETURN of an unknown or relationship variable {var!r}")
+
+        anchor = next((index for index, props in enumerate(conditions)
+                       if any(prop == "name" and isinstance(value, str) for prop, value in props)), None)
+        if anchor is None:
+            anchor = next((index for index, (_, label, _) in enumerate(path) if label), None)
+        if anchor is None:
+            raise UnsupportedQuery("no node is given by name or label")
+        return path, rels, distinct, items, limit, positions, conditions, anchor
+
+    def _project(self, bindings, positions, items, distinct, limit):
+        def value(binding, kind, var, prop):
+            node = binding[positions[var]]
+            return self.property(node, prop) if kind == "property" else self.properties(node)
+
+        if any(kind == "count" for kind, _, _, _ in items):
+            groups = {}
+            for binding in bindings:
+                row = {alias: None if kind == "count" else value(binding, kind, var, prop)
+                       for kind, var, prop, alias in items}
+                key = json.dumps(row, sort_keys=True, default=str)
+                groups.setdefault(key, [row, 0])[1] += 1
+            if not groups and all(kind == "count" for kind, _, _, _ in items):
+                groups[""] = [{alias: None for _, _, _, alias in items}, 0]
+            rows = [{alias: size if kind == "count" else row[alias] for kind, _, _, alias in items}
+                    for row, size in groups.values()]
+        else:
+            rows = [{alias: value(binding, kind, var, prop) for kind, var, prop, alias in items} for binding in bindings]
+            if distinct:
+                rows = list({json.dumps(row, sort_keys=True, default=str): row for row in rows}.values())
+        return rows[:limit] if limit is not None else rows
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(query):
+    """
+    Parses a statement of the subset GraphSnapshot.query answers. Returns (path nodes as
+    (var, label, props), relationships as (var, type, points_right), WHERE conditions as
+    (var, prop, value), distinct, RETURN items as (kind, var, prop, alias), limit), with
+    $parameters left as _Parameter values. Parses are cached: the router's templates and
+    reused plans repeat with other parameters.
+    """
+    parser = _QueryParser(query)
+    try:
+        parser.take("MATCH")
+        path, rels = [parser.node()], []
+        while parser.peek() in ("-", "<"):
+            var, rel_type, props, points_right = parser.relationship()
+            if props:
+                raise UnsupportedStatement("relationship properties")
+            rels.append((var, rel_type, points_right))
+            path.append(parser.node())
+        if len(rels) > MAX_HOPS:
+            raise UnsupportedStatement(f"more than {MAX_HOPS} relationships")
+        where = []
+        if parser.peek().upper() == "WHERE":
+            parser.take()
+            while True:
+                var = parser.identifier()
+                parser.take(".")
+                prop = parser.identifier()
+                parser.take("=")
+                where.append((var, prop, parser.literal()))
+                if parser.peek().upper() != "AND":
+                    break
+                parser.take()
+        parser.take("RETURN")
+        distinct = parser.peek().upper() == "DISTINCT"
+        if distinct:
+            parser.take()
+        items = [_return_item(parser)]
+        while parser.peek() == ",":
+            parser.take()
+            items.append(_return_item(parser))
+        limit = None
+        if parser.peek().upper() == "LIMIT":
+            parser.take()
+            limit = parser.literal()
+        if parser.peek() == ";":
+            parser.take()
+        if parser.peek():
+            raise UnsupportedStatement(f"unexpected {parser.peek()!r}")
+    except UnsupportedStatement as e:
+        raise UnsupportedQuery(str(e)) from e
+    return tuple(path), tuple(rels), tuple(where), distinct, tuple(items), limit
+
+def _return_item(parser):
+    if parser.peek().lower() == "count" and parser.peek(1) == "(":
+        parser.take()
+        parser.take("(")
+        var = parser.take() if parser.peek() == "*" else parser.identifier()
+        parser.take(")")
+        kind, prop, column = "count", None, f"count({var})"
+    else:
+        var = parser.identifier()
+        prop = None
+        if parser.peek() == ".":
+            parser.take()
+            prop = parser.identifier()
+        kind, column = ("property", f"{var}.{prop}") if prop else ("node", var)
+    if parser.peek().upper() == "AS":
+        parser.take()
+        column = parser.identifier()
+    return kind, var, prop, column
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from langchain_neo4j import Neo4jGraph
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Export the Neo4j graph into a memory-mapped snapshot.")
+    parser.add_argument("--path", default=os.getenv("GRAPH_SNAPSHOT_PATH", DEFAULT_GRAPH_SNAPSHOT_PATH),
+                        help="Snapshot directory to write.")
+    args = parser.parse_args()
+    graph = Neo4jGraph(url=os.getenv("NEO4J_URI"), username=os.getenv("NEO4J_USERNAME"),
+                       password=os.getenv("NEO4J_PASSWORD"), refresh_schema=False)
+    start = time.perf_counter()
+    meta = export_snapshot(graph, args.path)
+    print(f"Exported {meta['nodes']} nodes and {meta['relationships']} relationships of "
+          f"{len(meta['relationship_types'])} types to '{args.path}' in {time.perf_counter() - start:.1f}s.")
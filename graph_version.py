@@ -0,0 +1,37 @@
+"""
+A version stamp for the contents of the graph.
+
+upload_to_neo4j.py bumps it after every load that changed the graph. Anything derived
+from the graph's contents (such as cached answers in graph_rag_service.py) is only
+valid for the stamp it was computed under. The stamp is stored in a single node whose
+label is excluded from the schema shown to the LLM. Each bump sets a fresh random
+stamp, so a recreated database never repeats an old one.
+"""
+GRAPH_VERSION_LABEL = '_GraphVersion'
+
+READ_GRAPH_VERSION_QUERY = (
+    f"MATCH (v:{GRAPH_VERSION_LABEL} {{id: 'graph'}}) "
+    "RETURN v.stamp AS stamp, v.version AS version"
+)
+
+BUMP_GRAPH_VERSION_QUERY = (
+    f"MERGE (v:{GRAPH_VERSION_LABEL} {{id: 'graph'}}) "
+    "SET v.version = coalesce(v.version, 0) + 1, v.stamp = randomUUID(), v.updated_at = datetime() "
+    "RETURN v.stamp AS stamp, v.version AS version"
+)
+
+def read_graph_version(graph):
+    """
+    Returns the current stamp from a Neo4jGraph, or None if the graph was never loaded
+    by upload_to_neo4j.py.
+    """
+    rows = graph.query(READ_GRAPH_VERSION_QUERY)
+    return rows[0]["stamp"] if rows else None
+
+def bump_graph_version(driver):
+    """
+    Sets a new stamp through a neo4j driver and returns (stamp, version number).
+    """
+    with driver.session() as session:
+        record = session.execute_write(lambda tx: tx.run(BUMP_GRAPH_VERSION_QUERY).single())
+    return record["stamp"], record["version"]
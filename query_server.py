@@ -0,0 +1,187 @@
+"""
+Asynchronous HTTP API for GraphRAGService.
+
+    POST /query   {"question": "..."}  ->  {"result": ..., "intermediate_steps": [...], "cached": ..., "coalesced": ...}
+    GET  /healthz                      ->  {"status": "ok"} or 503 while the service is not ready
+    GET  /stats                        ->  request counters, answer/plan cache and Cypher guard stats
+    GET  /metrics                      ->  tracing metrics in the Prometheus text format
+
+GraphRAGService is synchronous, so each question runs in a thread pool of --workers
+threads; the service itself bounds concurrent LLM and database calls (LLM_CONCURRENCY,
+DB_CONCURRENCY). Identical questions (after normalize_question) that arrive while one is
+already being answered share that single execution instead of starting their own.
+
+At most --max-pending distinct questions are executing or waiting for a thread at once; a
+new question beyond that gets 429 with a Retry-After header. A request that waits longer
+than --timeout seconds gets 504, but its execution keeps running, so the answer still
+lands in the answer cache and later identical requests can join it.
+
+Usage:
+    python query_server.py --port 8080 --workers 16 --max-pending 64 --timeout 60
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from answer_cache import normalize_question
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# --- Server Configuration ---
+DEFAULT_WORKERS = int(os.getenv("QUERY_SERVER_WORKERS", 16))
+DEFAULT_MAX_PENDING = int(os.getenv("QUERY_SERVER_MAX_PENDING", 64))
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("QUERY_SERVER_TIMEOUT_SECONDS", 60))
+RETRY_AFTER_SECONDS = 1
+
+SERVICE_KEY = web.AppKey("service", object)
+SERVER_KEY = web.AppKey("query_server", object)
+
+def json_response(data, status=200, headers=None):
+    # Rows from Neo4j can hold dates and other values json does not know.
+    return web.json_response(data, status=status, headers=headers, dumps=lambda obj: json.dumps(obj, default=str))
+
+class QueryServer:
+    """
+    Runs GraphRAGService.query_graph in a thread pool with single-flight coalescing,
+    a bound on pending executions and a per-request timeout (see module docstring).
+    """
+    def __init__(self, service, max_workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 request_timeout=DEFAULT_TIMEOUT_SECONDS, single_flight=True):
+        self.service = service
+        self.max_pending = max_pending
+        self.request_timeout = request_timeout
+        self.single_flight = single_flight
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query")
+        self._in_flight = {}
+        self._next_id = 0
+        self.stats = {"requests": 0, "executions": 0, "coalesced": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+
+    def _execution(self, question):
+        """
+        Returns (future, coalesced) for the execution answering question, joining one
+        already in flight if possible, or None if max_pending executions are in flight.
+        """
+        key = normalize_question(question)
+        if not self.single_flight:
+            # Every request is its own execution; the unique key only serves the pending count.
+            self._next_id += 1
+            key = (key, self._next_id)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return future, True
+        if len(self._in_flight) >= self.max_pending:
+            return None
+        future = asyncio.get_running_loop().run_in_executor(self.executor, self.service.query_graph, question)
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        self.stats["executions"] += 1
+        return future, False
+
+    async def handle_query(self, request):
+        self.stats["requests"] += 1
+        try:
+            body = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return json_response({"error": "Request body must be JSON."}, status=400)
+        question = body.get("question") if isinstance(body, dict) else None
+        if not isinstance(question, str) or not question.strip():
+            return json_response({"error": "'question' must be a non-empty string."}, status=400)
+        if not getattr(self.service, "qa_chain", None):
+            return json_response({"error": "RAG service not ready. Please check logs."}, status=503)
+
+        execution = self._execution(question)
+        if execution is None:
+            self.stats["rejected"] += 1
+            return json_response({"error": "Too many questions in flight; retry later."}, status=429,
+                                 headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+        future, coalesced = execution
+        try:
+            # shield: a timed-out or disconnected request must not cancel the shared execution.
+            response = await asyncio.wait_for(asyncio.shield(future), self.request_timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            return json_response({"error": f"No answer within {self.request_timeout:g}s."}, status=504)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error answering '{question}': {e}")
+            return json_response({"error": f"An error occurred while querying the graph: {e}"}, status=500)
+        return json_response({**response, "coalesced": coalesced})
+
+    async def handle_healthz(self, request):
+        if not getattr(self.service, "qa_chain", None):
+            return json_response({"status": "not ready"}, status=503)
+        return json_response({"status": "ok"})
+
+    async def handle_stats(self, request):
+        stats = {**self.stats, "in_flight": len(self._in_flight)}
+        answer_cache = getattr(self.service, "answer_cache", None)
+        plan_cache = getattr(self.service, "plan_cache", None)
+        if answer_cache is not None:
+            stats["answer_cache"] = {**answer_cache.stats, "hit_rate": answer_cache.hit_rate()}
+        if plan_cache is not None:
+            stats["plan_cache"] = {**plan_cache.stats, "hit_rate": plan_cache.hit_rate()}
+        router = getattr(self.service, "router", None)
+        if router is not None:
+            stats["router"] = {**router.stats, "hit_rate": router.hit_rate()}
+        answer_formatter = getattr(self.service, "answer_formatter", None)
+        if answer_formatter is not None:
+            stats["answers"] = {**answer_formatter.stats, "formatted_share": answer_formatter.formatted_share()}
+        if getattr(self.service, "graph_snapshot", None) is not None:
+            stats["graph_snapshot"] = dict(self.service.snapshot_stats)
+        cypher_guard = getattr(self.service, "cypher_guard", None)
+        if cypher_guard is not None:
+            stats["cypher_guard"] = dict(cypher_guard.stats)
+        return json_response(stats)
+
+    async def handle_metrics(self, request):
+        return web.Response(text=tracing.render_metrics(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Prometheus-Format": "0.0.4"})
+
+    async def close(self, app):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def create_app(service, max_workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+               request_timeout=DEFAULT_TIMEOUT_SECONDS, single_flight=True):
+    """
+    Builds the aiohttp application serving service.
+    """
+    server = QueryServer(service, max_workers, max_pending, request_timeout, single_flight)
+    app = web.Application()
+    app[SERVICE_KEY] = service
+    app[SERVER_KEY] = server
+    app.router.add_post("/query", server.handle_query)
+    app.router.add_get("/healthz", server.handle_healthz)
+    app.router.add_get("/stats", server.handle_stats)
+    app.router.add_get("/metrics", server.handle_metrics)
+    app.on_cleanup.append(server.close)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Threads answering questions.")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="Distinct questions in flight before new ones get 429.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS, help="Seconds before a request gets 504.")
+    parser.add_argument("--no-single-flight", action="store_true", help="Do not coalesce identical questions.")
+    parser.add_argument("--no-metrics", action="store_true", help="Do not trace queries for GET /metrics.")
+    args = parser.parse_args()
+
+    if not args.no_metrics:
+        tracing.configure(tracing.TRACE_PATH, metrics=True)
+
+    from graph_rag_service import create_graph_rag_service
+    service = create_graph_rag_service()
+    if service is None:
+        raise SystemExit("Graph RAG Service failed to initialize. Check previous error messages.")
+    app = create_app(service, args.workers, args.max_pending, args.timeout, not args.no_single_flight)
+    web.run_app(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
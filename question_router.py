@@ -0,0 +1,174 @@
+"""
+An LLM-free fast path for the most common question shapes.
+
+QuestionRouter templates a question with the entity gazetteer ("What instruments does
+INSAT-3D carry?" becomes "what instruments does <spacecraft> carry") and matches the
+template against INTENTS, a registry of question patterns, each mapped to a parameterized
+Cypher template. The labels, relationship types and properties a pattern names in words
+("instruments", "carry", "launch mass") are resolved against the graph schema, and a
+route is only taken when the resolution is unambiguous:
+  - count_label      "how many spacecraft are there"
+  - entity_property  "what is the launch mass of <spacecraft>", when exactly one property
+                     of the entity's label contains all the property words
+  - related_entities "what instruments does <spacecraft> carry", "which organization
+                     operates <spacecraft>", "which data products are processed by
+                     <organization>", when exactly one relationship type between the two
+                     labels starts like the verb
+Everything else returns None and goes to the Cypher LLM. Entity names are passed as
+parameters, so Neo4j caches one plan per template. Templates that list rows get
+" LIMIT <limit>"; the route also carries the statement without it, to count the rows of a
+result that reaches the limit.
+"""
+import re
+import threading
+from gazetteer import Gazetteer
+from cypher_plan_cache import template_question
+
+DEFAULT_LIMIT = 100
+VERB_PREFIX_CHARS = 4
+
+_SLOT = r"(?:the )?(?P<entity><[a-z_]+>)"
+# name -> (question template patterns, Cypher template); {label}, {other}, {type} and
+# {property} are filled in from the schema, $name is the entity named in the question.
+INTENTS = {
+    "count_label": (
+        [r"how many (?P<label>[a-z ]+?) (?:are there|exist|are in the graph|do you know)",
+         r"(?:what is|what's) the (?:number|count) of (?P<label>[a-z ]+?)"],
+        "MATCH (n:{label}) RETURN count(n) AS {alias}",
+    ),
+    "entity_property": (
+        [rf"(?:what is|what's|what was|what are|tell me|give me|show me) the (?P<property>[a-z0-9 ]+?) of {_SLOT}"],
+        "MATCH (n:{label} {{name: $name}}) RETURN n.{property} AS {property}",
+    ),
+    "related_entities": (
+        [rf"(?:what|which) (?P<other>[a-z ]+?) (?:does|do|did) {_SLOT} (?P<verb>[a-z]+)",
+         rf"(?:what|which|who) (?P<other>[a-z ]+?) (?P<verb>[a-z]+) {_SLOT}",
+         rf"(?:what|which) (?P<other>[a-z ]+?) (?:is|are|was|were) (?P<verb>[a-z]+) (?:by|on|aboard|with|from) {_SLOT}"],
+        # Outgoing from the named entity, or incoming to it.
+        ("MATCH (e:{label} {{name: $name}})-[:{type}]->(n:{other}) RETURN n.name AS {alias}",
+         "MATCH (n:{other})-[:{type}]->(e:{label} {{name: $name}}) RETURN n.name AS {alias}"),
+    ),
+}
+
+_COMPILED = {name: [re.compile(pattern + "$") for pattern in patterns] for name, (patterns, _) in INTENTS.items()}
+
+def _identifier(name):
+    return name if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name) else "`" + name.replace("`", "``") + "`"
+
+def _stem(word):
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def _name_words(name):
+    """
+    Splits a label, type or property name into stemmed lower-case words:
+    "DataProduct" -> ("data", "product"), "launch_mass_kg" -> ("launch", "mass", "kg").
+    """
+    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", name)
+    return tuple(_stem(word) for word in re.findall(r"[a-z0-9]+", spaced.lower()))
+
+def _phrase_words(phrase):
+    return tuple(_stem(word) for word in phrase.split())
+
+class QuestionRouter:
+    """
+    Routes questions to Cypher templates (see module docstring). route() returns
+    {"intent": ..., "query": ..., "count_query": ..., "limit": n or None, "params": {...}}
+    or None; stats counts lookups, hits per intent and misses.
+    """
+    def __init__(self, gazetteer=None, structured_schema=None, limit=DEFAULT_LIMIT):
+        self.limit = limit
+        self.gazetteer = gazetteer or Gazetteer([])
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "intents": {name: 0 for name in INTENTS}}
+        self._lock = threading.Lock()
+        self.set_schema(structured_schema or {})
+
+    def set_gazetteer(self, gazetteer):
+        self.gazetteer = gazetteer
+
+    def set_schema(self, structured_schema):
+        """
+        Indexes the labels, properties and relationship types of a structured graph schema.
+        """
+        node_props = structured_schema.get("node_props", {})
+        self._labels = {}
+        for label in node_props:
+            self._labels.setdefault(_name_words(label), label)
+        self._properties = {label: [prop["property"] for prop in props] for label, props in node_props.items()}
+        self._relationships = [(rel["start"], rel["type"], rel["end"])
+                               for rel in structured_schema.get("relationships", [])]
+
+    def route(self, question):
+        template, slots = template_question(question, self.gazetteer.find(question))
+        route = None
+        if len(slots) <= 1 and self._labels:
+            for name, patterns in _COMPILED.items():
+                for pattern in patterns:
+                    match = pattern.match(template)
+                    route = match and getattr(self, f"_{name}")(match, slots)
+                    if route:
+                        break
+                if route:
+                    break
+        with self._lock:
+            self.stats["lookups"] += 1
+            if route:
+                self.stats["hits"] += 1
+                self.stats["intents"][route["intent"]] += 1
+            else:
+                self.stats["misses"] += 1
+        return route
+
+    def hit_rate(self):
+        return self.stats["hits"] / self.stats["lookups"] if self.stats["lookups"] else 0.0
+
+    def _limited(self, intent, cypher, params):
+        return {"intent": intent, "query": f"{cypher} LIMIT {self.limit}", "count_query": cypher,
+                "limit": self.limit, "params": params}
+
+    # --- Intents ---
+    def _label(self, phrase):
+        return self._labels.get(_phrase_words(phrase))
+
+    def _count_label(self, match, slots):
+        label = self._label(match.group("label"))
+        if slots or not label:
+            return None
+        cypher = INTENTS["count_label"][1].format(label=_identifier(label), alias=_identifier("total" + label))
+        return {"intent": "count_label", "query": cypher, "count_query": cypher, "limit": None, "params": {}}
+
+    def _entity_property(self, match, slots):
+        if len(slots) != 1:
+            return None
+        name, label = slots[0]
+        wanted = set(_phrase_words(match.group("property")))
+        candidates = [prop for prop in self._properties.get(label, []) if wanted <= set(_name_words(prop))]
+        if len(candidates) != 1:
+            return None
+        cypher = INTENTS["entity_property"][1].format(label=_identifier(label), property=_identifier(candidates[0]))
+        return self._limited("entity_property", cypher, {"name": name})
+
+    def _related_entities(self, match, slots):
+        if len(slots) != 1:
+            return None
+        name, label = slots[0]
+        other = self._label(match.group("other"))
+        if not other:
+            return None
+        verb = _stem(match.group("verb"))[:VERB_PREFIX_CHARS]
+        candidates = [
+            (rel_type, start == label)
+            for start, rel_type, end in self._relationships
+            if {start, end} == {label, other} and _name_words(rel_type)[0].startswith(verb)
+        ]
+        if len(set(candidates)) != 1:
+            return None
+        rel_type, outgoing = candidates[0]
+        alias = other[0].lower() + other[1:] + "Name"
+        cypher = INTENTS["related_entities"][1][0 if outgoing else 1].format(
+            label=_identifier(label), other=_identifier(other), type=_identifier(rel_type),
+            alias=_identifier(alias))
+        return self._limited("related_entities", cypher, {"name": name})
@@ -0,0 +1,287 @@
+import argparse
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from cypher_bulk import UnsupportedStatement, format_map, node_identity, parse_map, translate_scripts
+from cypher_script import NODE_PATTERN_RE, quote_identifier
+
+INPUT_FOLDER = 'neo4j_cypher_queries'
+OUTPUT_FOLDER = 'neo4j_cypher_resolved'
+ALIAS_TABLE_FILENAME = 'entity_aliases.jsonl'
+
+# --- Matching Thresholds ---
+# Names that normalize to the same key are always merged. Beyond that, two names are only
+# merged when their character trigram Jaccard similarity reaches FUZZY_THRESHOLD and they
+# differ only in long words: numbers and short tokens ('3', 'D' vs 'DR') must match exactly,
+# so INSAT-3D and INSAT-3DR stay apart.
+FUZZY_THRESHOLD = 0.8
+MIN_FUZZY_WORD_LENGTH = 4
+# Trigrams shared by more names than this are too common to be useful for blocking and are
+# skipped, which bounds the number of comparisons per name.
+MAX_BLOCK_SIZE = 50
+
+STOPWORDS = {'the', 'a', 'an'}
+
+def name_tokens(name):
+    """
+    Normalizes a name into tokens: accents, case, punctuation and spacing are dropped,
+    '&' reads as 'and', letters and digits are split ('3D' -> '3', 'd') and plural
+    words are singularized, so 'INSAT-3D', 'Insat 3D' and 'insat3d' give the same tokens.
+    """
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    text = text.casefold().replace('&', ' and ')
+    tokens = []
+    for token in re.findall(r'[a-z]+|\d+', text):
+        if token in STOPWORDS and tokens == []:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def fuzzy_compatible(tokens_a, tokens_b):
+    """
+    Two token lists may only be fuzzy-matched if they have the same length and every
+    numeric or short token is identical.
+    """
+    if len(tokens_a) != len(tokens_b):
+        return False
+    for a, b in zip(tokens_a, tokens_b):
+        if a != b and (a.isdigit() or b.isdigit() or len(a) < MIN_FUZZY_WORD_LENGTH or len(b) < MIN_FUZZY_WORD_LENGTH):
+            return False
+    return True
+
+class EntityResolver:
+    """
+    Groups nodes of the same label whose names refer to the same entity.
+
+    Candidates are only compared within blocks: nodes whose names normalize to the same
+    key are merged outright, and fuzzy candidates come from a character-trigram index
+    (ignoring trigrams shared by more than MAX_BLOCK_SIZE names), so the work grows with
+    the number of names rather than with the number of pairs. Nodes that are merged on more
+    than a name must also agree on every other merge key they share, so an Imager with
+    6 channels is never merged with one with 19.
+    """
+    def __init__(self, fuzzy_threshold=FUZZY_THRESHOLD, max_block_size=MAX_BLOCK_SIZE):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_block_size = max_block_size
+        self.stats = {"candidates": 0, "comparisons": 0, "exact_merges": 0, "fuzzy_merges": 0}
+
+    def resolve(self, nodes, weights):
+        """
+        Takes node identities (label, keys, values) in the order they were seen and a weight
+        per identity (how often it is referenced). Returns {alias identity: (canonical identity, method, score)}.
+        """
+        self.parent = {}
+        self.members = {}
+        self.evidence = {}
+        order = {}
+        by_label = defaultdict(list)
+        for identity in nodes:
+            order[identity] = len(order)
+            label, keys, values = identity
+            if 'name' in keys and isinstance(values[keys.index('name')], str):
+                by_label[label].append(identity)
+                self.parent[identity] = identity
+                self.members[identity] = [identity]
+        self.stats["candidates"] = len(self.parent)
+
+        for label, identities in by_label.items():
+            blocks = defaultdict(list)
+            tokens = {}
+            for identity in identities:
+                name = identity[2][identity[1].index('name')]
+                tokens[identity] = name_tokens(name)
+                blocks[' '.join(tokens[identity])].append(identity)
+            for key, block in blocks.items():
+                for other in block[1:]:
+                    self._union(block[0], other, "exact", 1.0)
+
+            index = defaultdict(list)
+            representatives = [block[0] for key, block in blocks.items() if key]
+            grams = {identity: trigrams(' '.join(tokens[identity])) for identity in representatives}
+            for identity in representatives:
+                for gram in grams[identity]:
+                    index[gram].append(identity)
+            for identity in representatives:
+                candidates = set()
+                for gram in grams[identity]:
+                    if len(index[gram]) <= self.max_block_size:
+                        candidates.update(index[gram])
+                for other in candidates:
+                    if order[other] <= order[identity] or not fuzzy_compatible(tokens[identity], tokens[other]):
+                        continue
+                    self.stats["comparisons"] += 1
+                    score = len(grams[identity] & grams[other]) / len(grams[identity] | grams[other])
+                    if score >= self.fuzzy_threshold:
+                        self._union(identity, other, "fuzzy", score)
+
+        aliases = {}
+        for root, members in self.members.items():
+            if self._find(root) != root or len(members) < 2:
+                continue
+            # The most referenced spelling wins, then the one with more merge keys, then the first seen.
+            canonical = max(members, key=lambda m: (weights.get(m, 0), len(m[1]), -order[m]))
+            for member in members:
+                if member != canonical:
+                    method, score = self.evidence.get(member, ("exact", 1.0))
+                    aliases[member] = (canonical, method, score)
+        return aliases
+
+    def _find(self, identity):
+        while self.parent[identity] != identity:
+            self.parent[identity] = self.parent[self.parent[identity]]
+            identity = self.parent[identity]
+        return identity
+
+    def _union(self, a, b, method, score):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b or not self._consistent(self.members[root_a], self.members[root_b]):
+            return
+        self.parent[root_b] = root_a
+        self.members[root_a].extend(self.members.pop(root_b))
+        self.evidence.setdefault(a, (method, score))
+        self.evidence[b] = (method, score)
+        self.stats["exact_merges" if method == "exact" else "fuzzy_merges"] += 1
+
+    @staticmethod
+    def _consistent(group_a, group_b):
+        """
+        Checks that merging two groups does not combine different values of a merge key
+        other than name.
+        """
+        values = {}
+        for _, keys, key_values in group_a + group_b:
+            for key, value in zip(keys, key_values):
+                if key == 'name':
+                    continue
+                if key in values and values[key] != value:
+                    return False
+                values[key] = value
+        return True
+
+def identity_map(identity):
+    label, keys, values = identity
+    return label, {key: list(value) if isinstance(value, tuple) else value for key, value in zip(keys, values)}
+
+def rewrite_script(cypher_script, aliases):
+    """
+    Replaces every labelled node pattern whose property map identifies an alias with
+    its canonical node, keeping the variable name. Returns (script, number of replacements).
+    """
+    replaced = 0
+
+    def replace(match):
+        nonlocal replaced
+        if not match.group('props'):
+            return match.group(0)
+        try:
+            identity = node_identity(match.group('label').strip('`'), parse_map(match.group('props')))
+        except UnsupportedStatement:
+            return match.group(0)
+        if identity not in aliases:
+            return match.group(0)
+        replaced += 1
+        label, props = identity_map(aliases[identity][0])
+        return f"({match.group('var')}:{quote_identifier(label)} {format_map(props)})"
+
+    return NODE_PATTERN_RE.sub(replace, cypher_script), replaced
+
+def load_scripts(input_folder):
+    scripts = {}
+    for filename in sorted(os.listdir(input_folder)):
+        if filename.endswith('.cypher'):
+            with open(os.path.join(input_folder, filename), 'r', encoding='utf-8') as f:
+                scripts[filename] = f.read()
+    return scripts
+
+def resolve_folder(input_folder, output_folder, fuzzy_threshold=FUZZY_THRESHOLD, max_block_size=MAX_BLOCK_SIZE):
+    """
+    Resolves entity aliases across all .cypher files in input_folder and writes the
+    rewritten files plus the alias table to output_folder. Returns a dict of statistics.
+    """
+    if not os.path.exists(input_folder):
+        print(f"Error: Input folder '{input_folder}' does not exist.")
+        return None
+
+    start = time.perf_counter()
+    scripts = load_scripts(input_folder)
+    before = translate_scripts(scripts.values())
+
+    weights = defaultdict(int)
+    for identity in before.nodes:
+        weights[identity] += 1
+    for _, start_node, end_node, _, _ in before.relationships:
+        weights[start_node] += 1
+        weights[end_node] += 1
+
+    resolver = EntityResolver(fuzzy_threshold, max_block_size)
+    aliases = resolver.resolve(before.nodes, weights)
+
+    os.makedirs(output_folder, exist_ok=True)
+    resolved_scripts = {}
+    replacements = 0
+    for filename, cypher_script in scripts.items():
+        resolved_scripts[filename], count = rewrite_script(cypher_script, aliases)
+        replacements += count
+        with open(os.path.join(output_folder, filename), 'w', encoding='utf-8') as f:
+            f.write(resolved_scripts[filename])
+
+    with open(os.path.join(output_folder, ALIAS_TABLE_FILENAME), 'w', encoding='utf-8') as f:
+        for alias, (canonical, method, score) in sorted(aliases.items(), key=lambda item: repr(item[0])):
+            label, alias_props = identity_map(alias)
+            _, canonical_props = identity_map(canonical)
+            f.write(json.dumps({
+                "label": label,
+                "alias": alias_props,
+                "canonical": canonical_props,
+                "method": method,
+                "score": round(score, 3),
+            }, ensure_ascii=False) + "\n")
+
+    after = translate_scripts(resolved_scripts.values())
+    candidates = resolver.stats["candidates"]
+    stats = {
+        "files": len(scripts),
+        "aliases": len(aliases),
+        "replacements": replacements,
+        "nodes_before": len(before.nodes),
+        "nodes_after": len(after.nodes),
+        "relationships_before": len(before.relationships),
+        "relationships_after": len(after.relationships),
+        "comparisons": resolver.stats["comparisons"],
+        "all_pairs": candidates * (candidates - 1) // 2,
+        "elapsed_seconds": time.perf_counter() - start,
+    }
+    return stats
+
+def print_report(stats):
+    def shrink(before, after):
+        return f"{before} -> {after} ({(before - after) / before:.1%} fewer)" if before else "0"
+
+    print("\n--- Entity Resolution Complete ---")
+    print(f"Files: {stats['files']}")
+    print(f"Aliases merged into canonical nodes: {stats['aliases']} ({stats['replacements']} patterns rewritten)")
+    print(f"Nodes: {shrink(stats['nodes_before'], stats['nodes_after'])}")
+    print(f"Relationships: {shrink(stats['relationships_before'], stats['relationships_after'])}")
+    print(f"Fuzzy comparisons: {stats['comparisons']} (all pairs would be {stats['all_pairs']})")
+    print(f"Elapsed: {stats['elapsed_seconds']:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge entity aliases across generated .cypher files before upload.")
+    parser.add_argument("--input", default=INPUT_FOLDER, help="Folder of generated .cypher files.")
+    parser.add_argument("--output", default=OUTPUT_FOLDER, help="Folder for the resolved .cypher files and the alias table.")
+    parser.add_argument("--threshold", type=float, default=FUZZY_THRESHOLD, help="Trigram Jaccard similarity for fuzzy merges.")
+    args = parser.parse_args()
+
+    stats = resolve_folder(args.input, args.output, fuzzy_threshold=args.threshold)
+    if stats:
+        print_report(stats)
+        print(f"Upload the resolved files with: python upload_to_neo4j.py --folder {args.output}")
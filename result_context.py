@@ -0,0 +1,122 @@
+"""
+Bounded query results for the answer prompt.
+
+GraphCypherQAChain reads the whole result of the generated Cypher into memory and pastes
+it into the QA prompt, so a broad question ("list all data products") can pull thousands
+of rows and make the answer call huge, slow and expensive. fetch_context() instead
+  - streams records from the Neo4j driver FETCH_SIZE at a time, in a read-only session,
+  - projects each record: properties named in BULKY_PROPERTIES are dropped, strings are
+    cut to MAX_VALUE_CHARS and lists to MAX_LIST_ITEMS,
+  - stops fetching once the rows reach token_budget estimated tokens or max_rows rows,
+    discarding the rest of the result on the server, and
+  - for a truncated result, counts all of its rows with a count query that returns no data.
+
+Tokens are estimated from the JSON length of each row (about 4 characters per token);
+the budget only has to bound the prompt, not match the tokenizer exactly.
+"""
+import json
+import logging
+import re
+from neo4j import READ_ACCESS, Query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 2000
+DEFAULT_MAX_ROWS = 200
+FETCH_SIZE = 50
+MAX_VALUE_CHARS = 300
+MAX_LIST_ITEMS = 20
+# Properties that only make sense to machines; never worth prompt tokens.
+BULKY_PROPERTIES = frozenset({"embedding", "embeddings", "vector", "raw_markdown", "html"})
+
+_TRAILING_SEMICOLON_RE = re.compile(r";\s*$")
+
+def estimate_tokens(row):
+    return len(json.dumps(row, default=str, ensure_ascii=False)) // 4 + 1
+
+def project_value(value):
+    """
+    Returns value with bulky properties dropped and long strings and lists cut short.
+    """
+    if isinstance(value, str):
+        return value if len(value) <= MAX_VALUE_CHARS else value[:MAX_VALUE_CHARS] + "..."
+    if isinstance(value, dict):
+        return {key: project_value(item) for key, item in value.items() if key not in BULKY_PROPERTIES}
+    if isinstance(value, (list, tuple)):
+        items = [project_value(item) for item in value[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f"... {len(value) - MAX_LIST_ITEMS} more")
+        return items
+    return value
+
+def count_rows_query(cypher):
+    """
+    Wraps cypher in a subquery that only counts its rows.
+    """
+    return f"CALL {{\n{_TRAILING_SEMICOLON_RE.sub('', cypher.strip())}\n}}\nRETURN count(*) AS total"
+
+def _collect(records, token_budget, max_rows):
+    """
+    Projects records until the next one would exceed token_budget or max_rows.
+    Returns (rows, tokens, truncated); records is left unconsumed past the stopping point.
+    """
+    rows, tokens = [], 0
+    for record in records:
+        row = project_value(record)
+        row_tokens = estimate_tokens(row)
+        if len(rows) >= max_rows or (rows and tokens + row_tokens > token_budget):
+            return rows, tokens, True
+        rows.append(row)
+        tokens += row_tokens
+    return rows, tokens, False
+
+def fetch_context(graph, cypher, params=None, token_budget=DEFAULT_TOKEN_BUDGET, max_rows=DEFAULT_MAX_ROWS,
+                  timeout=None, count_query=None):
+    """
+    Runs cypher and returns {"rows": [...], "tokens": n, "truncated": bool, "total_rows": n}.
+    A truncated result's rows are counted by count_query (default: cypher), e.g. the
+    statement before a guard added its LIMIT; total_rows is None if that fails.
+    timeout (default: graph.timeout) is the transaction timeout in seconds.
+
+    graph is a Neo4jGraph, whose driver streams the records; any other GraphStore answers
+    through query(), which returns the whole result, so only the prompt is bounded.
+    """
+    params = params or {}
+    driver = getattr(graph, "_driver", None)
+    if driver is None:
+        records = graph.query(cypher, params)
+        rows, tokens, truncated = _collect(records, token_budget, max_rows)
+        return {"rows": rows, "tokens": tokens, "truncated": truncated, "total_rows": len(records)}
+
+    if timeout is None:
+        timeout = getattr(graph, "timeout", None)
+    with driver.session(database=getattr(graph, "_database", None), fetch_size=FETCH_SIZE,
+                        default_access_mode=READ_ACCESS) as session:
+        result = session.run(Query(cypher, timeout=timeout), params)
+        rows, tokens, truncated = _collect((record.data() for record in result), token_budget, max_rows)
+        total_rows = len(rows)
+        if truncated:
+            # consume() discards the records not fetched yet instead of transferring them.
+            result.consume()
+            try:
+                counted = session.run(Query(count_rows_query(count_query or cypher), timeout=timeout), params)
+                total_rows = counted.single()["total"]
+            except Exception as e:
+                logger.warning(f"Could not count the rows of a truncated result: {e}")
+                total_rows = None
+    return {"rows": rows, "tokens": tokens, "truncated": truncated, "total_rows": total_rows}
+
+def qa_context(context):
+    """
+    Returns the rows to put into the QA prompt: context's rows, followed for a truncated
+    result by a note telling the answer model how many rows there were in total.
+    """
+    if not context["truncated"]:
+        return context["rows"]
+    shown = len(context["rows"])
+    if context["total_rows"] is None:
+        note = f"Only the first {shown} results are listed; the query returned more. Say that the list is incomplete."
+    else:
+        note = (f"Only the first {shown} of {context['total_rows']} results are listed. "
+                f"State the total of {context['total_rows']} and that the list is incomplete.")
+    return context["rows"] + [{"note": note}]
@@ -0,0 +1,123 @@
+"""
+Picks the part of the graph schema that is relevant to a question, so the Cypher
+generation prompt does not carry every label the extraction LLM ever invented.
+
+Labels, relationship types and property names are split into words ("DataProduct" ->
+data, product; "CARRIES_INSTRUMENT" -> carries, instrument; "launch_mass_kg" -> launch,
+mass, kg) and indexed together with the words of their sampled string values. A question
+selects the labels whose words it mentions, scored by where they matched, plus the
+endpoints of relationship types it mentions and the labels of entities it names. The
+best MAX_SEED_LABELS labels are then widened by their 1-hop neighbourhood, and the
+schema is rendered with only those labels and the relationships among them. A question
+that matches nothing gets the full schema.
+"""
+import re
+from collections import defaultdict
+from langchain_neo4j.chains.graph_qa.cypher import construct_schema
+
+MAX_SEED_LABELS = 6
+MAX_NEIGHBOURS = 12
+
+# How much a question word matching each part of the schema counts for a label.
+LABEL_WEIGHT = 3.0
+RELATIONSHIP_WEIGHT = 2.0
+VALUE_WEIGHT = 2.0
+PROPERTY_WEIGHT = 1.0
+ENTITY_WEIGHT = 4.0
+
+STOPWORDS = set(
+    "a an the of for to in on at by with is are was were be been what which who whom how "
+    "tell me give show list please do does did i you about and or from its it this that there "
+    "many much all any some".split()
+)
+
+def schema_words(text):
+    """
+    Splits an identifier or a phrase into lower-case, singular words.
+    """
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", str(text))
+    words = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        if word not in STOPWORDS:
+            words.append(word)
+    return words
+
+class SchemaSelector:
+    """
+    An index over a structured schema (Neo4jGraph.get_structured_schema) that renders
+    question-specific subsets of it (see module docstring).
+    """
+    def __init__(self, structured_schema, is_enhanced, exclude_types=()):
+        self.structured_schema = structured_schema
+        self.is_enhanced = is_enhanced
+        self.exclude_types = set(exclude_types)
+        self.full_schema = construct_schema(structured_schema, [], list(self.exclude_types), is_enhanced)
+
+        self.index = defaultdict(lambda: defaultdict(float))
+        self.relationship_index = defaultdict(set)
+        self.neighbours = defaultdict(lambda: defaultdict(int))
+        for label, props in structured_schema.get("node_props", {}).items():
+            if label in self.exclude_types:
+                continue
+            for word in schema_words(label):
+                self.index[word][label] = max(self.index[word][label], LABEL_WEIGHT)
+            for prop in props:
+                for word in schema_words(prop["property"]):
+                    self.index[word][label] = max(self.index[word][label], PROPERTY_WEIGHT)
+                for value in prop.get("values") or []:
+                    if isinstance(value, str):
+                        for word in schema_words(value):
+                            self.index[word][label] = max(self.index[word][label], VALUE_WEIGHT)
+        for rel in structured_schema.get("relationships", []):
+            if {rel["start"], rel["end"], rel["type"]} & self.exclude_types:
+                continue
+            for word in schema_words(rel["type"]):
+                self.relationship_index[word].add((rel["start"], rel["end"]))
+            self.neighbours[rel["start"]][rel["end"]] += 1
+            self.neighbours[rel["end"]][rel["start"]] += 1
+
+    def select_labels(self, question, entity_labels=()):
+        """
+        Returns the labels to show for a question, most relevant first, or [] if
+        nothing in the question matches the schema.
+        """
+        scores = defaultdict(float)
+        for word in set(schema_words(question)):
+            for label, weight in self.index.get(word, {}).items():
+                scores[label] += weight
+            for start, end in self.relationship_index.get(word, ()):
+                scores[start] += RELATIONSHIP_WEIGHT
+                scores[end] += RELATIONSHIP_WEIGHT
+        for label in entity_labels:
+            if label not in self.exclude_types:
+                scores[label] += ENTITY_WEIGHT
+        seeds = sorted(scores, key=lambda label: (-scores[label], label))[:MAX_SEED_LABELS]
+        if not seeds:
+            return []
+
+        selected = list(seeds)
+        neighbour_counts = defaultdict(int)
+        for seed in seeds:
+            for label, count in self.neighbours.get(seed, {}).items():
+                if label not in seeds:
+                    neighbour_counts[label] += count
+        ranked = sorted(neighbour_counts, key=lambda label: (-scores.get(label, 0.0), -neighbour_counts[label], label))
+        selected.extend(ranked[:MAX_NEIGHBOURS])
+        return selected
+
+    def select(self, question, entity_labels=()):
+        """
+        Returns the schema text for a question: only the selected labels, their
+        properties and the relationships between them, or the full schema.
+        """
+        labels = self.select_labels(question, entity_labels)
+        if not labels:
+            return self.full_schema
+        chosen = set(labels)
+        rel_types = {
+            rel["type"] for rel in self.structured_schema.get("relationships", [])
+            if rel["start"] in chosen and rel["end"] in chosen
+        }
+        return construct_schema(self.structured_schema, labels + sorted(rel_types), [], self.is_enhanced)
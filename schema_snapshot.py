@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import time
+
+DEFAULT_SNAPSHOT_PATH = 'graph_schema_snapshot.json'
+
+def schema_fingerprint(graph):
+    """
+    Fingerprints the shape of the graph with cheap calls that read the token and count
+    stores only: the sets of labels, relationship types and property keys and the total
+    node and relationship counts. Unlike the enhanced schema, this costs the same on any
+    graph size.
+    """
+    labels = sorted(row["label"] for row in graph.query("CALL db.labels() YIELD label RETURN label"))
+    rel_types = sorted(row["relationshipType"] for row in graph.query(
+        "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType"))
+    property_keys = sorted(row["propertyKey"] for row in graph.query(
+        "CALL db.propertyKeys() YIELD propertyKey RETURN propertyKey"))
+    nodes = graph.query("MATCH (n) RETURN count(n) AS count")[0]["count"]
+    relationships = graph.query("MATCH ()-[r]->() RETURN count(r) AS count")[0]["count"]
+    payload = json.dumps([labels, rel_types, property_keys, nodes, relationships], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SchemaSnapshot:
+    """
+    The schema text and structured schema of a Neo4jGraph, saved to disk with the
+    fingerprint of the graph they were read from, so a new process can start with them
+    instead of sampling the whole graph again.
+    """
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self.fingerprint = None
+        self.structured_schema = None
+        self.schema = None
+
+    def load(self, enhanced):
+        """
+        Reads the snapshot file. Returns False if it is missing, unreadable or was taken
+        with a different enhanced_schema setting.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("enhanced") != enhanced:
+            return False
+        self.fingerprint = data["fingerprint"]
+        self.structured_schema = data["structured_schema"]
+        self.schema = data["schema"]
+        return True
+
+    def apply(self, graph):
+        graph.structured_schema = self.structured_schema
+        graph.schema = self.schema
+
+    def capture(self, graph, fingerprint):
+        """
+        Takes the schema currently held by graph and writes it to the snapshot file. The
+        file is replaced atomically, so concurrent processes never read half of it.
+        """
+        self.fingerprint = fingerprint
+        self.structured_schema = graph.structured_schema
+        self.schema = graph.schema
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "fingerprint": fingerprint,
+                "enhanced": bool(getattr(graph, "_enhanced_schema", False)),
+                "captured_at": time.time(),
+                "structured_schema": self.structured_schema,
+                "schema": self.schema,
+            }, f, ensure_ascii=False, default=str)
+        os.replace(temp_path, self.path)
@@ -1,6 +1,7 @@
 import streamlit as st
+from contextlib import closing
 import logging
-from graph_rag_service import graph_rag_service 
+from graph_rag_service import create_graph_rag_service
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -15,7 +16,16 @@ The assistant uses a Neo4j knowledge graph and OpenAI's LLMs to provide accurate
 """)
 
 
-if not graph_rag_service.graph or not graph_rag_service.qa_chain:
+@st.cache_resource
+def get_graph_rag_service():
+    """
+    One service per Streamlit process, shared by all sessions and reruns.
+    """
+    return create_graph_rag_service()
+
+graph_rag_service = get_graph_rag_service()
+
+if not graph_rag_service or not graph_rag_service.graph or not graph_rag_service.qa_chain:
     st.error("RAG service failed to initialize. Please check the backend logs (`graph_rag_service.py`) for connection or API key issues.")
     st.stop()
 
@@ -24,14 +34,45 @@ query = st.text_input("Enter your query here:", placeholder="e.g., What is the d
 
 if st.button("Get Answer"):
     if query:
-        with st.spinner("Thinking... Generating Cypher and fetching data..."):
-            response = graph_rag_service.query_graph(query)
+        response = {}
+        status = st.status("Thinking... Generating Cypher and fetching data...")
+
+        def answer_tokens():
+            """
+            Yields the answer as it is written, updating the status box with each stage.
+            """
+            with closing(graph_rag_service.stream_query(query)) as events:
+                for event in events:
+                    if event["type"] == "cypher":
+                        status.update(label="Fetching data...")
+                    elif event["type"] == "rows":
+                        fetched = f"{len(event['context'])} rows"
+                        if event.get("truncated"):
+                            total = event["total_rows"] if event["total_rows"] is not None else "more"
+                            fetched = f"the first {fetched} of {total}"
+                        status.update(label=f"Fetched {fetched}. Writing the answer...")
+                    elif event["type"] == "token":
+                        yield event["text"]
+                    elif event["type"] == "done":
+                        response.update(event)
+                        status.update(label="Done", state="complete")
+                    elif event["type"] == "error":
+                        response.update(event)
+                        status.update(label="Failed", state="error")
 
         st.subheader("Answer:")
-        if response.get("result"):
-            st.success(response["result"])
-        else:
+        # Closing the stream releases its LLM slot if the run is interrupted mid-answer.
+        with closing(answer_tokens()) as tokens:
+            answer = st.write_stream(tokens)
+
+        if response.get("type") == "error":
+            st.error(response["message"])
+        elif not answer:
             st.warning("Could not generate a direct answer. Please try rephrasing your query or check intermediate steps for errors.")
+        if response.get("timings"):
+            timings = response["timings"]
+            st.caption(f"First token after {timings['first_token_seconds']:.2f}s, full answer after {timings['total_seconds']:.2f}s"
+                       + (" (served from the answer cache)." if response.get("cached") else "."))
 
         st.subheader("Intermediate Steps (for Debugging/Transparency):")
         intermediate_steps = response.get("intermediate_steps", [])
@@ -39,6 +80,8 @@ if st.button("Get Answer"):
             for step in intermediate_steps:
                 if "query" in step:
                     st.code(f"Generated Cypher:\n{step['query']}", language="cypher")
+                    if step.get("rejected"):
+                        st.warning("The Cypher guard rejected this statement, so it was not run.")
                 if "context" in step:
                     st.json({"Full Context from DB": step["context"]})
                 if "answer" in step:
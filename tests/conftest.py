@@ -0,0 +1,8 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+# generate_cypher builds its OpenAI client at import; no request is ever sent with this key.
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
@@ -0,0 +1,46 @@
+from answer_formatter import AnswerFormatter
+
+def fetched(rows, truncated=False, total_rows=None):
+    return {"rows": rows, "truncated": truncated, "total_rows": total_rows}
+
+def answer(rows, subject=None, cypher=None):
+    return AnswerFormatter().answer(fetched(rows), subject, cypher)
+
+def test_count_phrasing_needs_a_count_in_the_cypher():
+    cypher = "MATCH (n:Spacecraft) RETURN count(n) AS totalSpacecraft"
+    assert answer([{"totalSpacecraft": 12}], cypher=cypher) == ("scalar", "There are 12 spacecraft.")
+    cypher = "MATCH (s {name: $name})-[:CARRIES]->(i) RETURN count(DISTINCT i) AS numberOfInstruments"
+    assert answer([{"numberOfInstruments": 6}], "INSAT-3D", cypher)[1] == "There are 6 instruments for INSAT-3D."
+    assert answer([{"numberOfInstruments": 1}], "INSAT-3D", cypher)[1] == "There is 1 instrument for INSAT-3D."
+
+def test_total_alias_without_count_is_a_value():
+    cypher = "MATCH (s {name: $name}) RETURN s.total_mass_kg AS totalMassKg"
+    assert answer([{"totalMassKg": 2060}], "INSAT-3D", cypher)[1] == "The total mass of INSAT-3D is 2060 kg."
+
+def test_scalar_unit_from_the_returned_property():
+    cypher = "MATCH (s {name: $name}) RETURN s.launch_mass_kg AS launchMass"
+    assert answer([{"launchMass": 2060.0}], "INSAT-3D", cypher)[1] == "The launch mass of INSAT-3D is 2060 kg."
+
+def test_lists_are_not_pluralized_twice():
+    rows = [{"instruments": "Imager"}, {"instruments": "Sounder"}]
+    assert answer(rows, "INSAT-3D") == ("list", "The instruments for INSAT-3D are Imager and Sounder.")
+    assert answer(rows[:1], "INSAT-3D")[1] == "The instruments of INSAT-3D are Imager."
+    rows = [{"instrumentName": "Imager"}]
+    assert answer(rows, "INSAT-3D")[1] == "The instrument for INSAT-3D is Imager."
+    rows = [{"instrumentName": "Imager"}, {"instrumentName": "Sounder"}]
+    assert answer(rows, "INSAT-3D")[1] == "The instruments for INSAT-3D are Imager and Sounder."
+
+def test_truncated_list_reports_the_total():
+    rows = [{"productName": f"P{i}"} for i in range(3)]
+    text = AnswerFormatter().answer(fetched(rows, truncated=True, total_rows=350), None, None)[1]
+    assert text == "The first 3 of 350 products are P0, P1 and P2. The list is incomplete."
+
+def test_shapes():
+    formatter = AnswerFormatter(max_list_items=2)
+    assert formatter.answer(fetched([]))[0] == "empty"
+    assert formatter.answer(fetched([{"a": 1, "b": 2}]))[0] == "single_row"
+    assert formatter.answer(fetched([{"a": 1}, {"a": 2}, {"a": 3}])) == ("complex", None)
+    assert formatter.answer(fetched([{"a": 1, "b": 2}, {"a": 3, "b": 4}]))[0] == "complex"
+    assert formatter.answer(fetched([{"a": "x" * 500}])) == ("complex", None)
+    assert AnswerFormatter(enabled=False).answer(fetched([{"a": 1}])) == ("scalar", None)
+    assert formatter.stats["formatted"] == 2 and formatter.stats["answers"] == 5
@@ -0,0 +1,19 @@
+from changed_files import add_to_changed_list, clear_changed_list, read_changed_list, write_changed_list
+
+def test_changed_list_round_trip(tmp_path):
+    path = tmp_path / "changed_files.txt"
+    write_changed_list(path, ["scatsat_1.md", "insat_3d.md"])
+    assert path.read_text(encoding="utf-8") == "insat_3d.md\nscatsat_1.md\n"
+    path.write_text(path.read_text(encoding="utf-8") + "\n  oceansat_3.md  \n", encoding="utf-8")
+    assert read_changed_list(path) == {"insat_3d", "scatsat_1", "oceansat_3"}
+
+def test_changed_list_accumulates_until_cleared(tmp_path):
+    path = tmp_path / "changed_files.txt"
+    add_to_changed_list(path, ["insat_3d.md"])
+    add_to_changed_list(path, ["scatsat_1.md", "insat_3d.md"])
+    add_to_changed_list(path, [])
+    assert read_changed_list(path) == {"insat_3d", "scatsat_1"}
+    clear_changed_list(path)
+    assert read_changed_list(path) == set()
+    add_to_changed_list(path, ["oceansat_3.md"])
+    assert read_changed_list(path) == {"oceansat_3"}
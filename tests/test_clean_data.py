@@ -0,0 +1,33 @@
+import random
+import re
+
+from clean_data import (DEFAULT_END_MARKER_PATTERN, DEFAULT_START_HEADING_PATTERN, REGEX_FLAGS,
+                        extract_description, scan_description)
+
+START_RE = re.compile(DEFAULT_START_HEADING_PATTERN, REGEX_FLAGS)
+END_RE = re.compile(DEFAULT_END_MARKER_PATTERN, REGEX_FLAGS)
+
+DOCUMENTS = [
+    "# INSAT-3D\n\nA weather satellite.\n\n## Launch\nIn 2013.\n",
+    "# INSAT-3D\nA weather satellite.\n* [Home](https://example.org)\n",
+    "Intro text without a heading.\n## Launch\n",
+    "# INSAT-3D\nA weather satellite with no end marker.\n",
+    "# INSAT-3D\nText.\n* [A link that\nspans lines](https://example.org)\n",
+    "# INSAT-3D ## Launch\nText.\n",
+    "",
+]
+
+FRAGMENTS = ["# Title\n", "#Title\n", "## Section\n", "### Deep\n", "text\n", "\n", "  \n",
+             "* [a](b)\n", "- [x](y)\n", "* [broken\n", "](y)\n", "* plain item\n", "# \n", "tail"]
+
+def check(document):
+    assert scan_description(document.splitlines(keepends=True)) == extract_description(document, START_RE, END_RE)
+
+def test_scanner_matches_the_regex():
+    for document in DOCUMENTS:
+        check(document)
+
+def test_scanner_matches_the_regex_on_random_documents():
+    rng = random.Random(17)
+    for _ in range(500):
+        check("".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 12))))
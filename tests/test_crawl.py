@@ -0,0 +1,66 @@
+import asyncio
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from crawl4ai.async_crawler_strategy import AsyncHTTPCrawlerStrategy
+
+from changed_files import CHANGED_FILES_FILENAME, read_changed_list
+from crawl import MANIFEST_FILENAME, batch_crawl, get_batch_filename_from_url
+
+PAGES = {
+    "/": '<a href="/a/overview">A</a> <a href="/b/overview">B</a>',
+    "/a/overview": "<p>INSAT-3D carries an Imager and a Sounder.</p>",
+    "/b/overview": "<p>SCATSAT-1 carries a Ku-band scatterometer.</p>",
+}
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in PAGES:
+            self.send_error(404)
+            return
+        # crawl4ai treats near-empty pages as blocked, so each page gets some filler text.
+        filler = "<p>" + "Satellite payload description. " * 40 + "</p>"
+        body = f"<html><body><h1>{self.path}</h1>{PAGES[self.path]}{filler}</body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+def test_batch_filenames_are_distinct_per_url():
+    a = get_batch_filename_from_url("https://mosdac.gov.in/a/overview")
+    b = get_batch_filename_from_url("https://mosdac.gov.in/b/overview")
+    assert a.startswith("a_overview-") and b.startswith("b_overview-") and a != b
+    assert get_batch_filename_from_url("https://mosdac.gov.in/a_overview") != a
+    assert len(get_batch_filename_from_url("https://mosdac.gov.in/" + "x" * 300)) <= 100
+
+def test_pages_with_the_same_last_segment_get_their_own_files(site, tmp_path):
+    def crawl():
+        return asyncio.run(batch_crawl([site + "/"], output_directory=str(tmp_path), concurrency=4,
+                                       host_delay=0, crawler_strategy=AsyncHTTPCrawlerStrategy(), verbose=False))
+
+    stats = crawl()
+    assert stats["saved"] == 3 and stats["failed"] == 0
+    with open(os.path.join(tmp_path, MANIFEST_FILENAME), encoding="utf-8") as f:
+        manifest = json.load(f)
+    for path in ("/a/overview", "/b/overview"):
+        with open(os.path.join(tmp_path, manifest[site + path]["filename"]), encoding="utf-8") as f:
+            assert path in f.read()
+
+    stats = crawl()
+    assert stats["saved"] == 0 and stats["unchanged"] == 3
+    # The second crawl changed nothing, but the first crawl's list has not been consumed yet.
+    assert len(read_changed_list(os.path.join(tmp_path, CHANGED_FILES_FILENAME))) == 3
@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import pytest
+
+from cypher_guard import CypherGuard, UnsafeCypher, bound_cypher, write_clause
+from fake_llm import FakeGraph
+
+def test_limit_injected_and_count_query_kept():
+    query, count_query, rewrites = bound_cypher("MATCH (n:Spacecraft) RETURN n.name;", auto_limit=50)
+    assert query == "MATCH (n:Spacecraft) RETURN n.name\nLIMIT 50"
+    assert count_query == "MATCH (n:Spacecraft) RETURN n.name"
+    assert rewrites == ["limit_injected"]
+
+def test_existing_limit_is_kept():
+    assert bound_cypher("MATCH (n) RETURN n LIMIT 5")[2] == []
+    assert bound_cypher("MATCH (n) RETURN n LIMIT $limit")[2] == []
+
+def test_trailing_comment_after_limit():
+    query, _, rewrites = bound_cypher("MATCH (n) RETURN n LIMIT 5 // top five")
+    assert query == "MATCH (n) RETURN n LIMIT 5 // top five" and rewrites == []
+
+def test_limit_goes_after_a_trailing_comment():
+    query, _, _ = bound_cypher("MATCH (n) RETURN n // every node", auto_limit=10)
+    assert query == "MATCH (n) RETURN n // every node\nLIMIT 10"
+
+def test_no_limit_for_union_or_statements_without_return():
+    assert bound_cypher("MATCH (a:A) RETURN a.name AS n UNION MATCH (b:B) RETURN b.name AS n")[2] == []
+    assert bound_cypher("CALL db.labels()")[2] == []
+    assert bound_cypher("MATCH (n) WHERE n.note = 'RETURN' SET n.x = 1")[2] == []
+
+def test_unbounded_expansions_are_bounded():
+    query, _, rewrites = bound_cypher("MATCH (a)-[:PART_OF*]->(b) RETURN b LIMIT 5", max_hops=3)
+    assert query == "MATCH (a)-[:PART_OF*1..3]->(b) RETURN b LIMIT 5" and rewrites == ["bounded_expansion"]
+    assert bound_cypher("MATCH (a)-[:R*2..]->(b) RETURN b LIMIT 5", max_hops=4)[0] == \
+        "MATCH (a)-[:R*2..4]->(b) RETURN b LIMIT 5"
+    assert bound_cypher("MATCH (a)-[:R*1..2]->(b) RETURN b LIMIT 5")[2] == []
+    assert bound_cypher("MATCH (a)-[:R*3]->(b) RETURN b LIMIT 5")[2] == []
+
+@pytest.mark.parametrize("cypher, keyword", [
+    ("MATCH (n) DETACH DELETE n", "DETACH"),
+    ("MERGE (n:Spacecraft {name: 'X'})", "MERGE"),
+    ("MATCH (n) SET n.flag = true RETURN n", "SET"),
+    ("MATCH (n:Create) RETURN n", None),
+    ("MATCH (n)-[:SET]->(m) RETURN m", None),
+    ("MATCH (n) RETURN n.set AS set", None),
+    ("MATCH (n {merge: 1}) RETURN n", None),
+    ("MATCH (n) WHERE n.name = 'CREATE' RETURN n // delete nothing", None),
+    ("MATCH (n:`Drop`) RETURN $set", None),
+])
+def test_write_clause(cypher, keyword):
+    assert write_clause(cypher) == keyword
+
+def test_guard_rejects_writes_and_counts():
+    guard = CypherGuard(FakeGraph(lambda cypher: []))
+    with pytest.raises(UnsafeCypher) as error:
+        guard.check("MATCH (n) DETACH DELETE n")
+    assert error.value.guard == "write"
+    assert guard.check("MATCH (n:Create) RETURN n.set AS set")["rewrites"] == ["limit_injected"]
+    assert guard.stats["rejected"] == 1 and guard.stats["write"] == 1 and guard.stats["passed"] == 1
+
+class PlanGraph(FakeGraph):
+    """FakeGraph whose driver answers EXPLAIN with a fixed plan, shaped like ResultSummary.plan."""
+    def __init__(self, plan):
+        super().__init__(lambda cypher: [])
+        self._driver = self
+        self.plan = plan
+
+    def session(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query):
+        return self
+
+    def consume(self):
+        return SimpleNamespace(query_type="r", plan=self.plan)
+
+def plan(*operators):
+    root = {"operatorType": "ProduceResults@neo4j", "args": {}, "children": []}
+    root["children"] = [{"operatorType": name, "args": args, "children": []} for name, args in operators]
+    return root
+
+@pytest.mark.parametrize("operators, guard_name", [
+    ([("VarLengthExpand(All)@neo4j", {"Details": "(a)-[anon_0:PART_OF*]->(b)"})], "unbounded_expansion"),
+    ([("VarLengthExpand(All)@neo4j", {"Details": "(a)-[anon_0:PART_OF*2..]->(b)"})], "unbounded_expansion"),
+    ([("CartesianProduct@neo4j", {})], "cartesian_product"),
+])
+def test_plan_check_rejects(operators, guard_name):
+    guard = CypherGuard(PlanGraph(plan(*operators)))
+    with pytest.raises(UnsafeCypher) as error:
+        guard.check("MATCH (a)-[:PART_OF*1..3]->(b) RETURN b LIMIT 5")
+    assert error.value.guard == guard_name
+    assert guard.stats[guard_name] == 1
+
+def test_plan_check_passes_bounded_expansion():
+    operators = [("VarLengthExpand(All)@neo4j", {"Details": "(a)-[anon_0:PART_OF*1..3]->(b)"})]
+    guard = CypherGuard(PlanGraph(plan(*operators)))
+    assert guard.check("MATCH (a)-[:PART_OF*1..3]->(b) RETURN b LIMIT 5")["rewrites"] == []
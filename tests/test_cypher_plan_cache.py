@@ -0,0 +1,22 @@
+from cypher_plan_cache import STOPWORDS, CypherPlanCache
+
+COUNT_CYPHER = "MATCH (s:Spacecraft {name: 'INSAT-3D'})-[:CARRIES]->(p) RETURN count(p) AS payloads"
+
+def plan_cache():
+    cache = CypherPlanCache()
+    cache.set_entity_names([("INSAT-3D", "Spacecraft"), ("SCATSAT-1", "Spacecraft")])
+    assert cache.add("How many payloads does INSAT-3D carry?", COUNT_CYPHER)
+    return cache
+
+def test_interrogatives_are_kept():
+    assert not {"how", "many", "when", "where"} & STOPWORDS
+
+def test_count_plan_is_reused_for_another_entity():
+    cypher, _ = plan_cache().lookup("How many payloads does SCATSAT-1 carry?")
+    assert cypher == COUNT_CYPHER.replace("INSAT-3D", "SCATSAT-1")
+
+def test_count_and_list_questions_do_not_share_a_plan():
+    cache = plan_cache()
+    assert cache.lookup("Which payloads does SCATSAT-1 carry?") is None
+    assert cache.lookup("Which payloads does INSAT-3D carry?") is None
+    assert cache.stats["misses"] == 2
@@ -0,0 +1,66 @@
+import asyncio
+import types
+
+import httpx
+import openai
+import pytest
+
+import generate_cypher
+from generate_cypher import RateLimiter, generate_cypher_async, retry_delay
+
+def rate_limit_error(headers=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers=headers or {}, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+class FailingCompletions:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        raise self.error
+
+def client(completions):
+    return types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+
+def test_failed_requests_refund_their_token_reservation(monkeypatch):
+    async def no_sleep(seconds):
+        pass
+    monkeypatch.setattr(generate_cypher.asyncio, "sleep", no_sleep)
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=100_000)
+    completions = FailingCompletions(rate_limit_error())
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(generate_cypher_async(client(completions), limiter, "# INSAT-3D", "gpt-4o", max_retries=3))
+    assert completions.calls == 4
+    limiter.tokens._refill()
+    assert limiter.tokens.available == pytest.approx(100_000)
+
+def test_non_retryable_errors_refund_too():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=100_000)
+    with pytest.raises(ValueError):
+        asyncio.run(generate_cypher_async(client(FailingCompletions(ValueError("bad"))), limiter, "# INSAT-3D", "gpt-4o"))
+    limiter.tokens._refill()
+    assert limiter.tokens.available == pytest.approx(100_000)
+
+def test_retry_delay_ignores_malformed_hints():
+    assert retry_delay(rate_limit_error({"retry-after-ms": "soon", "retry-after": "30"}), 0) >= 30
+    assert retry_delay(rate_limit_error({"retry-after-ms": "soon"}), 0, max_delay=1.0) <= 1.0
+
+def test_split_block_keeps_pieces_within_budget_and_spaces_within_lines():
+    line = " ".join(f"word{i:03d}" for i in range(60))
+    block = "Intro line.\n" + line + "\n" + "x" * 200
+    pieces = generate_cypher._split_block(block, 10)
+    assert all(generate_cypher.count_tokens(piece) <= 10 for piece in pieces)
+    assert "".join(pieces).replace("\n", "").replace(" ", "") == block.replace("\n", "").replace(" ", "")
+    words = [piece for piece in pieces if "word" in piece]
+    assert all("\n" not in piece for piece in words[1:])
+    assert " ".join(words).endswith(line.split(" ", 1)[1][-40:])
+
+def test_chunks_of_long_documents_fit_the_budget():
+    document = "# INSAT-3D\n\n" + "\n\n".join(
+        " ".join(f"payload{i}-{j}" for j in range(80)) for i in range(20)) + "\n\n" + "y" * 3000
+    chunks = generate_cypher.chunk_markdown(document, max_tokens=200, overlap_tokens=20)
+    assert len(chunks) > 1
+    assert all(generate_cypher.count_tokens(chunk) <= 200 for chunk in chunks)
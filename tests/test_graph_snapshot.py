@@ -0,0 +1,68 @@
+import time
+from types import SimpleNamespace
+
+import graph_rag_service
+from fake_llm import FAKE_CYPHER, build_fake_service
+from graph_snapshot import GraphSnapshot, write_snapshot
+from schema_snapshot import SchemaSnapshot
+
+NODES = [
+    ("s", ["Spacecraft"], {"name": "INSAT-3D", "launch_mass_kg": 2060}),
+    ("i", ["Instrument"], {"name": "Imager"}),
+]
+RELATIONSHIPS = [("s", "CARRIES", "i")]
+UNREACHABLE_URI = "bolt://127.0.0.1:1"
+
+def snapshot(tmp_path, stamp="v1"):
+    path = str(tmp_path / "graph_snapshot")
+    write_snapshot(path, NODES, RELATIONSHIPS, stamp=stamp)
+    graph_snapshot = GraphSnapshot(path)
+    assert graph_snapshot.load()
+    return graph_snapshot
+
+def test_supports_matches_query(tmp_path):
+    graph_snapshot = snapshot(tmp_path)
+    assert graph_snapshot.supports(FAKE_CYPHER)
+    assert graph_snapshot.supports("MATCH (s {name: $name})-[:CARRIES]->(i) RETURN i.name AS name", {"name": "INSAT-3D"})
+    assert not graph_snapshot.supports("MATCH (s {name: $name}) RETURN s.name AS name")
+    assert not graph_snapshot.supports("MATCH (n) RETURN n.name AS name")
+    assert not graph_snapshot.supports("MATCH (n:Spacecraft) RETURN n.name AS name ORDER BY name")
+
+def test_snapshot_statements_skip_explain_while_neo4j_is_down(tmp_path):
+    service = build_fake_service(0, 0, 0, 0)
+    service.graph_snapshot = snapshot(tmp_path)
+    service._graph_snapshot_current = True
+    explained = []
+
+    def unreachable(cypher):
+        raise ConnectionError("Neo4j is unreachable")
+    service.graph.respond = unreachable
+    service.graph._driver = SimpleNamespace(session=lambda **kwargs: explained.append(kwargs))
+    done = list(service.stream_query("What is the launch mass of INSAT-3D?"))[-1]
+    assert done["type"] == "done"
+    assert done["intermediate_steps"][1]["context"] == [{"mass": 2060}]
+    assert explained == []
+    assert service.snapshot_stats["queries"] == 1
+
+def test_service_starts_from_the_snapshots_while_neo4j_is_down(tmp_path, monkeypatch):
+    graph_snapshot = snapshot(tmp_path)
+    schema_path = str(tmp_path / "schema.json")
+    schema = {"node_props": {"Spacecraft": [{"property": "name", "type": "STRING"}]},
+              "rel_props": {}, "relationships": [], "metadata": {"constraint": [], "index": []}}
+    SchemaSnapshot(schema_path).capture(
+        SimpleNamespace(structured_schema=schema, schema="Spacecraft {name: STRING}", _enhanced_schema=True), "f")
+    monkeypatch.setattr(graph_rag_service, "NEO4J_URI", UNREACHABLE_URI)
+    monkeypatch.setattr(graph_rag_service, "NEO4J_USERNAME", "neo4j")
+    monkeypatch.setattr(graph_rag_service, "NEO4J_PASSWORD", "secret")
+    monkeypatch.setattr(graph_rag_service, "SCHEMA_SNAPSHOT_PATH", schema_path)
+    monkeypatch.setattr(graph_rag_service, "GRAPH_SNAPSHOT_PATH", graph_snapshot.path)
+    start = time.perf_counter()
+    service = graph_rag_service.create_graph_rag_service()
+    assert service is not None and service.qa_chain is not None
+    assert time.perf_counter() - start < 5
+    assert service.graph.connect_error is not None
+    assert service.graph.get_structured_schema == schema
+    assert service.plan_cache.matcher.find("launch mass of INSAT-3D")
+
+    monkeypatch.setattr(graph_rag_service, "GRAPH_SNAPSHOT_PATH", str(tmp_path / "missing"))
+    assert graph_rag_service.create_graph_rag_service() is None
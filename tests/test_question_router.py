@@ -0,0 +1,68 @@
+from answer_cache import AnswerCache
+from fake_llm import FakeChatModel
+from gazetteer import Gazetteer
+from graph_rag_service import GraphRAGService
+from graph_version import BUMP_GRAPH_VERSION_QUERY
+from local_graph import LocalGraph
+from question_router import QuestionRouter
+
+SCHEMA = {
+    "node_props": {
+        "Spacecraft": [{"property": "name", "type": "STRING"}, {"property": "launch_mass_kg", "type": "INTEGER"},
+                       {"property": "launch_date", "type": "STRING"}],
+        "Instrument": [{"property": "name", "type": "STRING"}],
+        "Organization": [{"property": "name", "type": "STRING"}],
+    },
+    "rel_props": {},
+    "relationships": [
+        {"start": "Spacecraft", "type": "CARRIES", "end": "Instrument"},
+        {"start": "Organization", "type": "OPERATES", "end": "Spacecraft"},
+    ],
+}
+
+def router(limit=100):
+    gazetteer = Gazetteer([("INSAT-3D", "Spacecraft"), ("ISRO", "Organization")])
+    return QuestionRouter(gazetteer, SCHEMA, limit=limit)
+
+def test_count_label():
+    route = router().route("How many spacecraft are there?")
+    assert route["intent"] == "count_label"
+    assert route["query"] == "MATCH (n:Spacecraft) RETURN count(n) AS totalSpacecraft"
+    assert route["limit"] is None
+
+def test_entity_property():
+    route = router().route("What is the launch mass of INSAT-3D?")
+    assert route["query"] == "MATCH (n:Spacecraft {name: $name}) RETURN n.launch_mass_kg AS launch_mass_kg LIMIT 100"
+    assert route["count_query"] == "MATCH (n:Spacecraft {name: $name}) RETURN n.launch_mass_kg AS launch_mass_kg"
+    assert route["params"] == {"name": "INSAT-3D"}
+
+def test_related_entities_in_both_directions():
+    route = router().route("What instruments does INSAT-3D carry?")
+    assert route["query"] == ("MATCH (e:Spacecraft {name: $name})-[:CARRIES]->(n:Instrument) "
+                              "RETURN n.name AS instrumentName LIMIT 100")
+    route = router().route("Which organization operates INSAT-3D?")
+    assert route["query"] == ("MATCH (n:Organization)-[:OPERATES]->(e:Spacecraft {name: $name}) "
+                              "RETURN n.name AS organizationName LIMIT 100")
+
+def test_ambiguous_or_unknown_questions_are_not_routed():
+    assert router().route("What is the launch of INSAT-3D?") is None  # launch_mass_kg or launch_date
+    assert router().route("Tell me a story about INSAT-3D") is None
+    assert router().route("What instruments does INSAT-3D share with ISRO?") is None
+    assert router().stats["lookups"] == 0
+
+def test_routed_result_at_the_limit_is_counted_and_truncated():
+    graph = LocalGraph()
+    graph.query("MERGE (s:Spacecraft {name: 'INSAT-3D'});")
+    for i in range(150):
+        graph.query(f"MATCH (s:Spacecraft {{name: 'INSAT-3D'}}) "
+                    f"MERGE (s)-[:CARRIES]->(i:Instrument {{name: 'Instrument {i:03d}'}});")
+    graph.query(BUMP_GRAPH_VERSION_QUERY)
+    graph.refresh_schema()
+    unused = FakeChatModel(respond=lambda prompt: "unused")
+    service = GraphRAGService(graph, answer_cache=AnswerCache(), cypher_llm=unused, qa_llm=unused,
+                              router=QuestionRouter(limit=100))
+    events = list(service.stream_query("What instruments does INSAT-3D carry?"))
+    rows = next(event for event in events if event["type"] == "rows")
+    assert len(rows["context"]) == 100
+    assert rows["truncated"] is True
+    assert rows["total_rows"] == 150
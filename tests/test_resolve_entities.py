@@ -0,0 +1,28 @@
+from resolve_entities import resolve_folder
+
+def test_fuzzy_candidates_with_mixed_value_types(tmp_path):
+    # Identities hold property values, so ordering candidate pairs by identity compared
+    # 3 with '3' and raised TypeError.
+    input_folder = tmp_path / "queries"
+    input_folder.mkdir()
+    (input_folder / "channels.cypher").write_text(
+        "MERGE (c:Channel {name: 'thermal infrared channel', count: 3});\n"
+        "MERGE (d:Channel {name: 'thermal infrared channels group', count: '3'});\n",
+        encoding="utf-8",
+    )
+    stats = resolve_folder(str(input_folder), str(tmp_path / "resolved"))
+    assert stats["nodes_before"] == 2
+    assert stats["aliases"] == 0
+
+def test_spellings_merge_into_one_node(tmp_path):
+    input_folder = tmp_path / "queries"
+    input_folder.mkdir()
+    (input_folder / "a.cypher").write_text(
+        "MERGE (s:Spacecraft {name: 'INSAT-3D'});\n"
+        "MERGE (t:Spacecraft {name: 'Insat 3D'});\n"
+        "MERGE (u:Spacecraft {name: 'INSAT-3DR'});\n",
+        encoding="utf-8",
+    )
+    stats = resolve_folder(str(input_folder), str(tmp_path / "resolved"))
+    assert stats["aliases"] == 1
+    assert stats["nodes_after"] == 2
@@ -0,0 +1,61 @@
+import threading
+
+from answer_cache import AnswerCache
+from fake_llm import FAKE_ANSWER, build_fake_service
+
+QUESTION = "What is the launch mass of INSAT-3D?"
+
+def stream(service, question=QUESTION):
+    return list(service.stream_query(question))
+
+def test_events_arrive_in_order():
+    events = stream(build_fake_service(0, 0, 0, 0))
+    types = [event["type"] for event in events]
+    assert types[:2] == ["cypher", "rows"]
+    assert types[-1] == "done"
+    assert len(types) > 3 and set(types[2:-1]) == {"token"}
+    assert events[1]["context"] == [{"mass": 2060}]
+    done = events[-1]
+    assert done["result"] == "".join(event["text"] for event in events[2:-1]) == FAKE_ANSWER
+    assert done["answer_source"] == "qa_llm"
+    assert done["cached"] is False
+
+def test_graph_failure_ends_with_an_error_event():
+    service = build_fake_service(0, 0, 0, 0)
+    def fail(cypher):
+        raise RuntimeError("connection refused")
+    service.graph.respond = fail
+    events = stream(service)
+    assert events[-1]["type"] == "error"
+    assert "done" not in [event["type"] for event in events]
+    assert service.query_graph(QUESTION)["intermediate_steps"] == []
+
+def test_service_not_ready_is_an_error_event():
+    service = build_fake_service(0, 0, 0, 0)
+    service.qa_chain = None
+    events = stream(service)
+    assert [event["type"] for event in events] == ["error"]
+    assert "not ready" in events[0]["message"]
+
+def test_cached_answer_is_replayed():
+    service = build_fake_service(0, 0, 0, 0, answer_cache=AnswerCache())
+    first = stream(service)[-1]
+    queries = service.graph.queries
+    events = stream(service)
+    assert [event["type"] for event in events] == ["cypher", "rows", "token", "done"]
+    assert events[0]["source"] == "answer_cache"
+    assert events[2]["text"] == first["result"]
+    assert events[-1]["cached"] is True
+    assert events[-1]["result"] == first["result"]
+    assert service.graph.queries == queries
+
+def test_abandoned_stream_frees_its_llm_slot():
+    service = build_fake_service(0, 0, 0, 0)
+    service._llm_slots = threading.BoundedSemaphore(1)
+    abandoned = service.stream_query(QUESTION)
+    assert next(event for event in abandoned if event["type"] == "token")
+    assert service._llm_slots.acquire(blocking=False)
+    service._llm_slots.release()
+    assert stream(service)[-1]["type"] == "done"
+    abandoned.close()
+    assert service._llm_slots.acquire(blocking=False)
@@ -0,0 +1,62 @@
+import json
+
+from graph_version import BUMP_GRAPH_VERSION_QUERY
+from local_graph import LocalGraph
+from upload_to_neo4j import Neo4jUploader, UploadLedger, upload_all_cypher_queries
+
+class FailingGraph(LocalGraph):
+    """
+    A LocalGraph whose writes (other than the version bump) fail once fail_after
+    transactions have committed.
+    """
+    def __init__(self, fail_after):
+        super().__init__()
+        self.fail_after = fail_after
+
+    def query(self, query, params=None):
+        if "MERGE" in query and query != BUMP_GRAPH_VERSION_QUERY:
+            if self.fail_after == 0:
+                raise RuntimeError("connection lost")
+            self.fail_after -= 1
+        return super().query(query, params)
+
+def write_scripts(folder):
+    (folder / "insat_3d.cypher").write_text("MERGE (s:Spacecraft {name: 'INSAT-3D'});\n"
+                                           "MERGE (o:Orbit {name: 'GEO'});\n"
+                                           "MERGE (s)-[:ORBITS_IN]->(o);", encoding="utf-8")
+    return [str(folder / "insat_3d.cypher")]
+
+def test_bulk_failure_after_a_commit_is_reported_as_partial(tmp_path):
+    paths = write_scripts(tmp_path)
+    ledger = UploadLedger(str(tmp_path / "upload_ledger.jsonl"))
+    graph = FailingGraph(fail_after=1)
+    stats = Neo4jUploader(None, None, None, driver=graph.driver()).upload_bulk(paths, ledger=ledger)
+    assert stats["failed"] == 1 and stats["committed_transactions"] == 1
+    assert ledger.entries["insat_3d.cypher"]["status"] == "partial"
+    assert len(graph.load.nodes) == 1
+
+def test_bulk_failure_before_any_commit_is_failed(tmp_path):
+    paths = write_scripts(tmp_path)
+    ledger = UploadLedger(str(tmp_path / "upload_ledger.jsonl"))
+    stats = Neo4jUploader(None, None, None, driver=FailingGraph(0).driver()).upload_bulk(paths, ledger=ledger)
+    assert stats["committed_transactions"] == 0
+    assert ledger.entries["insat_3d.cypher"]["status"] == "failed"
+
+def test_per_file_failure_after_a_commit_is_reported_as_partial(tmp_path):
+    paths = write_scripts(tmp_path)
+    ledger = UploadLedger(str(tmp_path / "upload_ledger.jsonl"))
+    stats = Neo4jUploader(None, None, None, driver=FailingGraph(1).driver()).upload_files(paths, batch_size=1,
+                                                                                       ledger=ledger)
+    assert stats["failed"] == 1 and stats["committed_transactions"] == 1
+    assert ledger.entries["insat_3d.cypher"]["status"] == "partial"
+
+def test_partial_upload_bumps_the_graph_version(tmp_path, monkeypatch):
+    write_scripts(tmp_path)
+    graph = FailingGraph(fail_after=1)
+    monkeypatch.setattr("upload_to_neo4j.GraphDatabase.driver", lambda *args, **kwargs: graph.driver())
+    stats = upload_all_cypher_queries(str(tmp_path), "bolt://localhost", "neo4j", "password",
+                                      bootstrap=False, bulk=True)
+    assert stats["uploaded"] == 0 and stats["committed_transactions"] == 1
+    assert graph.version is not None
+    with open(tmp_path / "upload_ledger.jsonl", encoding="utf-8") as f:
+        assert json.loads(f.readline())["status"] == "partial"
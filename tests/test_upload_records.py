@@ -0,0 +1,28 @@
+from graph_records import dumps_records
+from local_graph import LocalGraph
+from upload_to_neo4j import Neo4jUploader, UploadLedger, discover_merge_keys, plan_schema
+
+RECORDS = [
+    {"label": "Spacecraft", "name": "INSAT-3D", "properties": {"launch_mass_kg": 2060}},
+    {"label": "Orbit", "name": "Geostationary", "properties": {}},
+    {"type": "ORBITS_IN", "start": ["Spacecraft", "INSAT-3D"], "end": ["Orbit", "Geostationary"]},
+]
+
+def test_graph_records_are_loaded_in_bulk(tmp_path):
+    path = tmp_path / "insat_3d.jsonl"
+    path.write_text(dumps_records(RECORDS), encoding="utf-8")
+    script = tmp_path / "scatsat_1.cypher"
+    script.write_text("MERGE (s:Spacecraft {name: 'SCATSAT-1'}) SET s.launch_mass_kg = 371;", encoding="utf-8")
+    assert plan_schema(discover_merge_keys([str(path), str(script)])) == [
+        ("constraint", "Orbit", "name"), ("constraint", "Spacecraft", "name")]
+
+    graph = LocalGraph()
+    uploader = Neo4jUploader(None, None, None, driver=graph.driver())
+    ledger = UploadLedger(str(tmp_path / "upload_ledger.jsonl"))
+    stats = uploader.upload_bulk([str(path), str(script)], ledger=ledger)
+    assert stats["uploaded"] == 2 and stats["failed"] == 0
+    assert graph.query("MATCH (s:Spacecraft {name: 'INSAT-3D'})-[:ORBITS_IN]->(o:Orbit) RETURN o.name AS orbit") == \
+        [{"orbit": "Geostationary"}]
+    assert graph.query("MATCH (s:Spacecraft {name: $name}) RETURN s.launch_mass_kg AS mass", {"name": "SCATSAT-1"}) == \
+        [{"mass": 371}]
+    assert uploader.upload_bulk([str(path), str(script)], ledger=ledger)["skipped"] == 2
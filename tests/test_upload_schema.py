@@ -0,0 +1,34 @@
+from local_graph import LocalGraph
+from upload_to_neo4j import Neo4jUploader, discover_merge_keys, plan_schema, schema_name
+
+def plan_for(tmp_path, *scripts):
+    paths = []
+    for i, script in enumerate(scripts):
+        path = tmp_path / f"{i}.cypher"
+        path.write_text(script, encoding="utf-8")
+        paths.append(str(path))
+    return plan_schema(discover_merge_keys(paths))
+
+def test_single_key_merges_get_a_constraint(tmp_path):
+    plan = plan_for(tmp_path, "MERGE (s:Spacecraft {name: 'INSAT-3D'});\nMERGE (o:Orbit {name: 'GEO'});\n"
+                              "MERGE (s)-[:ORBITS_IN]->(o);")
+    assert plan == [("constraint", "Orbit", "name"), ("constraint", "Spacecraft", "name")]
+
+def test_multi_key_merges_get_an_index(tmp_path):
+    plan = plan_for(tmp_path, "MERGE (i:Instrument {name: 'Imager'});",
+                    "MERGE (i:Instrument {name: 'Imager', type: 'optical'});")
+    assert plan == [("index", "Instrument", "name")]
+
+def test_nodes_merged_inside_a_path_get_an_index(tmp_path):
+    plan = plan_for(tmp_path, "MERGE (s:Spacecraft {name: 'INSAT-3D'});\n"
+                              "MERGE (o:Orbit {name: 'GEO'});\n"
+                              "MERGE (s)-[:ORBITS_IN]->(g:Orbit {name: 'GEO'});")
+    assert plan == [("index", "Orbit", "name"), ("constraint", "Spacecraft", "name")]
+
+def test_bootstrap_drops_a_constraint_the_plan_no_longer_allows():
+    graph = LocalGraph()
+    uploader = Neo4jUploader(None, None, None, driver=graph.driver())
+    uploader.bootstrap_schema([("constraint", "Orbit", "name")])
+    stats = uploader.bootstrap_schema([("index", "Orbit", "name")])
+    assert stats["dropped_constraints"] == 1 and stats["created"] == 1
+    assert graph.schema_objects == {schema_name("index", "Orbit", "name")}
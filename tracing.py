@@ -0,0 +1,241 @@
+"""
+Lightweight tracing spans for the query path and the ingest scripts.
+
+A span records a named stage's wall time and attributes such as prompt/completion tokens,
+rows returned or cache hits:
+
+    with tracing.span("upload.file", file=filename) as s:
+        ...
+        s.set(statements=len(statements))
+
+Spans opened with `with` become the parent of spans opened inside them (per thread and per
+asyncio task); a span can also be started with an explicit parent and ended with end().
+Finished spans are
+  - appended as JSON lines to TRACE_PATH, if set, and
+  - aggregated into Prometheus metrics (durations, errors, tokens, rows, cache hits),
+    rendered by render_metrics() and served on METRICS_PORT by start_metrics_server().
+
+Tracing is on when TRACE_PATH, METRICS_PORT or TRACE_METRICS=1 is set, or after
+configure(). When it is off, span() returns a shared no-op span, so instrumented code
+costs one function call per stage.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRACE_PATH = os.getenv("TRACE_PATH")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0)) or None
+METRICS_PREFIX = "graph_rag"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current = contextvars.ContextVar("current_span", default=None)
+_state = {"enabled": False, "trace_file": None, "metrics": False}
+_lock = threading.Lock()
+_metrics_server = None
+
+class Span:
+    """
+    One timed stage. Attributes are set at start or with set(); the span is exported when
+    it ends, at the end of its `with` block or by end().
+    """
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "attributes", "_started", "_token", "_ended")
+
+    def __init__(self, name, parent, attributes):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.time()
+        self.attributes = attributes
+        self._started = time.perf_counter()
+        self._token = None
+        self._ended = False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        self.end()
+        return False
+
+    def end(self):
+        if self._ended:
+            return
+        self._ended = True
+        _export(self, time.perf_counter() - self._started)
+
+class _NoopSpan:
+    __slots__ = ()
+    trace_id = span_id = parent_id = None
+
+    def set(self, **attributes):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def end(self):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+def enabled():
+    return _state["enabled"]
+
+def span(name, parent=None, **attributes):
+    """
+    Starts a span named name, a child of parent or else of the innermost open `with` span.
+    """
+    if not _state["enabled"]:
+        return NOOP_SPAN
+    if parent is None:
+        parent = _current.get()
+    return Span(name, parent if isinstance(parent, Span) else None, attributes)
+
+def configure(trace_path=None, metrics=False):
+    """
+    Turns tracing on, writing spans to trace_path (if given) and/or aggregating metrics.
+    """
+    with _lock:
+        if _state["trace_file"]:
+            _state["trace_file"].close()
+            _state["trace_file"] = None
+        if trace_path:
+            directory = os.path.dirname(trace_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _state["trace_file"] = open(trace_path, "a", encoding="utf-8")
+        _state["metrics"] = bool(metrics)
+        _state["enabled"] = bool(trace_path or metrics)
+
+def _export(finished, duration):
+    record = None
+    if _state["trace_file"]:
+        record = json.dumps({
+            "trace_id": finished.trace_id, "span_id": finished.span_id, "parent_id": finished.parent_id,
+            "name": finished.name, "start": round(finished.start, 6), "duration_ms": round(duration * 1000, 3),
+            "attributes": finished.attributes,
+        }, default=str)
+    with _lock:
+        if record and _state["trace_file"]:
+            _state["trace_file"].write(record + "\n")
+            _state["trace_file"].flush()
+        if _state["metrics"]:
+            _metrics.observe(finished.name, duration, finished.attributes)
+
+# --- Metrics ---
+class _Metrics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = defaultdict(int)
+        self.sums = defaultdict(float)
+        self.buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.errors = defaultdict(int)
+        self.tokens = defaultdict(int)
+        self.rows = defaultdict(int)
+        self.cache = defaultdict(int)
+
+    def observe(self, name, duration, attributes):
+        self.counts[name] += 1
+        self.sums[name] += duration
+        buckets = self.buckets[name]
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if duration <= bound:
+                buckets[i] += 1
+        if "error" in attributes:
+            self.errors[name] += 1
+        for kind in ("prompt", "completion"):
+            tokens = attributes.get(f"{kind}_tokens")
+            if tokens:
+                self.tokens[(name, kind)] += tokens
+        if attributes.get("rows") is not None:
+            self.rows[name] += attributes["rows"]
+        if attributes.get("cache_hit") is not None:
+            self.cache[(name, "hit" if attributes["cache_hit"] else "miss")] += 1
+
+    def render(self):
+        lines = [f"# HELP {METRICS_PREFIX}_span_duration_seconds Wall time of traced stages.",
+                 f"# TYPE {METRICS_PREFIX}_span_duration_seconds histogram"]
+        for name in sorted(self.counts):
+            for bound, count in zip(DURATION_BUCKETS, self.buckets[name]):
+                lines.append(f'{METRICS_PREFIX}_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+            lines.append(f'{METRICS_PREFIX}_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {self.counts[name]}')
+            lines.append(f'{METRICS_PREFIX}_span_duration_seconds_sum{{span="{name}"}} {self.sums[name]:.6f}')
+            lines.append(f'{METRICS_PREFIX}_span_duration_seconds_count{{span="{name}"}} {self.counts[name]}')
+        for metric, help_text, values, label in (
+            ("span_errors_total", "Traced stages that raised.", self.errors, None),
+            ("tokens_total", "LLM tokens used, by stage and kind.", self.tokens, "kind"),
+            ("rows_total", "Rows returned by graph queries.", self.rows, None),
+            ("cache_lookups_total", "Cache lookups, by stage and result.", self.cache, "result"),
+        ):
+            lines.append(f"# HELP {METRICS_PREFIX}_{metric} {help_text}")
+            lines.append(f"# TYPE {METRICS_PREFIX}_{metric} counter")
+            for key in sorted(values):
+                labels = f'span="{key[0]}",{label}="{key[1]}"' if label else f'span="{key}"'
+                lines.append(f"{METRICS_PREFIX}_{metric}{{{labels}}} {values[key]}")
+        return "\n".join(lines) + "\n"
+
+_metrics = _Metrics()
+
+def render_metrics():
+    """
+    Returns the aggregated span metrics in the Prometheus text exposition format.
+    """
+    with _lock:
+        return _metrics.render()
+
+def reset_metrics():
+    with _lock:
+        _metrics.reset()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port=None, host="0.0.0.0"):
+    """
+    Serves GET /metrics on port (default METRICS_PORT) from a daemon thread, once per process.
+    Returns the port, or None if no port is configured.
+    """
+    global _metrics_server
+    port = port or METRICS_PORT
+    if not port:
+        return None
+    with _lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _metrics_server.daemon_threads = True
+            threading.Thread(target=_metrics_server.serve_forever, name="metrics", daemon=True).start()
+        return _metrics_server.server_address[1]
+
+if TRACE_PATH or METRICS_PORT or os.getenv("TRACE_METRICS") == "1":
+    configure(TRACE_PATH, metrics=bool(METRICS_PORT or os.getenv("TRACE_METRICS") == "1"))
@@ -1,6 +1,21 @@
+import argparse
+import hashlib
+import json
 import os
+import queue
+import re
+import threading
+import time
+from collections import defaultdict
 from neo4j import GraphDatabase
+from neo4j.exceptions import Neo4jError
 from dotenv import load_dotenv
+from changed_files import clear_changed_list, read_changed_list
+from cypher_bulk import DEFAULT_BULK_BATCH_SIZE, BulkLoad
+from cypher_script import bind_statements, map_keys, node_merges, path_merges, split_statements
+from graph_records import loads_records
+from graph_version import bump_graph_version
+import tracing
 load_dotenv
 
 
@@ -12,18 +27,139 @@ NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 
 CYPHER_QUERIES_FOLDER = 'neo4j_cypher_queries'
 
+# --- Upload Engine Defaults ---
+# Statements are sent in managed write transactions of up to DEFAULT_BATCH_SIZE statements.
+# The driver retries transient errors (deadlocks, leader switches, lost connections) of a
+# transaction for up to DEFAULT_MAX_RETRY_TIME seconds before giving up on the file.
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RETRY_TIME = 30.0
+LEDGER_FILENAME = 'upload_ledger.jsonl'
+# Graph records written by generate_cypher.py --format json; they are always loaded in bulk.
+RECORDS_EXTENSION = '.jsonl'
+SCHEMA_AWAIT_TIMEOUT_SECONDS = 300
+# Recorded by discover_merge_keys() for a label merged inside a path pattern.
+PATH_MERGE_KEYS = ("(path)",)
+
+def file_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def script_statements(cypher_script):
+    """
+    Splits a generated script into statements that can each run in their own query,
+    re-binding variables that were defined by earlier statements.
+    """
+    return bind_statements(split_statements(cypher_script))
+
+# --- Schema Bootstrap ---
+def discover_merge_keys(file_paths):
+    """
+    Scans .cypher files for node MERGEs and returns {label: {tuple of map keys: count}},
+    e.g. {'Instrument': {('name', 'function', 'channels_count'): 2, ('name',): 5}}.
+    Nodes with properties inside a path MERGE are also counted under PATH_MERGE_KEYS.
+    Graph record files (.jsonl) merge every node, and every relationship endpoint, on name.
+    """
+    merge_keys = defaultdict(lambda: defaultdict(int))
+    for file_path in file_paths:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            cypher_script = f.read()
+        if file_path.endswith(RECORDS_EXTENSION):
+            for record in loads_records(cypher_script):
+                labels = [record["start"][0], record["end"][0]] if "type" in record else [record["label"]]
+                for label in labels:
+                    merge_keys[label][("name",)] += 1
+            continue
+        for _, label, props in node_merges(cypher_script):
+            keys = tuple(map_keys(props))
+            if keys:
+                merge_keys[label][keys] += 1
+        for label, props in path_merges(cypher_script):
+            keys = tuple(map_keys(props))
+            if keys:
+                merge_keys[label][keys] += 1
+                merge_keys[label][PATH_MERGE_KEYS] += 1
+    return merge_keys
+
+def plan_schema(merge_keys):
+    """
+    Decides which schema objects make the discovered MERGEs index lookups.
+
+    A label whose MERGEs always use the same single property (e.g. {name: ...}) gets a
+    uniqueness constraint on it, which is also what keeps concurrent MERGEs from creating
+    duplicates. A label that is merged on several properties cannot have a uniqueness
+    constraint on any one of them (two nodes may share a name), and neither can one merged
+    inside a path (the path MERGE creates a second node with the same name when the path
+    is new), so each first key of its MERGE maps gets a range index instead.
+    Returns a list of (kind, label, property).
+    """
+    plan = []
+    for label in sorted(merge_keys):
+        key_sets = [keys for keys in merge_keys[label] if keys != PATH_MERGE_KEYS]
+        if len(key_sets) == 1 and len(key_sets[0]) == 1 and PATH_MERGE_KEYS not in merge_keys[label]:
+            plan.append(("constraint", label, key_sets[0][0]))
+        else:
+            for key in sorted({keys[0] for keys in key_sets}):
+                plan.append(("index", label, key))
+    return plan
+
+def schema_name(kind, label, key):
+    return re.sub(r"\W", "_", f"{label}_{key}_{'unique' if kind == 'constraint' else 'index'}")
+
+def schema_statement(kind, label, key):
+    name = schema_name(kind, label, key)
+    if kind == "constraint":
+        return f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:`{label}`) REQUIRE n.`{key}` IS UNIQUE"
+    return f"CREATE INDEX {name} IF NOT EXISTS FOR (n:`{label}`) ON (n.`{key}`)"
+
+class UploadLedger:
+    """
+    An append-only JSONL record of per-file upload results, so an interrupted upload can
+    resume where it stopped. The last entry for a file wins; a file counts as done only if
+    it was uploaded with the same content hash it has now.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by a crash.
+                    self.entries[entry["file"]] = entry
+
+    def is_done(self, filename, content_hash):
+        entry = self.entries.get(filename)
+        return entry is not None and entry["status"] == "uploaded" and entry["content_hash"] == content_hash
+
+    def record(self, entry):
+        with self._lock:
+            self.entries[entry["file"]] = entry
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+
 class Neo4jUploader:
     """
     A class to connect to Neo4j and upload Cypher queries from files.
+    An already-open driver (e.g. a local stand-in in benchmarks) can be passed instead of
+    connection details.
     """
-    def __init__(self, uri, username, password):
-        self.driver = None
+    def __init__(self, uri, username, password, max_transaction_retry_time=DEFAULT_MAX_RETRY_TIME, driver=None):
+        self.driver = driver
+        if driver is not None:
+            return
         if not password:
             print("Error: NEO4J_PASSWORD environment variable is not set. Cannot connect to Neo4j.")
             return
 
         try:
-            self.driver = GraphDatabase.driver(uri, auth=(username, password))
+            self.driver = GraphDatabase.driver(
+                uri,
+                auth=(username, password),
+                max_transaction_retry_time=max_transaction_retry_time,
+            )
             self.driver.verify_connectivity()
             print(f"Successfully connected to Neo4j at {uri}")
         except Exception as e:
@@ -42,9 +178,79 @@ class Neo4jUploader:
             self.driver.close()
             print("Neo4j connection closed.")
 
-    def upload_cypher_file(self, file_path):
+    def bootstrap_schema(self, plan, timeout=SCHEMA_AWAIT_TIMEOUT_SECONDS):
+        """
+        Creates the constraints and indexes of a plan_schema() plan if they do not exist yet,
+        then waits for all indexes to come online. A uniqueness constraint that cannot be
+        created (e.g. the graph already holds duplicates) falls back to a range index, and
+        one an earlier bootstrap created on a key that now only gets an index (the label
+        is merged on more keys or inside a path) is dropped, so those MERGEs cannot fail.
+        Returns a dict of counts and the seconds spent waiting.
+        """
+        stats = {"requested": len(plan), "created": 0, "existing": 0, "fallback_indexes": 0,
+                 "dropped_constraints": 0, "failed": 0}
+        with tracing.span("upload.schema_bootstrap") as span, self.driver.session() as session:
+            existing = {record["name"] for record in session.run("SHOW INDEXES YIELD name")}
+            existing |= {record["name"] for record in session.run("SHOW CONSTRAINTS YIELD name")}
+            for kind, label, key in plan:
+                stale = schema_name("constraint", label, key)
+                if kind == "index" and stale in existing:
+                    try:
+                        session.run(f"DROP CONSTRAINT {stale} IF EXISTS").consume()
+                        existing.discard(stale)
+                        stats["dropped_constraints"] += 1
+                    except Neo4jError as e:
+                        print(f"Could not drop uniqueness constraint on :{label}({key}): {e.message}")
+                if schema_name(kind, label, key) in existing:
+                    stats["existing"] += 1
+                    continue
+                try:
+                    session.run(schema_statement(kind, label, key)).consume()
+                    stats["created"] += 1
+                except Neo4jError as e:
+                    if kind != "constraint":
+                        print(f"Could not create index on :{label}({key}): {e.message}")
+                        stats["failed"] += 1
+                        continue
+                    print(f"Could not create uniqueness constraint on :{label}({key}), using an index instead: {e.message}")
+                    try:
+                        session.run(schema_statement("index", label, key)).consume()
+                        stats["fallback_indexes"] += 1
+                    except Neo4jError as e:
+                        print(f"Could not create index on :{label}({key}): {e.message}")
+                        stats["failed"] += 1
+
+            start = time.perf_counter()
+            session.run("CALL db.awaitIndexes($timeout)", timeout=timeout).consume()
+            stats["await_seconds"] = time.perf_counter() - start
+            span.set(**stats)
+        return stats
+
+    @staticmethod
+    def _run_batch(tx, statements, attempts):
+        attempts[0] += 1
+        for statement in statements:
+            tx.run(statement).consume()
+
+    def upload_statements(self, session, statements, batch_size=DEFAULT_BATCH_SIZE, committed=None):
+        """
+        Runs statements in order, batch_size at a time, each batch in one managed write
+        transaction. A batch either applies completely or not at all, and is retried by
+        the driver on transient errors. Returns the number of retried transactions; if
+        committed is a list, its first item is increased by each committed transaction.
+        """
+        retries = 0
+        for start in range(0, len(statements), batch_size):
+            attempts = [0]
+            session.execute_write(self._run_batch, statements[start:start + batch_size], attempts)
+            retries += attempts[0] - 1
+            if committed is not None:
+                committed[0] += 1
+        return retries
+
+    def upload_cypher_file(self, file_path, session=None, batch_size=DEFAULT_BATCH_SIZE):
         """
-        Reads a Cypher query from a file and executes it in Neo4j.
+        Reads a Cypher script from a file and executes its statements in Neo4j.
         """
         if not self.driver:
             print(f"Skipping upload for '{file_path}': No active Neo4j connection.")
@@ -58,8 +264,12 @@ class Neo4jUploader:
                 print(f"Warning: '{file_path}' is empty or contains only whitespace. Skipping.")
                 return True # Consider it processed successfully if empty
 
-            with self.driver.session() as session:
-                session.run(cypher_query)
+            statements = script_statements(cypher_query)
+            if session is None:
+                with self.driver.session() as session:
+                    self.upload_statements(session, statements, batch_size)
+            else:
+                self.upload_statements(session, statements, batch_size)
             print(f"Successfully uploaded '{file_path}' to Neo4j.")
             return True
         except FileNotFoundError:
@@ -69,9 +279,173 @@ class Neo4jUploader:
             print(f"Error uploading '{file_path}' to Neo4j: {e}")
             return False
 
-def upload_all_cypher_queries(cypher_folder, uri, username, password):
+    def upload_files(self, file_paths, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE, ledger=None):
+        """
+        Uploads .cypher files with a pool of worker threads. All workers share the driver's
+        connection pool; each keeps one session for all the files it handles. Files already
+        uploaded with their current content according to the ledger are skipped, and every
+        result is appended to it; a file that failed after some of its transactions committed
+        is recorded as "partial". Returns a dict of counts (including committed transactions),
+        statements/sec and elapsed seconds.
+
+        Without uniqueness constraints on the MERGE keys (see bootstrap_schema()), two workers
+        merging the same node at the same time can both create it; use workers=1 in that case.
+        """
+        stats = {"uploaded": 0, "failed": 0, "skipped": 0, "statements": 0, "retries": 0, "committed_transactions": 0}
+        stats_lock = threading.Lock()
+        pending = queue.Queue()
+        for file_path in file_paths:
+            pending.put(file_path)
+
+        def count(**increments):
+            with stats_lock:
+                for key, value in increments.items():
+                    stats[key] += value
+
+        def upload_one(session, file_path):
+            filename = os.path.basename(file_path)
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    cypher_query = f.read()
+            except OSError as e:
+                print(f"Error: could not read '{file_path}': {e}")
+                count(failed=1)
+                return
+
+            content_hash = file_hash(cypher_query)
+            if ledger and ledger.is_done(filename, content_hash):
+                count(skipped=1)
+                return
+
+            statements = script_statements(cypher_query)
+            start = time.perf_counter()
+            committed = [0]
+            try:
+                with tracing.span("upload.file", file=filename, statements=len(statements)) as span:
+                    retries = self.upload_statements(session, statements, batch_size, committed)
+                    span.set(retries=retries)
+            except Exception as e:
+                partial = f" (partially applied: {committed[0]} transactions committed)" if committed[0] else ""
+                print(f"Error uploading '{filename}' to Neo4j{partial}: {e}")
+                count(failed=1, committed_transactions=committed[0])
+                if ledger:
+                    ledger.record({"file": filename, "content_hash": content_hash,
+                                   "status": "partial" if committed[0] else "failed",
+                                   "committed_transactions": committed[0], "error": str(e), "finished_at": time.time()})
+                return
+
+            count(uploaded=1, statements=len(statements), retries=retries, committed_transactions=committed[0])
+            print(f"Uploaded '{filename}' ({len(statements)} statements).")
+            if ledger:
+                ledger.record({"file": filename, "content_hash": content_hash, "status": "uploaded",
+                               "statements": len(statements), "retries": retries,
+                               "seconds": round(time.perf_counter() - start, 3), "finished_at": time.time()})
+
+        def worker():
+            with self.driver.session() as session:
+                while True:
+                    try:
+                        file_path = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    upload_one(session, file_path)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(max(1, min(workers, len(file_paths))))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats["elapsed_seconds"] = time.perf_counter() - start
+        stats["statements_per_second"] = stats["statements"] / stats["elapsed_seconds"] if stats["elapsed_seconds"] else 0.0
+        return stats
+
+    @staticmethod
+    def _run_unwind(tx, query, rows, attempts):
+        attempts[0] += 1
+        tx.run(query, rows=rows).consume()
+
+    def upload_bulk(self, file_paths, bulk_batch_size=DEFAULT_BULK_BATCH_SIZE, batch_size=DEFAULT_BATCH_SIZE, ledger=None):
+        """
+        Uploads .cypher files through cypher_bulk: their statements are translated into
+        parameterized UNWIND batches, run one managed write transaction per batch (nodes
+        first, then relationships), followed by the statements that could not be translated.
+        Graph record files (.jsonl) are added to the same batches.
+        Files are recorded in the ledger once the whole load has succeeded. If it fails after
+        some transactions committed, the graph has already changed: the files are recorded
+        as "partial" and stats["committed_transactions"] says how far the load got.
+        Returns the same counts as upload_files(), plus the number of batches, rows,
+        untranslated statements and committed transactions.
+        """
+        stats = {"uploaded": 0, "failed": 0, "skipped": 0, "statements": 0, "retries": 0, "committed_transactions": 0}
+        start = time.perf_counter()
+        load = BulkLoad()
+        loaded = []
+        for file_path in file_paths:
+            filename = os.path.basename(file_path)
+            with open(file_path, 'r', encoding='utf-8') as f:
+                cypher_query = f.read()
+            content_hash = file_hash(cypher_query)
+            if ledger and ledger.is_done(filename, content_hash):
+                stats["skipped"] += 1
+                continue
+            if file_path.endswith(RECORDS_EXTENSION):
+                load.add_records(loads_records(cypher_query))
+            else:
+                load.add_script(cypher_query)
+            loaded.append((filename, content_hash))
+
+        batches = load.batches(bulk_batch_size)
+        stats.update(batches=len(batches), rows=sum(len(rows) for _, rows in batches), raw=len(load.raw_statements))
+        committed = [0]
+        try:
+            with tracing.span("upload.bulk", files=len(loaded), batches=stats["batches"], batch_rows=stats["rows"],
+                              raw_statements=stats["raw"]), self.driver.session() as session:
+                for query, rows in batches:
+                    attempts = [0]
+                    with tracing.span("upload.bulk_batch", batch_rows=len(rows)) as span:
+                        session.execute_write(self._run_unwind, query, rows, attempts)
+                        span.set(retries=attempts[0] - 1)
+                    stats["retries"] += attempts[0] - 1
+                    committed[0] += 1
+                stats["retries"] += self.upload_statements(session, load.raw_statements, batch_size, committed)
+        except Exception as e:
+            total = len(batches) + -(-len(load.raw_statements) // batch_size)
+            stats["failed"] = len(loaded)
+            stats["committed_transactions"] = committed[0]
+            status = "partial" if committed[0] else "failed"
+            print(f"Error during bulk upload to Neo4j: {e}")
+            if committed[0]:
+                print(f"The upload was partially applied: {committed[0]} of {total} transactions had committed. "
+                      f"Re-running it is safe, since every batch is a MERGE.")
+            if ledger:
+                for filename, content_hash in loaded:
+                    ledger.record({"file": filename, "content_hash": content_hash, "status": status,
+                                   "committed_transactions": committed[0], "total_transactions": total,
+                                   "error": str(e), "finished_at": time.time()})
+        else:
+            stats["uploaded"] = len(loaded)
+            stats["statements"] = load.stats["statements"]
+            stats["committed_transactions"] = committed[0]
+            if ledger:
+                for filename, content_hash in loaded:
+                    ledger.record({"file": filename, "content_hash": content_hash, "status": "uploaded",
+                                   "mode": "bulk", "finished_at": time.time()})
+        stats["elapsed_seconds"] = time.perf_counter() - start
+        stats["statements_per_second"] = stats["statements"] / stats["elapsed_seconds"] if stats["elapsed_seconds"] else 0.0
+        return stats
+
+def upload_all_cypher_queries(cypher_folder, uri, username, password, only_files=None,
+                              workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE, resume=True, bootstrap=True,
+                              bulk=False):
     """
-    Iterates through all .cypher files in a folder and uploads them to Neo4j.
+    Iterates through all .cypher and graph record (.jsonl) files in a folder and uploads
+    them to Neo4j; graph records can only be loaded in bulk, so they switch bulk on.
+    If only_files is given, only files whose name without extension is in it are uploaded.
+    With resume, files the ledger in the folder records as already uploaded (with the same
+    content) are skipped. With bootstrap, constraints and indexes for the (label, MERGE key)
+    pairs used anywhere in the folder are created first. With bulk, the scripts are loaded
+    as parameterized UNWIND batches instead of statement by statement.
     """
     uploader = Neo4jUploader(uri, username, password)
 
@@ -84,31 +458,104 @@ def upload_all_cypher_queries(cypher_folder, uri, username, password):
         uploader.close()
         return
 
-    uploaded_count = 0
-    failed_count = 0
     skipped_count = 0
+    file_paths = []
 
-    print(f"\n--- Starting upload of Cypher queries from '{cypher_folder}' ---")
+    print(f"\n--- Starting upload of Cypher queries from '{cypher_folder}' "
+          f"({workers} workers, {batch_size} statements per transaction) ---")
 
-    for filename in os.listdir(cypher_folder):
-        if filename.endswith(".cypher"):
-            file_path = os.path.join(cypher_folder, filename)
-            print(f"Attempting to upload: '{filename}'")
-            if uploader.upload_cypher_file(file_path):
-                uploaded_count += 1
-            else:
-                failed_count += 1
-        else:
+    for filename in sorted(os.listdir(cypher_folder)):
+        if filename.endswith((".cypher", RECORDS_EXTENSION)) and filename != LEDGER_FILENAME:
+            if only_files is not None and os.path.splitext(filename)[0] not in only_files:
+                continue
+            file_paths.append(os.path.join(cypher_folder, filename))
+        elif filename != LEDGER_FILENAME:
             print(f"Skipping non-.cypher file: '{filename}'")
             skipped_count += 1
+    if not bulk and any(path.endswith(RECORDS_EXTENSION) for path in file_paths):
+        print(f"Found graph record ({RECORDS_EXTENSION}) files; uploading in bulk.")
+        bulk = True
+
+    if bootstrap:
+        all_files = [os.path.join(cypher_folder, f) for f in os.listdir(cypher_folder)
+                     if f.endswith((".cypher", RECORDS_EXTENSION)) and f != LEDGER_FILENAME]
+        plan = plan_schema(discover_merge_keys(all_files))
+        print(f"Bootstrapping schema: {sum(kind == 'constraint' for kind, _, _ in plan)} uniqueness constraints, "
+              f"{sum(kind == 'index' for kind, _, _ in plan)} indexes")
+        schema_stats = uploader.bootstrap_schema(plan)
+        print(f"Schema: {schema_stats['created']} created, {schema_stats['existing']} already existed, "
+              f"{schema_stats['fallback_indexes']} constraints replaced by indexes, "
+              f"{schema_stats['dropped_constraints']} constraints dropped for multi-key or path MERGEs, "
+              f"{schema_stats['failed']} failed; "
+              f"indexes online after {schema_stats['await_seconds']:.1f}s")
+
+    ledger_path = os.path.join(cypher_folder, LEDGER_FILENAME)
+    if not resume and os.path.exists(ledger_path):
+        os.remove(ledger_path)
+    ledger = UploadLedger(ledger_path)
+    if bulk:
+        stats = uploader.upload_bulk(file_paths, batch_size=batch_size, ledger=ledger)
+    else:
+        stats = uploader.upload_files(file_paths, workers=workers, batch_size=batch_size, ledger=ledger)
+
+    if stats['uploaded'] or stats.get('committed_transactions'):
+        # Cached answers (graph_rag_service.py) are only valid for the version they were computed
+        # under, and a failed bulk upload may already have changed the graph.
+        try:
+            stamp, version = bump_graph_version(uploader.driver)
+            print(f"Graph version bumped to {version} ({stamp})")
+        except Exception as e:
+            print(f"Warning: could not bump the graph version, cached answers may be stale: {e}")
 
     uploader.close()
     print("\n--- Upload Process Complete ---")
-    print(f"Total files uploaded: {uploaded_count}")
-    print(f"Total files failed: {failed_count}")
+    print(f"Total files uploaded: {stats['uploaded']}")
+    print(f"Total files failed: {stats['failed']}")
+    if stats['failed'] and stats.get('committed_transactions'):
+        print(f"Partially applied: {stats['committed_transactions']} transactions committed before the failure")
+    print(f"Total files already uploaded (ledger): {stats['skipped']}")
     print(f"Total files skipped: {skipped_count}")
+    print(f"Statements: {stats['statements']} in {stats['elapsed_seconds']:.1f}s "
+          f"({stats['statements_per_second']:.0f} statements/sec), {stats['retries']} transactions retried")
+    if bulk:
+        print(f"Bulk load: {stats['rows']} rows in {stats['batches']} UNWIND batches, "
+              f"{stats['raw']} statements run as written")
     print("Please check your Neo4j browser or logs for verification.")
+    return stats
 
 
 if __name__ == "__main__":
-    upload_all_cypher_queries(CYPHER_QUERIES_FOLDER, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Upload generated .cypher files (or .jsonl graph records) to Neo4j.")
+    parser.add_argument("--folder", default=CYPHER_QUERIES_FOLDER, help="Folder of .cypher files (e.g. neo4j_cypher_resolved after resolve_entities.py), or of .jsonl graph records (neo4j_graph_records).")
+    parser.add_argument("--changed-list", help="Only upload the files named in this list (e.g. scraped_pages/changed_files.txt).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Files uploaded in parallel.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Statements per write transaction.")
+    parser.add_argument("--no-resume", action="store_true", help=f"Discard {LEDGER_FILENAME} and upload every file again.")
+    parser.add_argument("--no-bootstrap", action="store_true", help="Do not create constraints/indexes for MERGE keys first.")
+    parser.add_argument("--bulk", action="store_true", help="Translate the scripts into parameterized UNWIND batches.")
+    parser.add_argument("--trace", help="Append tracing spans (per file, or per UNWIND batch with --bulk) to this JSONL file.")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracing.configure(args.trace)
+
+    only_files = None
+    if args.changed_list:
+        only_files = read_changed_list(args.changed_list)
+
+    stats = upload_all_cypher_queries(
+        args.folder,
+        NEO4J_URI,
+        NEO4J_USERNAME,
+        NEO4J_PASSWORD,
+        only_files=only_files,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        resume=not args.no_resume,
+        bootstrap=not args.no_bootstrap,
+        bulk=args.bulk,
+    )
+    if args.changed_list and stats and not stats['failed']:
+        # Every listed page is in the graph now; the next crawl starts a new list.
+        clear_changed_list(args.changed_list)
+        print(f"Cleared the changed list '{args.changed_list}'.")